@@ -1,4 +1,5 @@
 import logging
+import os
 from config.schemas import RepoConfig, AllReposConfig, ExcelConfig # Import ExcelConfig
 
 logger = logging.getLogger(__name__)
@@ -27,6 +28,7 @@ grt_config = RepoConfig(
     default_tag_prefix="release-spm.mt8678_",
     default_analyze_commit=True,
     default_generate_patch=True,
+    default_use_shared_objects=True,
 )
 
 grt_be_config = RepoConfig(
@@ -40,6 +42,7 @@ grt_be_config = RepoConfig(
     default_tag_prefix="release-spm.mt8678_",
     default_analyze_commit=True,
     default_generate_patch=True,
+    default_use_shared_objects=True,
 )
 
 nebula_config = RepoConfig(
@@ -101,7 +104,17 @@ excel_config = ExcelConfig(
 )
 
 
-all_repos_config = AllReposConfig(
+def resolve_output_paths(config: AllReposConfig) -> AllReposConfig:
+    """Anchors output paths once, so they do not follow the working directory of whichever step uses them."""
+    package_config = config.package_config
+    package_config.output_dir = os.path.abspath(os.path.expanduser(package_config.output_dir))
+    patch_config = config.patch_config
+    # join keeps an absolute blob_store_dir as is
+    patch_config.blob_store_dir = os.path.normpath(os.path.join(package_config.output_dir, os.path.expanduser(patch_config.blob_store_dir)))
+    return config
+
+
+all_repos_config = resolve_output_paths(AllReposConfig(
     repo_configs={
         "grt": grt_config,
         "nebula": nebula_config,
@@ -112,4 +125,4 @@ all_repos_config = AllReposConfig(
     },
     version_source_repo_name="grt",
     excel_config=excel_config # Assign the excel config instance
-)
+))
@@ -1,14 +1,34 @@
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Literal, Any
+from typing import List, Dict, Optional, Literal, Any, Sequence
 
 
-@dataclass
+@dataclass(slots=True)
 class CommitDetail:
     id: str
-    author: str
-    message: str
+    author: str # Interned "name <email>", shared by all commits of the same author
+    subject: str = ""
     patch_path: Optional[str] = None # Stores the relative path to the patch file
     commit_module: Optional[List[str]] = None
+    patch_id: Optional[str] = None # Stable patch-id; equal for cherry-picks of the same change
+    duplicate_of: Optional['CommitDetail'] = field(default=None, repr=False, compare=False) # Canonical commit of the same change, set on duplicates
+    duplicate_refs: Optional[List[str]] = None # "<repo>@<short id>" of every duplicate, set on the canonical commit
+    body_source: Optional[Any] = field(default=None, repr=False, compare=False) # Provides body_for(commit_id) on demand
+    _message: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @property
+    def message(self) -> str:
+        """Full commit message; fetched through body_source on first use unless set explicitly."""
+        if self._message is not None:
+            return self._message
+        if self.body_source is not None:
+            body = self.body_source.body_for(self.id)
+            if body is not None:
+                return body
+        return self.subject
+
+    @message.setter
+    def message(self, value: str) -> None:
+        self._message = value
 
 
 @dataclass
@@ -17,7 +37,10 @@ class LoggingConfig:
     format: str = "%(asctime)s - %(name)s:%(funcName)s:%(lineno)d - %(levelname)s - %(message)s"
 
 
-@dataclass
+_DEFAULT_LOGGING_CONFIG = LoggingConfig()
+
+
+@dataclass(slots=True)
 class GitRepoInfo:
     repo_name: str
     repo_parent: str
@@ -29,17 +52,28 @@ class GitRepoInfo:
     local_branch: Optional[str] = None
     remote_branch: Optional[str] = None
     parent_repo: Optional[str] = None
-    commit_details: List[CommitDetail] = field(default_factory=list) # Updated type
+    commit_details: Sequence[CommitDetail] = () # Shared empty default; CommitAnalyzer assigns a list
     relative_path_in_parent: Optional[str] = None # New field
     newest_version: Optional[str] = None
     next_newest_version: Optional[str] = None
     analyze_commit: bool = False
     generate_patch: bool = False
     branch_info: Optional[str] = None
-    special_branch_repos: Dict[str, Dict[str, str]] = field(default_factory=dict)
     push_template: Optional[str] = None
-    logging_config: LoggingConfig = field(default_factory=LoggingConfig)
-    merge_config: Optional['MergeConfig'] = None
+    use_shared_objects: bool = False # Borrow objects from the group's shared store via objects/info/alternates
+    parent_config: Optional['RepoConfig'] = field(default=None, repr=False, compare=False) # Source of the inherited settings below
+
+    @property
+    def special_branch_repos(self) -> Dict[str, Dict[str, str]]:
+        return self.parent_config.special_branch_repos if self.parent_config else {}
+
+    @property
+    def logging_config(self) -> LoggingConfig:
+        return self.parent_config.logging_config if self.parent_config else _DEFAULT_LOGGING_CONFIG
+
+    @property
+    def merge_config(self) -> Optional['MergeConfig']:
+        return self.parent_config.merge_config if self.parent_config else None
 
 
 @dataclass
@@ -67,6 +101,7 @@ class RepoConfig:
     all_branches: List[str] = field(default_factory=list)
     special_branch_repos: Dict[str, str] = field(default_factory=dict)
     logging_config: LoggingConfig = field(default_factory=LoggingConfig)
+    default_use_shared_objects: bool = False
 
 
 @dataclass
@@ -80,17 +115,26 @@ class SyncStrategyConfig:
     strategy_name: str
     parent_types: List[str]
     sync_actions: List[SyncAction]
+    backend: Literal['git', 'native'] = 'git' # 'native' uses jiri runp / repo forall for jiri and repo parents
+    native_jobs: int = 8
+    skip_unchanged: bool = False # Skip skip_unchanged_commands for clean projects already at the remote sha
+    skip_unchanged_commands: List[str] = field(default_factory=lambda: ["reset", "clean", "pull"])
+    history_mode: Literal['full', 'shallow', 'blobless'] = 'full' # 'shallow' fetches back to the next_newest tag date, 'blobless' uses --filter=blob:none
+    shallow_margin_days: int = 7 # Extra history kept before the next_newest tag date
 
 
 @dataclass
 class PatchConfig:
     temp_patch_dir: str = "/tmp/gr_patches" # Example default
+    binary_blob_threshold: Optional[int] = None # Bytes; commits with a larger binary blob get --no-binary patches and their blobs externalized
+    blob_store_dir: str = "blobs" # Content-addressed <id[:2]>/<id> store next to the package, reused across releases; relative to package_config.output_dir
 
 
 @dataclass
 class PackageConfig:
     project_name: str = "GR-Release-Automation-Tool" # Example default
     zip_name_template: str = "{project_name}_{latest_tag}.zip"
+    output_dir: str = "." # Where the release zip is written; made absolute when the config is loaded
 
 
 @dataclass
@@ -111,6 +155,25 @@ class ExcelConfig:
     zircon_repo_name: str = "zircon"
     garnet_repo_name: str = "garnet"
 
+@dataclass
+class PinnedManifestConfig:
+    enabled: bool = False
+    snapshot_dir: str = "~/.cache/gr_release/pinned_manifests" # <parent>/<version_identifier>.xml
+
+
+@dataclass
+class SnapshotConfig:
+    enabled: bool = True
+    store_path: str = "~/.cache/gr_release/release_snapshots.jsonl" # Append-only, one JSON line per recorded release
+    max_workers: int = 8
+
+
+@dataclass
+class CommitDedupConfig:
+    enabled: bool = True
+    max_workers: int = 8 # Repositories whose patch-ids are computed concurrently
+
+
 @dataclass
 class AllReposConfig:
     repo_configs: Dict[str, RepoConfig] = field(default_factory=dict)
@@ -119,6 +182,10 @@ class AllReposConfig:
     deploy_config: Optional[DeployConfig] = None # Integrated (Optional)
     patch_config: PatchConfig = field(default_factory=PatchConfig) # Integrated
     excel_config: Optional[ExcelConfig] = None # Configuration for Excel report generation
+    manifest_cache_dir: Optional[str] = "~/.cache/gr_release/manifests" # None disables the flattened manifest cache
+    pinned_manifest_config: PinnedManifestConfig = field(default_factory=PinnedManifestConfig)
+    snapshot_config: SnapshotConfig = field(default_factory=SnapshotConfig)
+    commit_dedup_config: CommitDedupConfig = field(default_factory=CommitDedupConfig)
 
     def all_git_repos(self):
         for repo_config in self.repo_configs.values():
@@ -126,9 +193,27 @@ class AllReposConfig:
                 yield git_repo
 
 
+@dataclass
+class SyncExecutionConfig:
+    max_workers: int = 8
+    max_workers_per_remote: int = 4 # 0 disables the per-remote cap
+    timing_cache_path: Optional[str] = "~/.cache/gr_release/sync_timings.json"
+
+
+@dataclass
+class SharedObjectStoreConfig:
+    enabled: bool = False
+    root: str = "~/.cache/gr_release/object-stores"
+    # Store name -> repo names sharing it; opted-in repos not listed use their repo_parent as store name
+    groups: Dict[str, List[str]] = field(default_factory=dict)
+    repack_on_link: bool = False # Drop objects a member now borrows from the store ('git repack -a -d -l')
+
+
 @dataclass
 class AllSyncConfigs:
     sync_configs: Dict[str, SyncStrategyConfig] = field(default_factory=dict)
+    execution: SyncExecutionConfig = field(default_factory=SyncExecutionConfig)
+    shared_object_store: SharedObjectStoreConfig = field(default_factory=SharedObjectStoreConfig)
 
 
 @dataclass
@@ -149,6 +234,7 @@ class BuildPathConfig:
     tee_temp: str = "~/grt/teetemp"
     tee_kernel: str = "~/alps/vendor/mediatek/proprietary/trustzone/grt/source/common/kernel"
     yocto_hypervisor: str = "~/yocto/prebuilt/hypervisor/grt"
+    build_temp_root: str = "~/.cache/gr_release/build-tmp" # Each build type gets <root>/<type> as TMPDIR
 
 
 @dataclass
@@ -161,6 +247,9 @@ class BuildGitConfig:
     remote_branch_tee: str = "release-spm.mt8678_2024_1230"
     push_template: str = "{remote_name} HEAD:refs/for/{remote_branch}"
     sdk_paths_to_add: List[str] = field(default_factory=lambda: ["ree", "run", "hee"])
+    skip_unchanged_artifacts: bool = True # Skip add/commit when the outputs already match HEAD blob ids; an unpushed HEAD is still pushed
+    artifact_digest_workers: int = 8 # Files hashed concurrently per repository
+    publish_max_workers: int = 4 # Target repositories committed and pushed concurrently
 
 
 @dataclass
@@ -177,6 +266,21 @@ class BuildTypeConfig:
     pre_build_clean: bool = True
     post_build_git: bool = True
     post_build_copy_operations: List[FileCopyOperation] = field(default_factory=list)
+    depends_on: List[str] = field(default_factory=list) # Build types that must succeed first when built in the same run
+    resources: List[str] = field(default_factory=list) # Named exclusive resources; types sharing one never run concurrently
+    cache_inputs: List[str] = field(default_factory=lambda: ["grpower", "nebula"]) # Repo config names or paths inside a work tree that key the build cache
+
+
+@dataclass
+class BuildCacheConfig:
+    enabled: bool = True
+    root: str = "~/.cache/gr_release/build-cache" # <root>/<build type>/<fingerprint>/
+    max_entries_per_type: int = 3 # Least recently used entries beyond this are pruned
+    max_workers: int = 8 # Repositories fingerprinted concurrently
+    remote_url: Optional[str] = None # Shared store: a directory, file:// or http(s):// URL; None keeps the cache host-local
+    remote_push: bool = True # Upload entries built on this host to the shared store
+    transfer_workers: int = 4 # Artifact archives transferred concurrently
+    remote_timeout: int = 60 # Seconds per HTTP request
 
 
 @dataclass
@@ -187,6 +291,8 @@ class BuildConfig:
             name="nebula",
             enabled=True,
             pre_build_clean=False,
+            depends_on=["nebula-sdk"], # thyp-sdk is configured against the exported nebula-sdk
+            cache_inputs=["grpower", "nebula", "~/grt/thyp-sdk"],
             post_build_copy_operations=[
                 FileCopyOperation(source_path="products/mt8678-mix/out/gz.img", destination_path="gz.img"),
                 FileCopyOperation(source_path="vmm/out/nbl_vmm", destination_path="nbl_vmm"),
@@ -207,6 +313,16 @@ class BuildConfig:
     paths: BuildPathConfig = field(default_factory=BuildPathConfig)
     git: BuildGitConfig = field(default_factory=BuildGitConfig)
     enable_environment_cleanup: bool = True
+    fast_clean: bool = True # Cleanup renames paths into a trash dir and deletes them in the background
+    max_pending_trash: int = 4 # Trashed trees awaiting deletion before cleanup blocks
     max_concurrent_builds: int = 1
+    copy_max_workers: int = 8 # Post-build artifact copies run concurrently
     build_timeout_seconds: int = 3600
     max_git_retries: int = 3
+    cache: BuildCacheConfig = field(default_factory=BuildCacheConfig)
+    env_capture_cache_dir: Optional[str] = "~/.cache/gr_release/env-capture" # None re-runs env.sh/configure.sh on every build
+    env_capture_max_age: Optional[int] = 86400 # Seconds a capture is reused; only the top-level script is hashed, not the files it sources. None never expires
+    checkpoint_dir: Optional[str] = "~/.cache/gr_release/build-checkpoints" # <dir>/<build type>/<stage>.json; None disables stage checkpoints
+    resume_from_checkpoints: bool = False # Skip stages an earlier run completed with the same inputs; also skips the initial cleanup
+    # Environment variables that key memoized build steps; everything else (e.g. per-session values env.sh exports) is ignored
+    step_memo_env_keys: List[str] = field(default_factory=lambda: ["PATH", "LD_LIBRARY_PATH", "PYTHONPATH", "LANG", "LC_ALL", "ARCH", "CROSS_COMPILE", "CC", "CXX"])
@@ -1,10 +1,11 @@
-from config.schemas import AllSyncConfigs, SyncStrategyConfig, SyncAction
+from config.schemas import AllSyncConfigs, SyncStrategyConfig, SyncAction, SharedObjectStoreConfig
 
 sync_strategies_config = AllSyncConfigs(
     sync_configs={
         "alps_yocto_sync": SyncStrategyConfig(
             strategy_name="alps_yocto_sync",
             parent_types=["alps", "yocto"],
+            skip_unchanged=True,
             sync_actions=[
                 SyncAction(action_type="git_command", action_params={"command": "fetch", "args": ["--all"]}),
                 SyncAction(action_type="git_command", action_params={"command": "checkout", "args": ["-f", "{local_branch}"]}),
@@ -35,6 +36,7 @@ sync_strategies_config = AllSyncConfigs(
         "grt_grt_be_sync": SyncStrategyConfig(
             strategy_name="grt_grt_be_sync",
             parent_types=["grt", "grt_be"],
+            skip_unchanged=True,
             sync_actions=[
                 SyncAction(action_type="git_command", action_params={"command": "checkout", "args": ["-f", "{local_branch}"]}),
                 SyncAction(action_type="git_command", action_params={"command": "reset", "args": ["--hard", "{remote_name}/{remote_branch}"]}),
@@ -42,5 +44,10 @@ sync_strategies_config = AllSyncConfigs(
                 SyncAction(action_type="git_command", action_params={"command": "pull", "args": []}),
             ],
         ),
-    }
-)
\ No newline at end of file
+    },
+    shared_object_store=SharedObjectStoreConfig(
+        enabled=False, # Linking writes objects/info/alternates into the checkouts; they then depend on the store for good
+        root="/home/nebula/.cache/gr_release/object-stores",
+        groups={"grt": ["grt", "grt_be"]},
+    ),
+)
@@ -0,0 +1,381 @@
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import tarfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.schemas import AllReposConfig, BuildCacheConfig
+from core.remote_cache import RemoteArtifactStore, create_remote_store
+from utils.custom_logger import Logger
+from utils.git_utils import GitOperator
+from typing import Any, Dict, List, Optional, Tuple
+
+MANIFEST_NAME = "manifest.json"
+
+
+class BuildCache:
+    """Content-addressed store of build artifacts, keyed by a fingerprint of the build inputs.
+
+    An entry lives in <root>/<build type>/<fingerprint>/ and holds a copy of every
+    artifact plus a manifest naming each copy logically, as <root name>/<relative
+    path>. Root names map to local directories chosen by the caller on restore, so
+    an entry (possibly pulled from another host) never decides where files land.
+    Entries are written to a temporary directory and renamed into place, so a
+    reader never sees half an entry.
+
+    With a remote store configured, a local miss is pulled from the store and a
+    fresh local entry is pushed to it. Each artifact travels as one tar archive
+    whose sha256 is recorded in the remote manifest; the manifest is uploaded
+    last, so other hosts only see an entry once all of its archives are there.
+    """
+
+    def __init__(self, config: BuildCacheConfig, git_operator: GitOperator, all_repos_config: AllReposConfig):
+        self.config = config
+        self.git_operator = git_operator
+        self.all_repos_config = all_repos_config
+        self.logger = Logger(name=self.__class__.__name__)
+        self.root = pathlib.Path(config.root).expanduser()
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+        self.remote_hits: List[str] = []
+        self._lock = threading.Lock()
+        self.remote: Optional[RemoteArtifactStore] = create_remote_store(config) if config.remote_url else None
+
+    def fingerprint(self, build_type: str, inputs: List[str], exclude_paths: List[pathlib.Path], extra: Dict[str, Any]) -> Optional[str]:
+        """Returns the cache key for the current input state, or None when the inputs cannot be pinned.
+
+        An input is a repo config name (every git repo of it, by HEAD) or a path inside a
+        work tree (the committed tree below it, minus exclude_paths). Inputs with tracked
+        local changes make the build uncacheable, since HEAD no longer describes them.
+        """
+        sources: List[Tuple[str, str]] = [] # (label, path)
+        for input_name in inputs:
+            repo_config = self.all_repos_config.repo_configs.get(input_name)
+            if repo_config and repo_config.git_repos:
+                sources.extend((f"{input_name}/{repo.repo_name}", repo.repo_path) for repo in repo_config.git_repos if repo.repo_path)
+            elif repo_config:
+                sources.append((input_name, repo_config.path))
+            else:
+                sources.append((input_name, input_name))
+
+        with ThreadPoolExecutor(max_workers=max(1, self.config.max_workers), thread_name_prefix="build-cache") as pool:
+            states = list(pool.map(lambda source: self._source_state(source[1], exclude_paths), sources))
+
+        for (label, _), state in zip(sources, states):
+            if state is None:
+                self.logger.info(f"Build cache bypassed for {build_type}: input {label} is not a clean git work tree")
+                return None
+        identity = {
+            "build_type": build_type,
+            "inputs": {label: state for (label, _), state in zip(sources, states)},
+            "extra": extra,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _source_state(self, path: str, exclude_paths: List[pathlib.Path]) -> Optional[str]:
+        resolved = pathlib.Path(path).expanduser().resolve()
+        if not resolved.is_dir():
+            return None
+        toplevel = self.git_operator.get_toplevel(str(resolved))
+        if not toplevel:
+            return None
+        top = pathlib.Path(toplevel).resolve()
+        prefix = "" if resolved == top else resolved.relative_to(top).as_posix()
+        excluded = []
+        for exclude_path in exclude_paths:
+            candidate = exclude_path.expanduser().resolve()
+            if candidate.is_relative_to(resolved):
+                excluded.append(candidate.relative_to(top).as_posix())
+
+        pathspecs = [prefix or "."] + [f":(exclude){p}" for p in excluded]
+        if not self.git_operator.is_worktree_clean(str(top), pathspecs):
+            return None
+        if not prefix and not excluded:
+            return self.git_operator.resolve_commit(str(top), "HEAD")
+        return self.git_operator.get_tree_digest(str(top), "HEAD", prefix, excluded)
+
+    def _entry_dir(self, build_type: str, key: str) -> pathlib.Path:
+        return self.root / build_type / key
+
+    @staticmethod
+    def _logical_name(artifact: pathlib.Path, roots: Dict[str, pathlib.Path]) -> Optional[str]:
+        """'<root name>[/<relative path>]' of artifact under the most specific root containing it."""
+        matches = [(name, root) for name, root in roots.items() if artifact == root or artifact.is_relative_to(root)]
+        if not matches:
+            return None
+        name, root = max(matches, key=lambda match: len(match[1].parts))
+        relative = artifact.relative_to(root).as_posix()
+        return name if relative == "." else f"{name}/{relative}"
+
+    @staticmethod
+    def _destination(logical_name: str, roots: Dict[str, pathlib.Path]) -> pathlib.Path:
+        """Local path of a manifest entry; raises ValueError for unknown roots, absolute paths or '..'."""
+        root_name, _, relative = logical_name.partition("/")
+        if root_name not in roots:
+            raise ValueError(f"artifact '{logical_name}' names an unknown root")
+        relative_path = pathlib.PurePosixPath(relative)
+        if relative_path.is_absolute() or ".." in relative_path.parts:
+            raise ValueError(f"artifact '{logical_name}' escapes its root")
+        return roots[root_name].joinpath(*relative_path.parts)
+
+    def restore(self, build_type: str, key: str, roots: Dict[str, pathlib.Path]) -> bool:
+        """Restores a cached entry, placing each artifact below the local directory its root name maps to."""
+        entry_dir = self._entry_dir(build_type, key)
+        manifest_path = entry_dir / MANIFEST_NAME
+        if not manifest_path.is_file() and not (self.remote and self._pull(build_type, key)):
+            self._record(build_type, hit=False)
+            return False
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            # Validate every entry before touching the work tree
+            destinations = [self._destination(artifact["name"], roots) for artifact in manifest["artifacts"]]
+            for index, (artifact, destination) in enumerate(zip(manifest["artifacts"], destinations)):
+                stored = entry_dir / "data" / str(index)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                if artifact["kind"] == "dir":
+                    shutil.copytree(stored, destination, symlinks=True, dirs_exist_ok=True)
+                else:
+                    shutil.copy2(stored, destination)
+            os.utime(manifest_path) # Recency for pruning
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.error(f"Could not restore cached {build_type} artifacts from {entry_dir}: {e}")
+            self._record(build_type, hit=False)
+            return False
+        self.logger.info(f"Build cache hit for {build_type} ({key[:12]}): restored {len(manifest['artifacts'])} artifacts")
+        self._record(build_type, hit=True)
+        return True
+
+    def store(self, build_type: str, key: str, artifacts: List[pathlib.Path], roots: Dict[str, pathlib.Path]) -> bool:
+        entry_dir = self._entry_dir(build_type, key)
+        temp_dir = entry_dir.with_name(f"{key}.tmp-{os.getpid()}-{threading.get_ident()}")
+        manifest: Dict[str, Any] = {
+            "build_type": build_type,
+            "key": key,
+            "stored_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "artifacts": [],
+        }
+        try:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            (temp_dir / "data").mkdir(parents=True)
+            for artifact in artifacts:
+                if not artifact.exists():
+                    self.logger.warning(f"Not caching {build_type}: expected artifact {artifact} is missing")
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    return False
+                name = self._logical_name(artifact, roots)
+                if name is None:
+                    self.logger.warning(f"Not caching {build_type}: artifact {artifact} is outside the cache roots {sorted(roots)}")
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    return False
+                stored = temp_dir / "data" / str(len(manifest["artifacts"]))
+                if artifact.is_dir():
+                    shutil.copytree(artifact, stored, symlinks=True)
+                    kind = "dir"
+                else:
+                    shutil.copy2(artifact, stored)
+                    kind = "file"
+                manifest["artifacts"].append({"name": name, "kind": kind})
+            (temp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            os.replace(temp_dir, entry_dir)
+        except OSError as e:
+            self.logger.error(f"Could not store {build_type} artifacts in the build cache: {e}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return False
+        self.logger.info(f"Cached {len(manifest['artifacts'])} {build_type} artifacts under {entry_dir}")
+        self._prune(build_type)
+        if self.remote and self.config.remote_push:
+            self._push(build_type, key)
+        return True
+
+    def _transfer_dir(self, build_type: str, key: str, direction: str) -> pathlib.Path:
+        transfer_dir = self.root / build_type / f"{key}.{direction}-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(transfer_dir, ignore_errors=True)
+        (transfer_dir / "data").mkdir(parents=True)
+        return transfer_dir
+
+    @staticmethod
+    def _file_digest(path: pathlib.Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _pull(self, build_type: str, key: str) -> bool:
+        prefix = f"{build_type}/{key}"
+        transfer_dir = None
+        try:
+            transfer_dir = self._transfer_dir(build_type, key, "pull")
+            if not self.remote.fetch(f"{prefix}/{MANIFEST_NAME}", transfer_dir / MANIFEST_NAME):
+                return False
+            manifest = json.loads((transfer_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+            with ThreadPoolExecutor(max_workers=max(1, self.config.transfer_workers), thread_name_prefix="cache-pull") as pool:
+                list(pool.map(lambda item: self._pull_artifact(prefix, transfer_dir, *item), enumerate(manifest["artifacts"])))
+            entry_dir = self._entry_dir(build_type, key)
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            os.replace(transfer_dir, entry_dir)
+        except (OSError, ValueError, KeyError, tarfile.TarError) as e:
+            self.logger.warning(f"Could not pull {build_type} build {key[:12]} from {self.remote.location}: {e}")
+            return False
+        finally:
+            if transfer_dir:
+                shutil.rmtree(transfer_dir, ignore_errors=True)
+        self.logger.info(f"Pulled {build_type} build {key[:12]} from {self.remote.location}")
+        with self._lock:
+            self.remote_hits.append(build_type)
+        self._prune(build_type)
+        return True
+
+    def _pull_artifact(self, prefix: str, transfer_dir: pathlib.Path, index: int, artifact: Dict[str, Any]) -> None:
+        object_name = f"{index}.tar" # Never the manifest's word for it
+        if artifact.get("object") != object_name:
+            raise ValueError(f"unexpected archive name {artifact.get('object')!r} for artifact {index}")
+        archive = transfer_dir / object_name
+        if not self.remote.fetch(f"{prefix}/{object_name}", archive):
+            raise ValueError(f"archive {object_name} is missing from the store")
+        digest = self._file_digest(archive)
+        if digest != artifact["sha256"]:
+            raise ValueError(f"integrity check failed for {object_name}: expected sha256 {artifact['sha256']}, got {digest}")
+        with tarfile.open(archive) as tar:
+            stray = [member.name for member in tar.getmembers() if member.name != str(index) and not member.name.startswith(f"{index}/")]
+            if stray:
+                raise ValueError(f"archive {object_name} holds entries outside artifact {index}: {stray[:5]}")
+            tar.extractall(transfer_dir / "data", filter="tar")
+        archive.unlink()
+
+    def _push(self, build_type: str, key: str) -> bool:
+        prefix = f"{build_type}/{key}"
+        entry_dir = self._entry_dir(build_type, key)
+        transfer_dir = None
+        try:
+            if self.remote.exists(f"{prefix}/{MANIFEST_NAME}"):
+                self.logger.debug(f"{build_type} build {key[:12]} is already in {self.remote.location}")
+                return True
+            manifest = json.loads((entry_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+            transfer_dir = self._transfer_dir(build_type, key, "push")
+            with ThreadPoolExecutor(max_workers=max(1, self.config.transfer_workers), thread_name_prefix="cache-push") as pool:
+                objects = list(pool.map(lambda index: self._push_artifact(prefix, entry_dir, transfer_dir, index), range(len(manifest["artifacts"]))))
+            for artifact, (object_name, digest, size) in zip(manifest["artifacts"], objects):
+                artifact.update(object=object_name, sha256=digest, size=size)
+            (transfer_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            self.remote.upload(f"{prefix}/{MANIFEST_NAME}", transfer_dir / MANIFEST_NAME)
+        except (OSError, ValueError, KeyError, tarfile.TarError) as e:
+            self.logger.warning(f"Could not push {build_type} build {key[:12]} to {self.remote.location}: {e}")
+            return False
+        finally:
+            if transfer_dir:
+                shutil.rmtree(transfer_dir, ignore_errors=True)
+        self.logger.info(f"Pushed {build_type} build {key[:12]} to {self.remote.location}")
+        return True
+
+    def _push_artifact(self, prefix: str, entry_dir: pathlib.Path, transfer_dir: pathlib.Path, index: int) -> Tuple[str, str, int]:
+        object_name = f"{index}.tar"
+        archive = transfer_dir / object_name
+        with tarfile.open(archive, "w") as tar:
+            tar.add(entry_dir / "data" / str(index), arcname=str(index))
+        digest = self._file_digest(archive)
+        self.remote.upload(f"{prefix}/{object_name}", archive)
+        return object_name, digest, archive.stat().st_size
+
+    def _prune(self, build_type: str) -> None:
+        type_dir = self.root / build_type
+        entries = sorted(
+            (path for path in type_dir.iterdir() if (path / MANIFEST_NAME).is_file()),
+            key=lambda path: (path / MANIFEST_NAME).stat().st_mtime,
+            reverse=True,
+        )
+        for stale in entries[max(1, self.config.max_entries_per_type):]:
+            self.logger.info(f"Pruning build cache entry {stale}")
+            shutil.rmtree(stale, ignore_errors=True)
+
+    def _record(self, build_type: str, hit: bool) -> None:
+        with self._lock:
+            (self.hits if hit else self.misses).append(build_type)
+
+    def report(self) -> None:
+        with self._lock:
+            if not self.hits and not self.misses:
+                return
+            self.logger.info(
+                f"Build cache: {len(self.hits)} hits {self.hits} ({len(self.remote_hits)} pulled from the shared store), "
+                f"{len(self.misses)} misses {self.misses}"
+            )
+
+
+class EnvCaptureCache:
+    """Remembers the environment a script leaves behind (env.sh, configure.sh).
+
+    Keyed by the script content, its arguments, the working directory and the
+    fingerprint of the base environment. Only the variables the script set,
+    changed or unset are stored; a hit applies them to the current base
+    environment, so per-session values such as SSH_AUTH_SOCK are never replayed
+    from an old run.
+
+    Only the top-level script is hashed: an edit to a file it sources (or to a
+    tool it queries) is not noticed until the capture expires after max_age
+    seconds, or the cache directory is removed.
+    """
+
+    def __init__(self, cache_dir: str, max_age: Optional[int] = None):
+        self.logger = Logger(name=self.__class__.__name__)
+        self.cache_dir = pathlib.Path(cache_dir).expanduser()
+        self.max_age = max_age
+
+    @staticmethod
+    def key(script_path: pathlib.Path, script_args: List[str], cwd: pathlib.Path, base_env_fingerprint: str) -> Optional[str]:
+        try:
+            script_digest = hashlib.sha256(script_path.read_bytes()).hexdigest()
+        except OSError:
+            return None # Let the capture itself report the missing script
+        identity = {
+            "script": str(script_path.resolve()),
+            "script_sha256": script_digest,
+            "args": list(script_args),
+            "cwd": str(cwd.resolve()),
+            "base_env": base_env_fingerprint,
+        }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def load(self, key: str, base_env: Dict[str, str]) -> Optional[Dict[str, str]]:
+        entry_path = self.cache_dir / f"{key}.json"
+        try:
+            if self.max_age is not None and time.time() - entry_path.stat().st_mtime > self.max_age:
+                self.logger.info(f"Environment capture {entry_path.name} is older than {self.max_age}s; capturing again")
+                return None
+            entry = json.loads(entry_path.read_text(encoding="utf-8"))
+            changed, unset = entry["changed"], entry["unset"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Ignoring unreadable environment capture {entry_path}: {e}")
+            return None
+        env = dict(base_env)
+        env.update(changed)
+        for name in unset:
+            env.pop(name, None)
+        return env
+
+    def store(self, key: str, captured_env: Dict[str, str], base_env: Dict[str, str], script_path: pathlib.Path) -> None:
+        entry_path = self.cache_dir / f"{key}.json"
+        entry = {
+            "script": str(script_path),
+            "captured_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "changed": {name: value for name, value in captured_env.items() if base_env.get(name) != value},
+            "unset": sorted(name for name in base_env if name not in captured_env),
+        }
+        temp_path = entry_path.with_name(f"{entry_path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(entry, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            self.logger.warning(f"Could not cache environment captured from {script_path}: {e}")
+            temp_path.unlink(missing_ok=True)
+
@@ -0,0 +1,114 @@
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import threading
+from dataclasses import dataclass
+from utils.custom_logger import Logger
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class BuildStage:
+    name: str
+    # Receives the outputs of earlier stages; returns its own (JSON-serializable) outputs, persisted with its marker
+    run: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+    # Extra fingerprint material beyond the build inputs and the stages before it (e.g. the commands it runs)
+    inputs: Optional[Callable[[], Any]] = None
+
+
+class StageRunner:
+    """Runs a build type as named stages and checkpoints each completed one.
+
+    A stage's key chains the build's input fingerprint, the keys of all earlier
+    stages and the stage's own inputs, so changing anything upstream invalidates
+    everything after it. Markers live in <checkpoint dir>/<build type>/<stage>.json.
+    When resuming, leading stages whose marker matches are skipped (their outputs
+    are restored from the marker) and the build continues from the first
+    invalidated stage; everything from there on runs again.
+    """
+
+    def __init__(self, checkpoint_dir: Optional[str]):
+        self.logger = Logger(name=self.__class__.__name__)
+        self.checkpoint_dir = pathlib.Path(checkpoint_dir).expanduser() if checkpoint_dir else None
+        self._lock = threading.Lock()
+
+    def _marker_path(self, build_type: str, stage_name: str) -> pathlib.Path:
+        return self.checkpoint_dir / build_type / f"{stage_name}.json"
+
+    def run(self, build_type: str, stages: List[BuildStage], inputs_key: Optional[str], resume: bool) -> Dict[str, Any]:
+        """Runs (or skips) stages in order; a failing stage raises and leaves earlier markers in place."""
+        checkpointing = self.checkpoint_dir is not None and inputs_key is not None
+        if resume and not checkpointing:
+            self.logger.info(f"Cannot resume {build_type}: checkpoints are disabled or its inputs could not be pinned. Running all stages.")
+        resuming = resume and checkpointing
+        context: Dict[str, Any] = {}
+        previous_key = inputs_key or ""
+        for index, stage in enumerate(stages):
+            stage_inputs = stage.inputs() if stage.inputs else None
+            key = hashlib.sha256(json.dumps([previous_key, stage.name, stage_inputs], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+            previous_key = key
+            if resuming:
+                marker = self._load_marker(build_type, stage.name)
+                if marker and marker.get("key") == key:
+                    self.logger.info(f"[{build_type}] Stage '{stage.name}' completed at {marker.get('completed_at')}; skipping")
+                    context.update(marker.get("outputs") or {})
+                    continue
+                self.logger.info(f"[{build_type}] Resuming from stage '{stage.name}' ({index + 1}/{len(stages)})")
+                resuming = False
+
+            if checkpointing:
+                self._remove_markers(build_type, [later.name for later in stages[index:]])
+            self.logger.info(f"[{build_type}] Stage '{stage.name}' ({index + 1}/{len(stages)})")
+            outputs = stage.run(context) or {}
+            context.update(outputs)
+            if checkpointing:
+                self._save_marker(build_type, stage.name, key, outputs)
+        return context
+
+    def _load_marker(self, build_type: str, stage_name: str) -> Optional[Dict[str, Any]]:
+        marker_path = self._marker_path(build_type, stage_name)
+        try:
+            return json.loads(marker_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable stage marker {marker_path}: {e}")
+            return None
+
+    def _save_marker(self, build_type: str, stage_name: str, key: str, outputs: Dict[str, Any]) -> None:
+        marker_path = self._marker_path(build_type, stage_name)
+        marker = {
+            "build_type": build_type,
+            "stage": stage_name,
+            "key": key,
+            "completed_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "outputs": outputs,
+        }
+        temp_path = marker_path.with_name(f"{marker_path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+        try:
+            with self._lock:
+                marker_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path.write_text(json.dumps(marker, indent=2, sort_keys=True), encoding="utf-8")
+                os.replace(temp_path, marker_path)
+        except OSError as e:
+            # A missing marker only costs a rerun of this stage
+            self.logger.warning(f"Could not record completion of stage {build_type}/{stage_name}: {e}")
+            temp_path.unlink(missing_ok=True)
+
+    def _remove_markers(self, build_type: str, stage_names: List[str]) -> None:
+        with self._lock:
+            for stage_name in stage_names:
+                self._marker_path(build_type, stage_name).unlink(missing_ok=True)
+
+    def invalidate(self, build_type: Optional[str] = None) -> None:
+        """Drops the markers of build_type (every build type when None), e.g. after its workspace was cleaned."""
+        if not self.checkpoint_dir:
+            return
+        target = self.checkpoint_dir / build_type if build_type else self.checkpoint_dir
+        with self._lock:
+            if target.exists():
+                self.logger.info(f"Invalidating build stage checkpoints in {target}")
+                shutil.rmtree(target, ignore_errors=True)
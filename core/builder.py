@@ -1,16 +1,49 @@
+import glob
+import hashlib
+import json
 import os
 import pathlib
 import shlex
 import shutil
 import subprocess
-from dataclasses import asdict
-from typing import List, Dict, Optional, Any, Tuple
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import List, Dict, Optional, Any, Set, Tuple
 from config.schemas import BuildConfig, BuildTypeConfig, FileCopyOperation, BuildGitConfig, AllReposConfig, GitRepoInfo # Added AllReposConfig, GitRepoInfo
 from utils.command_executor import CommandExecutor
 from utils.custom_logger import Logger
 from utils.file_utils import FileOperator
 from utils.git_utils import GitOperator
-
+from core.build_cache import BuildCache, EnvCaptureCache
+from core.build_stages import BuildStage, StageRunner
+
+# Never part of an environment fingerprint: they differ per build type, shell or login, not per result
+_VOLATILE_ENV_KEYS = frozenset({"TMPDIR", "PWD", "OLDPWD", "SHLVL", "TERM", "DISPLAY", "WINDOWID"})
+_VOLATILE_ENV_PREFIXES = ("SSH_", "XDG_")
+# Printed NUL-terminated before `env -0`, so script output and the environment dump never mix
+_ENV_CAPTURE_MARKER = "@@env-capture"
+_ENV_DUMP_COMMAND = f"printf '%s\\0' {_ENV_CAPTURE_MARKER} && env -0"
+# Local refs recording the last commit pushed per remote branch, so resumed runs know what is still unpublished
+_PUSHED_REF_PREFIX = "refs/gr-release/pushed"
+
+
+def _env_fingerprint(env: Dict[str, str]) -> str:
+    stable = sorted(
+        (key, value) for key, value in env.items()
+        if key not in _VOLATILE_ENV_KEYS and not key.startswith(_VOLATILE_ENV_PREFIXES)
+    )
+    return hashlib.sha256(json.dumps(stable).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RepoPublicationResult:
+    repo_path: str
+    repo_context_name: str
+    unchanged: bool = False # Outputs already matched HEAD; add and commit were skipped
+    committed: bool = False
+    pushed: bool = False
+    error: Optional[str] = None
 
 class BuildSystem:
     def __init__(self, build_config: BuildConfig, command_executor: CommandExecutor, all_repos_config: AllReposConfig) -> None: # Added all_repos_config
@@ -18,8 +51,12 @@ class BuildSystem:
         self.command_executor: CommandExecutor = command_executor
         self.all_repos_config: AllReposConfig = all_repos_config # Store all_repos_config
         self.logger: Logger = Logger(name=self.__class__.__name__)
-        self.file_operator: FileOperator = FileOperator()
+        self.file_operator: FileOperator = FileOperator(max_pending_trash=self.config.max_pending_trash)
         self.git_operator: GitOperator = GitOperator(command_executor)
+        self.build_cache: BuildCache = BuildCache(self.config.cache, self.git_operator, all_repos_config)
+        self.stage_runner: StageRunner = StageRunner(self.config.checkpoint_dir)
+        self._resume: bool = self.config.resume_from_checkpoints
+        self.env_capture_cache: Optional[EnvCaptureCache] = EnvCaptureCache(self.config.env_capture_cache_dir, self.config.env_capture_max_age) if self.config.env_capture_cache_dir else None
 
         # Path definitions remain the same...
         self.grpower_path: pathlib.Path = pathlib.Path("~/grpower/").expanduser()
@@ -30,9 +67,22 @@ class BuildSystem:
         self.tee_temp_path: pathlib.Path = pathlib.Path(self.config.paths.tee_temp).expanduser()
         self.tee_kernel_path: pathlib.Path = pathlib.Path(self.config.paths.tee_kernel).expanduser()
         self.yocto_hypervisor_path: pathlib.Path = pathlib.Path(self.config.paths.yocto_hypervisor).expanduser()
-
-
-    def clean_environment(self) -> None:
+        self.build_temp_root: pathlib.Path = pathlib.Path(self.config.paths.build_temp_root).expanduser()
+
+        # Every build type drives the one grpower workspace (set-product, export, clean),
+        # so those phases are serialized even when build types run concurrently
+        self._grpower_lock = threading.Lock()
+        self._git_lock = threading.Lock()
+        self._thread_state = threading.local() # temp_dir and artifact_checks of the build type running on this thread
+        # Keys of memoized steps that completed in this workspace state; cleared by clean_environment
+        self._completed_steps: Set[str] = set()
+        self._completed_steps_lock = threading.Lock()
+        # Runs "outputs already match HEAD" checks ahead of the git step; pending ones live in _thread_state
+        self._artifact_check_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="artifact-check")
+
+
+    def clean_environment(self, build_type: Optional[str] = None) -> None:
+        """Removes the grpower build trees; build_type scopes the stage checkpoints dropped (None drops all)."""
         if not self.config.enable_environment_cleanup:
             self.logger.info("Environment cleanup disabled, skipping...")
             return
@@ -42,44 +92,82 @@ class BuildSystem:
             (str(self.nebula_out_path), [""])
         ]
 
+        with self._completed_steps_lock:
+            if self._completed_steps:
+                self.logger.info(f"Workspace cleanup invalidates {len(self._completed_steps)} memoized build steps.")
+            self._completed_steps.clear()
+        # Only the cleaning build type restarts from scratch; other types' later stages do not read these trees
+        self.stage_runner.invalidate(build_type)
+
         for base_path_str, subpaths in paths_to_clean:
             expanded_base = pathlib.Path(base_path_str).expanduser()
             for subpath in subpaths:
                 full_path = expanded_base / subpath
                 self.logger.info(f"Cleaning path: {full_path}")
-                self.file_operator.remove_directory_recursive(str(full_path))
+                # Fast clean returns once the tree is renamed away; the build can recreate it immediately
+                self.file_operator.remove_directory_recursive(str(full_path), background=self.config.fast_clean)
 
 
-    def _get_environment_after_sourcing(self, script_path: pathlib.Path, cwd: pathlib.Path) -> Dict[str, str]:
+    @staticmethod
+    def _capturable_env(env: Dict[str, str]) -> Dict[str, str]:
+        return {key: value for key, value in env.items() if key.isidentifier() and not key.startswith('_')}
+
+    def _parse_env_dump(self, stdout: str) -> Optional[Dict[str, str]]:
+        """Parses the `env -0` dump that follows the capture marker; None if the marker never printed."""
+        marker = f"{_ENV_CAPTURE_MARKER}\0"
+        marker_index = stdout.rfind(marker)
+        if marker_index == -1:
+            return None
         env_vars: Dict[str, str] = {}
-        command_str = f"export NO_PIPENV_SHELL=1 && source {shlex.quote(str(script_path))} && env"
-        self.logger.debug(f"Attempting to capture environment using command in {cwd}: {command_str}")
-        try:
-            process_result = self.command_executor._run_subprocess(
-                 command=command_str,
-                 cwd=cwd,
-                 shell=True,
-                 capture_output=True,
-                 text=True,
-                 check=True
-             )
-
-            if process_result.stdout:
-                for line in process_result.stdout.strip().splitlines():
-                    line = line.strip()
-                    if not line:
-                        continue
-                    if '=' not in line or line.startswith('#') or line.startswith('export'):
-                        continue
-                    parts = line.split('=', 1)
-                    if len(parts) == 2:
-                        key, value = parts
-                        # Basic filtering, might need refinement
-                        if key.isidentifier() and not key.startswith('_') and '(' not in key:
-                           env_vars[key] = value
-            else:
-                 self.logger.warning(f"No stdout received from environment capture command: '{command_str}' in {cwd}")
+        for entry in stdout[marker_index + len(marker):].split("\0"):
+            key, separator, value = entry.partition("=")
+            if separator:
+                env_vars[key] = value # Values keep embedded newlines intact
+        return self._capturable_env(env_vars)
+
+    def _capture_environment(
+        self,
+        command_str: str,
+        script_path: pathlib.Path,
+        script_args: List[str],
+        cwd: pathlib.Path,
+        base_env: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
+        """Runs command_str (which ends in the env dump) unless an identical capture is cached."""
+        effective_base_env = os.environ.copy()
+        effective_base_env.update(base_env or {})
+        effective_base_env = self._capturable_env(effective_base_env)
+        cache_key = None
+        if self.env_capture_cache:
+            cache_key = EnvCaptureCache.key(script_path, script_args, cwd, _env_fingerprint(effective_base_env))
+        if cache_key:
+            cached_env = self.env_capture_cache.load(cache_key, effective_base_env)
+            if cached_env is not None:
+                self.logger.info(f"Reusing cached environment of {script_path.name} (script, arguments and base environment unchanged)")
+                return cached_env
+
+        self.logger.debug(f"Attempting environment capture in {cwd}: {command_str}")
+        process_result = self.command_executor._run_subprocess(
+            command=command_str,
+            cwd=cwd,
+            shell=True, # Shell=True needed for 'source' and '&&'
+            capture_output=True,
+            text=True,
+            check=True,
+            env=base_env
+        )
+        env_vars = self._parse_env_dump(process_result.stdout or "")
+        if env_vars is None:
+            self.logger.warning(f"No environment dump found in the output of '{command_str}' in {cwd}")
+            return {}
+        if cache_key and env_vars:
+            self.env_capture_cache.store(cache_key, env_vars, effective_base_env, script_path)
+        return env_vars
 
+    def _get_environment_after_sourcing(self, script_path: pathlib.Path, cwd: pathlib.Path) -> Dict[str, str]:
+        command_str = f"export NO_PIPENV_SHELL=1 && source {shlex.quote(str(script_path))} && {_ENV_DUMP_COMMAND}"
+        try:
+            env_vars = self._capture_environment(command_str, script_path, [], cwd)
         except (subprocess.CalledProcessError, FileNotFoundError) as e:
             self.logger.error(f"Failed to execute or find command for environment capture from {script_path.name} in {cwd}: {e}")
             raise RuntimeError(f"Failed to capture environment from script {script_path.name}") from e
@@ -100,60 +188,18 @@ class BuildSystem:
         cwd: pathlib.Path,
         base_env: Optional[Dict[str, str]] = None
     ) -> Dict[str, str]:
-        env_vars: Dict[str, str] = {}
         script_name: str = script_path.name
-        quoted_cwd: str = shlex.quote(str(cwd))
         # Ensure script is executed relative to cwd if it's in cwd
         if script_path.parent == cwd:
             quoted_script: str = f"./{shlex.quote(script_name)}"
         else:
              quoted_script: str = shlex.quote(str(script_path))
 
-        joined_args: str = shlex.join(script_args)
-
-        # Simplified command structure
-        command_str: str = f"{quoted_script} {joined_args} && env"
-
-        self.logger.debug(f"Attempting script execution and environment capture in {cwd}: {command_str}")
+        # The marker separates the script's own output from the env dump
+        command_str: str = f"{quoted_script} {shlex.join(script_args)} && {_ENV_DUMP_COMMAND}"
 
         try:
-            process_result = self.command_executor._run_subprocess(
-                command=command_str,
-                cwd=cwd,
-                shell=True, # Shell=True needed for '&&'
-                capture_output=True,
-                text=True,
-                check=True,
-                env=base_env
-            )
-
-            if process_result.stdout:
-                env_output_lines = process_result.stdout.strip().splitlines()
-                # Find the start of the 'env' output (crude heuristic)
-                env_start_index = -1
-                for i, line in enumerate(env_output_lines):
-                     if '=' in line and line.strip() == line and not line.startswith('#'): # Likely env output
-                         env_start_index = i
-                         break
-
-                if env_start_index != -1:
-                    for line in env_output_lines[env_start_index:]:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        if '=' not in line or line.startswith('#') or line.startswith('export'):
-                            continue
-                        parts = line.split('=', 1)
-                        if len(parts) == 2:
-                            key, value = parts
-                            if key.isidentifier() and not key.startswith('_') and '(' not in key:
-                                env_vars[key] = value
-                else:
-                     self.logger.warning(f"Could not reliably find 'env' output after script execution: '{command_str}' in {cwd}")
-
-            else:
-                self.logger.warning(f"No stdout received from script execution and environment capture: '{command_str}' in {cwd}")
-
+            env_vars = self._capture_environment(command_str, script_path, script_args, cwd, base_env)
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Script execution failed during environment capture: {script_name} in {cwd}. Stderr: {e.stderr}")
             raise RuntimeError(f"Script {script_name} failed with exit code {e.returncode}") from e
@@ -167,15 +213,33 @@ class BuildSystem:
         if not env_vars:
             self.logger.error(f"Captured environment after executing {script_name} appears empty. This is unexpected.")
             # Avoid raising error here, allow build to potentially continue if env isn't strictly needed later
-            # raise RuntimeError(f"Failed to capture environment after script {script_name} (result was empty).")
 
         self.logger.info(f"Successfully captured {len(env_vars)} environment variables after executing {script_name}")
         return env_vars
 
 
+    def _step_key(self, previous_key: str, command_type: str, cmd_spec: Dict[str, Any]) -> str:
+        """Identity of a build step: command, args, cwd, the step_memo_env_keys environment and source tree, chained to the step before it."""
+        cwd = cmd_spec.get("cwd")
+        effective_env = os.environ.copy()
+        effective_env.update(cmd_spec.get("env") or {})
+        # An explicit subset: a freshly sourced env.sh differs from run to run in values that do not affect the output
+        step_env = {name: effective_env.get(name) for name in sorted(self.config.step_memo_env_keys)}
+        tree_sha = self.git_operator.resolve_commit(str(cwd), "HEAD") if cwd else None
+        identity = [previous_key, command_type, cmd_spec.get("command"), cmd_spec.get("args", []), str(cwd), step_env, tree_sha]
+        return hashlib.sha256(json.dumps(identity, default=str).encode("utf-8")).hexdigest()
+
     def _execute_build_commands(self, commands: List[Dict[str, Any]], check: bool = True) -> None:
+        temp_dir: Optional[pathlib.Path] = getattr(self._thread_state, "temp_dir", None)
+        # Memoized steps are only reused while every step before them was memoized too (a shared prefix)
+        prefix_key: Optional[str] = ""
         for cmd_spec in commands:
+            cmd_spec = dict(cmd_spec) # Callers reuse their specs (e.g. as stage inputs); never modify them
             command_type = cmd_spec.pop("type", "shell_command") # Default to shell_command if not specified
+            memoize = cmd_spec.pop("memoize", False)
+            if temp_dir:
+                # Concurrent build types must not share scratch files
+                cmd_spec["env"] = {**(cmd_spec.get("env") or {}), "TMPDIR": str(temp_dir)}
             cwd = cmd_spec.get("cwd")
             if cwd:
                  # Expand user paths consistently
@@ -197,24 +261,42 @@ class BuildSystem:
             # Default check to True unless explicitly set to False in spec
             cmd_check = cmd_spec.get("check", check)
 
+            step_key: Optional[str] = None
+            if memoize and prefix_key is not None:
+                step_key = self._step_key(prefix_key, command_type, cmd_spec)
+                with self._completed_steps_lock:
+                    already_done = step_key in self._completed_steps
+                if already_done:
+                    self.logger.info(f"Reusing completed build step: {cmd_spec.get('command')} {' '.join(map(str, cmd_spec.get('args', [])))}")
+                    prefix_key = step_key
+                    continue
+
             self.command_executor.execute(command_type, cmd_spec, check=cmd_check)
 
+            if step_key:
+                with self._completed_steps_lock:
+                    self._completed_steps.add(step_key)
+            prefix_key = step_key
+
 
     def build_nebula_sdk(self) -> bool:
         build_type_name = "nebula-sdk"
         try:
             self.logger.info(f"Starting {build_type_name} build")
             commands: List[Dict[str, Any]] = [
-                {"command": "gr-nebula.py", "args": ["build"], "cwd": self.grpower_path},
-                {"command": "gr-nebula.py", "args": ["export-buildroot"], "cwd": self.grpower_path},
+                {"command": "gr-nebula.py", "args": ["build"], "cwd": self.grpower_path, "memoize": True},
+                {"command": "gr-nebula.py", "args": ["export-buildroot"], "cwd": self.grpower_path, "memoize": True},
                 {"command": "gr-android.py", "args": ["set-product", "--product-name", "pvt8675"], "cwd": self.grpower_path},
                 {"command": "gr-nebula.py", "args": ["export-sdk", "-o", str(self.nebula_sdk_output_path)], "cwd": self.grpower_path}
             ]
-            self._execute_build_commands(commands)
 
-            build_type_config = self.config.build_types.get(build_type_name)
-            if build_type_config and build_type_config.post_build_git:
-                self._handle_sdk_git_operations(build_type_name)
+            def run_grpower_commands(context: Dict[str, Any]) -> None:
+                with self._grpower_lock:
+                    self._execute_build_commands(self._with_grpower_env(commands))
+
+            self._run_stages(build_type_name, [
+                BuildStage("grpower-export-sdk", run_grpower_commands, inputs=lambda: commands),
+            ])
 
             self.logger.info(f"{build_type_name} build completed successfully")
             return True
@@ -226,57 +308,81 @@ class BuildSystem:
         build_type_name = "nebula"
         try:
             self.logger.info(f"Starting {build_type_name} build")
+            self._run_stages(build_type_name, [
+                BuildStage("grpower-export-images", self._nebula_grpower_stage),
+                BuildStage("sdk-info-link", self._nebula_sdk_info_stage, inputs=lambda: str(self.nebula_sdk_output_path)),
+                BuildStage("configure", self._nebula_configure_stage),
+                BuildStage("build-all", self._nebula_build_all_stage),
+                BuildStage("post-build-copy", self._nebula_post_build_copy_stage),
+            ])
+            self.logger.info(f"{build_type_name} build completed successfully")
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError, OSError, RuntimeError, Exception) as e:
+            self.logger.error(f"{build_type_name} build failed: {e}", exc_info=True)
+            return False
 
-            self.logger.info("Capturing build environment from grpower env script...")
-            nebula_build_env: Dict[str, str] = {}
-            try:
-                 nebula_build_env = self._get_environment_after_sourcing(
-                      script_path=self.grpower_path / "scripts/env.sh",
-                      cwd=self.grpower_path
-                 )
-                 if not nebula_build_env:
-                     self.logger.warning("Captured build environment from grpower is empty. Proceeding cautiously.")
-                     # Do not raise error, allow build to proceed
-            except RuntimeError as e:
-                  self.logger.error(f"Failed to capture grpower build environment: {e}. Proceeding without it.")
-                  # Do not re-raise, allow build to proceed
+    def _grpower_build_env(self) -> Dict[str, str]:
+        """The environment scripts/env.sh sets up; empty (with an error logged) if it cannot be captured."""
+        self.logger.info("Capturing build environment from grpower env script...")
+        try:
+            grpower_env = self._get_environment_after_sourcing(
+                script_path=self.grpower_path / "scripts/env.sh",
+                cwd=self.grpower_path
+            )
+            if not grpower_env:
+                self.logger.warning("Captured build environment from grpower is empty. Proceeding cautiously.")
+            return grpower_env
+        except RuntimeError as e:
+            self.logger.error(f"Failed to capture grpower build environment: {e}. Proceeding without it.")
+            return {}
+
+    def _with_grpower_env(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copies of commands with the grpower environment injected into the gr-*.py scripts.
+
+        Every build type runs its grpower commands this way, so the gr-nebula.py build and
+        export-buildroot prefix they share gets the same step key and runs once per workspace state.
+        """
+        grpower_env = self._grpower_build_env()
+        if not grpower_env:
+            self.logger.warning("Skipping environment injection as grpower env capture failed or was empty.")
+            return commands
+
+        self.logger.info("Applying captured grpower environment to relevant commands...")
+        target_scripts = ["gr-nebula.py", "gr-android.py"]
+        commands_with_env = []
+        for cmd_spec in commands:
+            current_command = cmd_spec.get("command")
+            # Check if command is one of the target scripts
+            is_target = False
+            if isinstance(current_command, str) and current_command in target_scripts:
+                is_target = True
+            elif isinstance(current_command, list) and current_command and current_command[0] in target_scripts:
+                 is_target = True
+
+            if is_target:
+                modified_spec = cmd_spec.copy()
+                # Merge env: existing OS env + captured env
+                merged_env = os.environ.copy()
+                merged_env.update(grpower_env)
+                modified_spec["env"] = merged_env
+                modified_spec.pop("shell", None) # Let executor handle shell if needed based on command type
+                self.logger.debug(f"Injecting captured grpower env into command: {current_command}")
+                commands_with_env.append(modified_spec)
+            else:
+                commands_with_env.append(cmd_spec)
+        return commands_with_env
 
+    def _nebula_grpower_stage(self, context: Dict[str, Any]) -> None:
+        # One stage: another build type must not switch the grpower product between these steps
+        with self._grpower_lock:
             self.logger.info("Preparing initial build commands...")
             initial_commands_spec: List[Dict[str, Any]] = [
-                {"command": "gr-nebula.py", "args": ["build"], "cwd": self.grpower_path},
-                {"command": "gr-nebula.py", "args": ["export-buildroot"], "cwd": self.grpower_path},
+                {"command": "gr-nebula.py", "args": ["build"], "cwd": self.grpower_path, "memoize": True},
+                {"command": "gr-nebula.py", "args": ["export-buildroot"], "cwd": self.grpower_path, "memoize": True},
                 {"command": "gr-android.py", "args": ["set-product", "--product-name", "pvt8675"], "cwd": self.grpower_path},
                 {"command": "gr-android.py", "args": ["buildroot", "export_nebula_images", "-o", str(self.prebuilt_images_path)], "cwd": self.grpower_path}
             ]
-
-            # Apply environment if captured
-            commands_with_env = []
-            if nebula_build_env:
-                self.logger.info("Applying captured grpower environment to relevant commands...")
-                target_scripts = ["gr-nebula.py", "gr-android.py"]
-                for cmd_spec in initial_commands_spec:
-                    current_command = cmd_spec.get("command")
-                    # Check if command is one of the target scripts
-                    is_target = False
-                    if isinstance(current_command, str) and current_command in target_scripts:
-                        is_target = True
-                    elif isinstance(current_command, list) and current_command and current_command[0] in target_scripts:
-                         is_target = True
-
-                    if is_target:
-                        modified_spec = cmd_spec.copy()
-                        # Merge env: existing OS env + captured env
-                        merged_env = os.environ.copy()
-                        merged_env.update(nebula_build_env)
-                        modified_spec["env"] = merged_env
-                        modified_spec.pop("shell", None) # Let executor handle shell if needed based on command type
-                        self.logger.debug(f"Injecting captured grpower env into command: {current_command}")
-                        commands_with_env.append(modified_spec)
-                    else:
-                        commands_with_env.append(cmd_spec)
-            else:
-                 self.logger.warning("Skipping environment injection as grpower env capture failed or was empty.")
-                 commands_with_env = initial_commands_spec
+            commands_with_env = self._with_grpower_env(initial_commands_spec)
 
             self.logger.info("Executing initial build commands...")
             self._execute_build_commands(commands_with_env)
@@ -285,128 +391,126 @@ class BuildSystem:
             dst_elf = self.prebuilt_images_path / "nebula_kernel.elf"
             self.file_operator.copy_file(str(src_elf), str(dst_elf))
 
-            self.logger.info("Configuring thyp-sdk environment by creating sdk_info link...")
-            sdk_info_target = self.thyp_sdk_path / "sdk_info"
-            nebula_sdk_source = self.nebula_sdk_output_path
-
-            try:
-                if not nebula_sdk_source.is_dir():
-                     msg = f"Nebula SDK source directory does not exist: {nebula_sdk_source}"
-                     self.logger.error(msg)
-                     raise FileNotFoundError(msg)
-
-                if sdk_info_target.is_symlink() or sdk_info_target.exists():
-                    self.logger.debug(f"Removing existing sdk_info link/directory: {sdk_info_target}")
-                    if sdk_info_target.is_symlink():
-                        sdk_info_target.unlink()
-                    elif sdk_info_target.is_dir():
-                         shutil.rmtree(sdk_info_target)
-
-                self.logger.info(f"Creating symlink: {sdk_info_target} -> {nebula_sdk_source}")
-                os.symlink(nebula_sdk_source.resolve(), sdk_info_target, target_is_directory=True)
-                self.logger.info("thyp-sdk environment configured successfully (sdk_info link created).")
-            except OSError as e:
-                self.logger.error(f"Failed to create symlink {sdk_info_target} -> {nebula_sdk_source}: {e}")
-                raise
-            except FileNotFoundError as e:
-                 raise
-
-            self.logger.info("Executing thyp-sdk configure script and capturing environment...")
-            configure_script_path: pathlib.Path = self.thyp_sdk_path / 'configure.sh'
-            configure_args: List[str] = [str(self.nebula_sdk_output_path.resolve())]
-            configure_env: Dict[str, str] = {}
-            try:
-                configure_env = self._get_environment_after_script_execution(
-                    script_path=configure_script_path,
-                    script_args=configure_args,
-                    cwd=self.thyp_sdk_path
-                )
-            except RuntimeError as e:
-                self.logger.error(f"Failed to execute configure.sh or capture its environment: {e}. Proceeding without it.")
-                # Allow build to continue without configure env
-
-            self.logger.info("Successfully executed configure.sh.")
-            if configure_env:
-                 self.logger.info(f"Captured {len(configure_env)} variables from configure.sh.")
-            else:
-                 self.logger.warning("Environment capture after configure.sh failed or was empty.")
-
-
-            self.logger.info("Preparing environment for build_all.sh...")
-            build_all_env: Dict[str, str] = os.environ.copy() # Start with current OS env
-            if configure_env:
-                build_all_env.update(configure_env) # Overlay captured env
-
-            # Ensure necessary locale settings
-            build_all_env['LC_ALL'] = 'C.UTF-8'
-            build_all_env['LANG'] = 'C.UTF-8'
+    def _nebula_sdk_info_stage(self, context: Dict[str, Any]) -> None:
+        self.logger.info("Configuring thyp-sdk environment by creating sdk_info link...")
+        sdk_info_target = self.thyp_sdk_path / "sdk_info"
+        nebula_sdk_source = self.nebula_sdk_output_path
 
-            if 'PATH' not in build_all_env:
-                self.logger.warning("PATH variable not found in environment for build_all.sh. Build might fail.")
-
-            self.logger.debug(f"Environment prepared for build_all.sh with {len(build_all_env)} variables.")
-
-            build_all_command_spec: List[Dict[str, Any]] = [
-                 {
-                     "command": "./build_all.sh", # Assume it's executable and in cwd
-                     "cwd": self.thyp_sdk_path,
-                     "shell": True, # Usually needed for scripts
-                     "env": build_all_env
-                 }
-            ]
-            self.logger.info("Executing thyp-sdk build script (build_all.sh) with prepared environment...")
-            self._execute_build_commands(build_all_command_spec)
+        try:
+            if not nebula_sdk_source.is_dir():
+                 msg = f"Nebula SDK source directory does not exist: {nebula_sdk_source}"
+                 self.logger.error(msg)
+                 raise FileNotFoundError(msg)
+
+            if sdk_info_target.is_symlink() or sdk_info_target.exists():
+                self.logger.debug(f"Removing existing sdk_info link/directory: {sdk_info_target}")
+                if sdk_info_target.is_symlink():
+                    sdk_info_target.unlink()
+                elif sdk_info_target.is_dir():
+                     shutil.rmtree(sdk_info_target)
+
+            self.logger.info(f"Creating symlink: {sdk_info_target} -> {nebula_sdk_source}")
+            os.symlink(nebula_sdk_source.resolve(), sdk_info_target, target_is_directory=True)
+            self.logger.info("thyp-sdk environment configured successfully (sdk_info link created).")
+        except OSError as e:
+            self.logger.error(f"Failed to create symlink {sdk_info_target} -> {nebula_sdk_source}: {e}")
+            raise
+
+    def _nebula_configure_stage(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        self.logger.info("Executing thyp-sdk configure script and capturing environment...")
+        configure_script_path: pathlib.Path = self.thyp_sdk_path / 'configure.sh'
+        configure_args: List[str] = [str(self.nebula_sdk_output_path.resolve())]
+        configure_env: Dict[str, str] = {}
+        try:
+            configure_env = self._get_environment_after_script_execution(
+                script_path=configure_script_path,
+                script_args=configure_args,
+                cwd=self.thyp_sdk_path
+            )
+        except RuntimeError as e:
+            self.logger.error(f"Failed to execute configure.sh or capture its environment: {e}. Proceeding without it.")
+            # Allow build to continue without configure env
 
-            self.logger.info("Performing post-build copy operations...")
-            copy_success = self._perform_post_build_copy(build_type_name)
-            if not copy_success:
-                self.logger.error(f"Post-build copy step failed for {build_type_name}. Aborting build.")
-                return False
-            self.logger.info("Post-build copy operations completed successfully.")
+        self.logger.info("Successfully executed configure.sh.")
+        if configure_env:
+             self.logger.info(f"Captured {len(configure_env)} variables from configure.sh.")
+        else:
+             self.logger.warning("Environment capture after configure.sh failed or was empty.")
+        # Persisted with the stage marker, so a resumed build_all.sh gets the same environment
+        return {"configure_env": configure_env}
+
+    def _nebula_build_all_stage(self, context: Dict[str, Any]) -> None:
+        configure_env: Dict[str, str] = context.get("configure_env") or {}
+        self.logger.info("Preparing environment for build_all.sh...")
+        build_all_env: Dict[str, str] = os.environ.copy() # Start with current OS env
+        if configure_env:
+            build_all_env.update(configure_env) # Overlay captured env
+
+        # Ensure necessary locale settings
+        build_all_env['LC_ALL'] = 'C.UTF-8'
+        build_all_env['LANG'] = 'C.UTF-8'
+
+        if 'PATH' not in build_all_env:
+            self.logger.warning("PATH variable not found in environment for build_all.sh. Build might fail.")
+
+        self.logger.debug(f"Environment prepared for build_all.sh with {len(build_all_env)} variables.")
+
+        build_all_command_spec: List[Dict[str, Any]] = [
+             {
+                 "command": "./build_all.sh", # Assume it's executable and in cwd
+                 "cwd": self.thyp_sdk_path,
+                 "shell": True, # Usually needed for scripts
+                 "env": build_all_env
+             }
+        ]
+        self.logger.info("Executing thyp-sdk build script (build_all.sh) with prepared environment...")
+        self._execute_build_commands(build_all_command_spec)
 
-            build_type_config = self.config.build_types.get(build_type_name)
-            if build_type_config and build_type_config.post_build_git:
-                self._handle_nebula_git_operations(build_type_name)
+    def _nebula_post_build_copy_stage(self, context: Dict[str, Any]) -> None:
+        build_type_name = "nebula"
+        build_type_config = self.config.build_types.get(build_type_name)
+        if build_type_config and build_type_config.post_build_git:
+            # prebuilt-images is final once build_all.sh is done; digest it while the copy runs
+            prebuilt_repo_path, prebuilt_paths, _ = self._nebula_git_targets()[0]
+            self._start_artifact_check(prebuilt_repo_path, prebuilt_paths)
 
-            self.logger.info(f"{build_type_name} build completed successfully")
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError, OSError, RuntimeError, Exception) as e:
-            self.logger.error(f"{build_type_name} build failed: {e}", exc_info=True)
-            return False
+        self.logger.info("Performing post-build copy operations...")
+        if not self._perform_post_build_copy(build_type_name):
+            self.logger.error(f"Post-build copy step failed for {build_type_name}. Aborting build.")
+            raise RuntimeError(f"Post-build copy failed for {build_type_name}")
+        self.logger.info("Post-build copy operations completed successfully.")
 
     def build_tee(self) -> bool:
         build_type_name = "TEE"
         try:
             self.logger.info(f"Starting {build_type_name} build")
-
             build_type_config = self.config.build_types.get(build_type_name)
-            if build_type_config and build_type_config.pre_build_clean:
-                 self.clean_environment()
 
-            commands: List[Dict[str, Any]] = [
-                {"command": "gr-nebula.py", "args": ["build"], "cwd": self.grpower_path},
-                {"command": "gr-nebula.py", "args": ["export-buildroot"], "cwd": self.grpower_path},
-                {"command": "gr-android.py", "args": ["set-product", "--product-name", "pvt8675_tee"], "cwd": self.grpower_path}
-            ]
-            self._execute_build_commands(commands)
-
-            self.file_operator.create_directory(str(self.tee_temp_path))
-
-            export_command: Dict[str, Any] = {
-                 "command": "gr-android.py",
-                 "args": ["buildroot", "export_nebula_images", "-o", str(self.tee_temp_path)],
-                 "cwd": self.grpower_path
-            }
-            self.command_executor.execute("shell_command", export_command)
-
-
-            self.file_operator.copy_wildcard(
-                str(self.tee_temp_path / "nebula*.bin"),
-                str(self.tee_kernel_path)
-            )
+            def run_grpower_export(context: Dict[str, Any]) -> None:
+                with self._grpower_lock:
+                    if build_type_config and build_type_config.pre_build_clean:
+                         self.clean_environment(build_type_name)
+
+                    self.file_operator.create_directory(str(self.tee_temp_path))
+
+                    commands: List[Dict[str, Any]] = [
+                        {"command": "gr-nebula.py", "args": ["build"], "cwd": self.grpower_path, "memoize": True},
+                        {"command": "gr-nebula.py", "args": ["export-buildroot"], "cwd": self.grpower_path, "memoize": True},
+                        {"command": "gr-android.py", "args": ["set-product", "--product-name", "pvt8675_tee"], "cwd": self.grpower_path},
+                        {"command": "gr-android.py", "args": ["buildroot", "export_nebula_images", "-o", str(self.tee_temp_path)], "cwd": self.grpower_path}
+                    ]
+                    self._execute_build_commands(self._with_grpower_env(commands))
+
+            def collect_kernel_images(context: Dict[str, Any]) -> None:
+                self.file_operator.copy_wildcard(
+                    str(self.tee_temp_path / "nebula*.bin"),
+                    str(self.tee_kernel_path)
+                )
 
-            if build_type_config and build_type_config.post_build_git:
-                self._handle_tee_git_operations(build_type_name)
+            self._run_stages(build_type_name, [
+                BuildStage("grpower-export-images", run_grpower_export),
+                BuildStage("collect-kernel-images", collect_kernel_images),
+            ])
 
             self.logger.info(f"{build_type_name} build completed successfully")
             return True
@@ -414,6 +518,17 @@ class BuildSystem:
             self.logger.error(f"{build_type_name} build failed: {e}", exc_info=True)
             return False
 
+    def _run_stages(self, build_type: str, stages: List[BuildStage]) -> Dict[str, Any]:
+        """Runs a build type's stages, appending post-build publication when post_build_git is set."""
+        build_type_config = self.config.build_types.get(build_type)
+        if build_type_config and build_type_config.post_build_git:
+            def publish(context: Dict[str, Any]) -> None:
+                if not self._run_post_build_git(build_type):
+                    raise RuntimeError(f"Post-build git publication failed for {build_type}")
+            stages = stages + [BuildStage("publish", publish, inputs=lambda: asdict(self.config.git))]
+        inputs_key = getattr(self._thread_state, "inputs_key", None)
+        return self.stage_runner.run(build_type, stages, inputs_key, self._resume)
+
 
     def _perform_post_build_copy(self, build_type_name: str) -> bool:
         self.logger.info(f"Starting post-build copy operations for {build_type_name}")
@@ -430,30 +545,30 @@ class BuildSystem:
             self.logger.info(f"No post-build copy operations defined or list is empty for {build_type_name}.")
             return True
 
+        source_base = self.thyp_sdk_path # Assuming most copies are from thyp_sdk
+        dest_base = self.yocto_hypervisor_path # Assuming most copies are to yocto
+        copy_pairs: List[Tuple[str, str]] = []
         for op in copy_operations:
-            try:
-                # Resolve paths relative to their base directories
-                source_base = self.thyp_sdk_path # Assuming most copies are from thyp_sdk
-                dest_base = self.yocto_hypervisor_path # Assuming most copies are to yocto
-
-                if op.is_wildcard:
-                    absolute_source_pattern = str(source_base.joinpath(op.source_path))
-                    absolute_destination_dir = str(dest_base.joinpath(op.destination_path))
-                    self.logger.info(f"Copying wildcard: {absolute_source_pattern} -> {absolute_destination_dir}")
-                    success = self.file_operator.copy_wildcard(absolute_source_pattern, absolute_destination_dir)
-                else:
-                    absolute_source_path = str(source_base.joinpath(op.source_path))
-                    absolute_destination_path = str(dest_base.joinpath(op.destination_path))
-                    self.logger.info(f"Copying file: {absolute_source_path} -> {absolute_destination_path}")
-                    success = self.file_operator.copy_file(absolute_source_path, absolute_destination_path)
-
-                if not success:
-                    # Error logged by file_operator, just return False
-                    return False
-
-            except Exception as e:
-                self.logger.exception(f"Unexpected error during post-build copy operation (source='{op.source_path}', dest='{op.destination_path}'): {e}")
-                return False
+            if op.is_wildcard:
+                absolute_source_pattern = str(source_base.joinpath(op.source_path))
+                absolute_destination_dir = dest_base.joinpath(op.destination_path)
+                matched_files = sorted(glob.glob(absolute_source_pattern))
+                if not matched_files:
+                    self.logger.warning(f"No files match pattern: {absolute_source_pattern}")
+                self.logger.info(f"Copying wildcard: {absolute_source_pattern} -> {absolute_destination_dir} ({len(matched_files)} files)")
+                copy_pairs.extend((src_file, str(absolute_destination_dir / os.path.basename(src_file))) for src_file in matched_files)
+            else:
+                absolute_source_path = str(source_base.joinpath(op.source_path))
+                absolute_destination_path = str(dest_base.joinpath(op.destination_path))
+                self.logger.info(f"Copying file: {absolute_source_path} -> {absolute_destination_path}")
+                copy_pairs.append((absolute_source_path, absolute_destination_path))
+
+        # One batch, so the many small files of wildcard operations (e.g. symbols/) share the worker pool
+        copy_result = self.file_operator.bulk_copy(copy_pairs, max_workers=self.config.copy_max_workers)
+        if not copy_result.succeeded:
+            # Errors logged by file_operator
+            self.logger.error(f"Post-build copy failed for {len(copy_result.failed)} files: {sorted(copy_result.failed)}")
+            return False
 
         self.logger.info(f"Successfully completed all post-build copy operations for {build_type_name}.")
         return True
@@ -489,7 +604,7 @@ class BuildSystem:
             self.logger.exception(f"Error during GitRepoInfo lookup for path {target_path}: {e}")
             return None
 
-    def _push_repo_changes(self, repo_info: GitRepoInfo) -> None:
+    def _push_repo_changes(self, repo_info: GitRepoInfo) -> bool:
         """Pushes changes using Gerrit refspec format based on GitRepoInfo."""
         repository_path = repo_info.repo_path
         remote_name = repo_info.remote_name
@@ -497,15 +612,15 @@ class BuildSystem:
 
         if not repository_path:
              self.logger.error(f"Skipping push for {repo_info.repo_name}: Repo path is missing.")
-             return
+             return False
 
         if not remote_name:
             self.logger.error(f"Skipping push for {repo_info.repo_name} ({repository_path}): Remote name is missing in its configuration.")
-            return
+            return False
 
         if not target_branch:
             self.logger.error(f"Skipping push for {repo_info.repo_name} ({repository_path}): Target remote branch is missing in its configuration.")
-            return
+            return False
 
         # Construct the Gerrit refspec
         remote_ref = f"HEAD:refs/for/{target_branch}"
@@ -524,7 +639,30 @@ class BuildSystem:
             self.logger.error(f"Gerrit push failed for {repository_path} to {remote_name} using refspec {remote_ref}.")
         else:
             self.logger.info(f"Gerrit push successful for {repository_path} to {remote_name} using refspec {remote_ref}.")
+        return push_success
+
+    def _push_if_pending(self, repo_info: GitRepoInfo) -> bool:
+        """Pushes HEAD unless an earlier run already pushed it or it is already on the remote branch.
 
+        Successful pushes are recorded in refs/gr-release/pushed/<remote>/<branch>, so a run
+        resumed after a failed push retries it while a resumed run after a successful one
+        does not upload the same change again.
+        """
+        repository_path = repo_info.repo_path
+        if repository_path and repo_info.remote_name and repo_info.remote_branch:
+            pushed_ref = f"{_PUSHED_REF_PREFIX}/{repo_info.remote_name}/{repo_info.remote_branch}"
+            head = self.git_operator.resolve_commit(repository_path, "HEAD")
+            if head and (
+                self.git_operator.resolve_commit(repository_path, pushed_ref) == head
+                or self.git_operator.is_ancestor(repository_path, head, f"refs/remotes/{repo_info.remote_name}/{repo_info.remote_branch}")
+            ):
+                self.logger.info(f"HEAD {head} of {repository_path} was already pushed to {repo_info.remote_name}/{repo_info.remote_branch}; skipping push.")
+                return True
+            pushed = self._push_repo_changes(repo_info)
+            if pushed and head:
+                self.git_operator.update_ref(repository_path, pushed_ref, head)
+            return pushed
+        return self._push_repo_changes(repo_info) # Reports the missing configuration
 
     def _perform_repo_git_operations(
         self,
@@ -534,47 +672,87 @@ class BuildSystem:
         commit_author: str,
         should_push: bool,
         repo_context_name: str # For logging purposes
-    ) -> None:
+    ) -> RepoPublicationResult:
         """Handles git add, commit, and optional push for a specific repo."""
         self.logger.info(f"Processing Git operations for {repo_context_name} repository: {repo_path}")
+        result = RepoPublicationResult(repo_path=repo_path, repo_context_name=repo_context_name)
         repo_info = self._find_git_repo_info_by_path(repo_path)
 
         if not repo_info:
             self.logger.error(f"Could not find GitRepoInfo for {repo_context_name} repository path: {repo_path}. Skipping Git operations.")
-            return
-
-        add_success = self.git_operator.safe_add(repo_path, paths_to_add)
-        # Assuming commit handles "nothing to commit" gracefully.
-        # safe_add returns True even if nothing matched but command succeeded.
+            result.error = "no matching GitRepoInfo"
+            return result
 
-        commit_success = self.git_operator.commit_with_author(
-            repo_path,
-            commit_message,
-            commit_author
-        )
+        if self._artifacts_unchanged(repo_path, paths_to_add):
+            result.unchanged = True
+        else:
+            add_success = self.git_operator.safe_add(repo_path, paths_to_add)
+            # Assuming commit handles "nothing to commit" gracefully.
+            # safe_add returns True even if nothing matched but command succeeded.
+
+            commit_success = self.git_operator.commit_with_author(
+                repo_path,
+                commit_message,
+                commit_author
+            )
+            result.committed = commit_success
+            if not commit_success:
+                self.logger.warning(f"Commit failed or nothing to commit for {repo_context_name} repository: {repo_path}. Skipping push.")
+                return result
 
-        if commit_success and should_push:
+        if should_push:
             self.logger.info(f"Attempting push for {repo_context_name} repository: {repo_path}")
-            self._push_repo_changes(repo_info)
-        elif not commit_success:
-            self.logger.warning(f"Commit failed or nothing to commit for {repo_context_name} repository: {repo_path}. Skipping push.")
-        else: # Commit successful but push disabled
+            result.pushed = self._push_if_pending(repo_info)
+            if not result.pushed:
+                result.error = "push failed"
+        else: # Push disabled
             self.logger.info(f"Push disabled. Skipping push for {repo_context_name} repository: {repo_path}.")
+        return result
+
+    def _publish_to_repos(self, jobs: List[Dict[str, Any]]) -> List[RepoPublicationResult]:
+        """Runs _perform_repo_git_operations for each job concurrently; add, commit and push stay ordered per repo."""
+        pending_checks = self._pending_artifact_checks()
 
+        def publish(job: Dict[str, Any]) -> RepoPublicationResult:
+            self._thread_state.artifact_checks = pending_checks # Checks started by the build type's thread
+            try:
+                return self._perform_repo_git_operations(**job)
+            except Exception as e:
+                self.logger.exception(f"Unexpected error publishing to {job['repo_context_name']} repository {job['repo_path']}: {e}")
+                return RepoPublicationResult(repo_path=job["repo_path"], repo_context_name=job["repo_context_name"], error=str(e))
+
+        max_workers = max(1, min(len(jobs), self.config.git.publish_max_workers))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="publish") as pool:
+            results = list(pool.map(publish, jobs))
+
+        for result in results:
+            if result.error:
+                status = f"FAILED ({result.error})"
+            elif result.unchanged:
+                status = f"unchanged pushed={result.pushed}"
+            else:
+                status = f"committed={result.committed} pushed={result.pushed}"
+            self.logger.info(f"Publication to {result.repo_context_name} ({result.repo_path}): {status}")
+        failed = [result for result in results if result.error]
+        if failed:
+            self.logger.error(f"Publication failed for {len(failed)} of {len(results)} repositories: {[result.repo_path for result in failed]}")
+        return results
 
-    def _handle_sdk_git_operations(self, build_type_name: str) -> None:
+
+    def _handle_sdk_git_operations(self, build_type_name: str) -> bool:
         repo_path_to_push = str(self.nebula_sdk_output_path)
         git_config = self._get_git_config() # Still needed for commit message/author
-        if not git_config: return
+        if not git_config: return False
 
         add_paths = git_config.sdk_paths_to_add if git_config.sdk_paths_to_add else ["."]
-        self.git_operator.safe_add(repo_path_to_push, add_paths)
-
-        commit_success = self.git_operator.commit_with_author(
-            repo_path_to_push,
-            git_config.commit_message_sdk,
-            git_config.commit_author
-        )
+        commit_success = True
+        if not self._artifacts_unchanged(repo_path_to_push, add_paths):
+            self.git_operator.safe_add(repo_path_to_push, add_paths)
+            commit_success = self.git_operator.commit_with_author(
+                repo_path_to_push,
+                git_config.commit_message_sdk,
+                git_config.commit_author
+            )
 
         # Push only if commit was successful (or nothing to commit)
         if commit_success:
@@ -583,53 +761,85 @@ class BuildSystem:
                  self.logger.info(f"Post-build git push enabled for {build_type_name}. Attempting push...")
                  repo_info = self._find_git_repo_info_by_path(repo_path_to_push)
                  if repo_info:
-                     self._push_repo_changes(repo_info)
-                 else:
-                      self.logger.error(f"Skipping push for {repo_path_to_push}: Could not find matching GitRepoInfo.")
+                     return self._push_if_pending(repo_info)
+                 self.logger.error(f"Skipping push for {repo_path_to_push}: Could not find matching GitRepoInfo.")
+                 return False
             else:
                  self.logger.info(f"Post-build git push disabled for {build_type_name}, skipping push.")
+        return True
 
-    def _handle_nebula_git_operations(self, build_type_name: str) -> None:
+    def _handle_nebula_git_operations(self, build_type_name: str) -> bool:
         git_config = self._get_git_config()
         if not git_config:
             self.logger.error("Git configuration missing, cannot perform Git operations.")
-            return
+            return False
 
         build_type_config = self.config.build_types.get(build_type_name)
         should_push = build_type_config and build_type_config.post_build_git
 
-        # Prebuilt Images Section (Context: /home/nebula/grt)
-        self._perform_repo_git_operations(
-            repo_path="/home/nebula/grt",
-            paths_to_add=["thyp-sdk/products/mt8678-mix/prebuilt-images"],
-            commit_message=git_config.commit_message_nebula,
-            commit_author=git_config.commit_author,
-            should_push=should_push,
-            repo_context_name="GRT (prebuilt)"
-        )
+        # The repos are independent, so their Gerrit round trips overlap
+        results = self._publish_to_repos([
+            {
+                "repo_path": repo_path,
+                "paths_to_add": paths_to_add,
+                "commit_message": git_config.commit_message_nebula, # Same message for both repos
+                "commit_author": git_config.commit_author,
+                "should_push": should_push,
+                "repo_context_name": repo_context_name,
+            }
+            for repo_path, paths_to_add, repo_context_name in self._nebula_git_targets()
+        ])
+        return not any(result.error for result in results)
+
+    def _nebula_git_targets(self) -> List[Tuple[str, List[str], str]]:
+        """(repo path, paths to add, log name) of the repos nebula outputs are committed to."""
+        return [
+            ("/home/nebula/grt", ["thyp-sdk/products/mt8678-mix/prebuilt-images"], "GRT (prebuilt)"),
+            (str(self.yocto_hypervisor_path), ["."], "Yocto sub-repo (hypervisor)"),
+        ]
 
-        # Yocto Sub-Repository Section (Context: /home/nebula/yocto/prebuilt/hypervisor/grt)
-        self._perform_repo_git_operations(
-            repo_path=str(self.yocto_hypervisor_path),
-            paths_to_add=["."],
-            commit_message=git_config.commit_message_nebula, # Assuming same message
-            commit_author=git_config.commit_author,
-            should_push=should_push,
-            repo_context_name="Yocto sub-repo (hypervisor)"
+    def _start_artifact_check(self, repo_path: str, paths: List[str]) -> None:
+        git_config = self.config.git
+        if not git_config.skip_unchanged_artifacts:
+            return
+        future = self._artifact_check_pool.submit(
+            self.git_operator.worktree_matches_head, repo_path, list(paths), git_config.artifact_digest_workers
         )
+        self._pending_artifact_checks()[(repo_path, tuple(paths))] = future
 
+    def _pending_artifact_checks(self) -> Dict[Tuple[str, Tuple[str, ...]], Future]:
+        if not hasattr(self._thread_state, "artifact_checks"):
+            self._thread_state.artifact_checks = {}
+        return self._thread_state.artifact_checks
 
-    def _handle_tee_git_operations(self, build_type_name: str) -> None:
+    def _artifacts_unchanged(self, repo_path: str, paths: List[str]) -> bool:
+        """Whether paths in repo_path already match HEAD, so add/commit would be a no-op (HEAD may still need pushing)."""
+        git_config = self.config.git
+        if not git_config.skip_unchanged_artifacts:
+            return False
+        future = self._pending_artifact_checks().pop((repo_path, tuple(paths)), None)
+        if future:
+            unchanged = future.result()
+        else:
+            unchanged = self.git_operator.worktree_matches_head(repo_path, list(paths), git_config.artifact_digest_workers)
+        if unchanged:
+            self.logger.info(f"Outputs {paths} in {repo_path} match HEAD; skipping add and commit.")
+        return unchanged
+
+
+    def _handle_tee_git_operations(self, build_type_name: str) -> bool:
         repo_path_to_push = str(self.tee_kernel_path)
         git_config = self._get_git_config() # Still needed for commit message/author
-        if not git_config: return
-
-        self.git_operator.safe_add(repo_path_to_push, ["."])
-        commit_success = self.git_operator.commit_with_author(
-            repo_path_to_push,
-            git_config.commit_message_tee,
-            git_config.commit_author
-        )
+        if not git_config: return False
+
+        commit_success = True
+        if not self._artifacts_unchanged(repo_path_to_push, ["."]):
+            self.git_operator.safe_add(repo_path_to_push, ["."])
+            commit_success = self.git_operator.commit_with_author(
+                repo_path_to_push,
+                git_config.commit_message_tee,
+                git_config.commit_author
+            )
 
         # Push only if commit was successful (or nothing to commit)
         if commit_success:
@@ -638,14 +848,17 @@ class BuildSystem:
                  self.logger.info(f"Post-build git push enabled for {build_type_name}. Attempting push...")
                  repo_info = self._find_git_repo_info_by_path(repo_path_to_push)
                  if repo_info:
-                     self._push_repo_changes(repo_info)
-                 else:
-                      self.logger.error(f"Skipping push for {repo_path_to_push}: Could not find matching GitRepoInfo.")
+                     return self._push_if_pending(repo_info)
+                 self.logger.error(f"Skipping push for {repo_path_to_push}: Could not find matching GitRepoInfo.")
+                 return False
             else:
                  self.logger.info(f"Post-build git push disabled for {build_type_name}, skipping push.")
+        return True
 
 
-    def build(self, build_types_requested: Optional[List[str]] = None) -> bool:
+    def build(self, build_types_requested: Optional[List[str]] = None, resume: Optional[bool] = None) -> bool:
+        """Builds the requested (or enabled) types; resume skips stages checkpointed by an earlier, failed run."""
+        self._resume = self.config.resume_from_checkpoints if resume is None else resume
         enabled_build_types_in_config = {
             name for name, bt_conf in self.config.build_types.items() if bt_conf.enabled
         }
@@ -666,53 +879,173 @@ class BuildSystem:
 
         self.logger.info(f"Starting build process for types: {list(final_build_types)}")
 
-        if self.config.enable_environment_cleanup:
+        if self._resume:
+            self.logger.info("Resuming from stage checkpoints; skipping the initial environment cleanup.")
+        elif self.config.enable_environment_cleanup:
             self.clean_environment()
 
-        overall_success: bool = True
         # Define canonical build order
         build_order = ["nebula-sdk", "nebula", "TEE"]
         # Filter and order the types to build
         types_to_build_ordered = [bt for bt in build_order if bt in final_build_types]
         # Add any remaining types (not in the canonical order) at the end
-        types_to_build_ordered.extend(list(final_build_types - set(build_order)))
-
-
-        for build_type in types_to_build_ordered:
-            # Config should exist based on earlier filtering, but double-check
-            if build_type not in self.config.build_types:
-                self.logger.error(f"Internal Error: Configuration for build type '{build_type}' unexpectedly missing, skipping.")
-                overall_success = False
-                continue
+        types_to_build_ordered.extend(sorted(final_build_types - set(build_order)))
 
+        # Dependencies outside this run are assumed to be satisfied by earlier outputs
+        dependencies: Dict[str, Set[str]] = {
+            build_type: set(self.config.build_types[build_type].depends_on) & final_build_types
+            for build_type in types_to_build_ordered
+        }
+        if not self._dependencies_acyclic(dependencies):
+            return False
 
-            build_config = self.config.build_types[build_type]
-            # This check might be redundant now due to initial filtering, but harmless
-            if not build_config.enabled and build_type not in (build_types_requested or []):
-                 self.logger.info(f"Build type '{build_type}' is disabled and was not explicitly requested, skipping.")
-                 continue
+        return self._schedule_builds(types_to_build_ordered, dependencies)
 
+    def _dependencies_acyclic(self, dependencies: Dict[str, Set[str]]) -> bool:
+        remaining = {build_type: set(deps) for build_type, deps in dependencies.items()}
+        while remaining:
+            ready = [build_type for build_type, deps in remaining.items() if not deps]
+            if not ready:
+                self.logger.error(f"Build type dependencies form a cycle: {sorted(remaining)}")
+                return False
+            for build_type in ready:
+                del remaining[build_type]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return True
 
-            self.logger.info(f"--- Starting build: {build_type} ---")
-            build_method_name = f"build_{build_type.replace('-', '_')}"
-            build_method = getattr(self, build_method_name, None)
+    def _schedule_builds(self, types_to_build_ordered: List[str], dependencies: Dict[str, Set[str]]) -> bool:
+        """Runs build types as their dependencies finish, at most max_concurrent_builds at once.
+
+        Ready types start in canonical order; a type holding one of its declared resources
+        blocks every other type that declares the same resource. A failed type fails all
+        types that depend on it without starting them.
+        """
+        max_workers = max(1, self.config.max_concurrent_builds)
+        self.logger.info(f"Scheduling {len(types_to_build_ordered)} build types with up to {max_workers} concurrent builds.")
+        pending: List[str] = list(types_to_build_ordered)
+        succeeded: Set[str] = set()
+        failed: Set[str] = set()
+        running: Dict[Future, str] = {}
+        held_resources: Set[str] = set()
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="build") as pool:
+            while pending or running:
+                for build_type in list(pending):
+                    blocking_failures = dependencies[build_type] & failed
+                    if blocking_failures:
+                        pending.remove(build_type)
+                        failed.add(build_type)
+                        self.logger.error(f"--- Skipping build: {build_type} (dependencies failed: {sorted(blocking_failures)}) ---")
+                        continue
+                    if len(running) >= max_workers or not dependencies[build_type] <= succeeded:
+                        continue
+                    resources = set(self.config.build_types[build_type].resources)
+                    if resources & held_resources:
+                        continue
+                    pending.remove(build_type)
+                    held_resources |= resources
+                    running[pool.submit(self._run_build_type, build_type)] = build_type
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    build_type = running.pop(future)
+                    held_resources -= set(self.config.build_types[build_type].resources)
+                    (succeeded if future.result() else failed).add(build_type)
+
+        overall_success = not failed
+        if self.config.cache.enabled:
+            self.build_cache.report()
+        if self.config.fast_clean and self.config.enable_environment_cleanup:
+            self.file_operator.trash.report()
+        self.logger.info(f"Overall build process completed. Success: {overall_success}")
+        return overall_success
 
-            if callable(build_method):
-                try:
-                    # Pass build_type_name to the build method if needed, though current ones don't use it
-                    success: bool = build_method() # Call the specific build method
-                    overall_success &= success
-                    self.logger.info(f"--- Finished build: {build_type} {'SUCCESS' if success else 'FAILED'} ---")
-                except Exception as e:
-                     # Log exception details for better debugging
-                     self.logger.exception(f"Unexpected error during build method {build_method_name} for type {build_type}: {e}")
-                     overall_success = False
-                     self.logger.error(f"--- Finished build: {build_type} FAILED (Exception) ---")
+    def _run_build_type(self, build_type: str) -> bool:
+        self.logger.info(f"--- Starting build: {build_type} ---")
+        build_method_name = f"build_{build_type.replace('-', '_').lower()}"
+        build_method = getattr(self, build_method_name, None)
 
-            else:
-                self.logger.error(f"Build method '{build_method_name}' for type '{build_type}' not found or not callable.")
-                overall_success = False
-                self.logger.error(f"--- Finished build: {build_type} FAILED (Not Found) ---")
+        if not callable(build_method):
+            self.logger.error(f"Build method '{build_method_name}' for type '{build_type}' not found or not callable.")
+            self.logger.error(f"--- Finished build: {build_type} FAILED (Not Found) ---")
+            return False
 
-        self.logger.info(f"Overall build process completed. Success: {overall_success}")
-        return overall_success
+        temp_dir = self.build_temp_root / build_type
+        try:
+            self._thread_state.artifact_checks = {} # Never consume a check left behind by an earlier run
+            inputs_key = None
+            if self.config.cache.enabled or self.stage_runner.checkpoint_dir:
+                inputs_key = self._build_inputs_key(build_type)
+            self._thread_state.inputs_key = inputs_key # Anchors the stage checkpoints of this build type
+            cache_key = inputs_key if self.config.cache.enabled else None
+            if cache_key and self.build_cache.restore(build_type, cache_key, self._cache_roots(build_type)):
+                success = self._run_post_build_git(build_type)
+                self.logger.info(f"--- Finished build: {build_type} {'SUCCESS' if success else 'FAILED'} (restored from build cache) ---")
+                return success
+
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            self._thread_state.temp_dir = temp_dir
+            success: bool = build_method() # Call the specific build method
+            if success and cache_key:
+                self.build_cache.store(build_type, cache_key, self._cache_artifacts(build_type), self._cache_roots(build_type))
+            self.logger.info(f"--- Finished build: {build_type} {'SUCCESS' if success else 'FAILED'} ---")
+            return success
+        except Exception as e:
+             # Log exception details for better debugging
+             self.logger.exception(f"Unexpected error during build method {build_method_name} for type {build_type}: {e}")
+             self.logger.error(f"--- Finished build: {build_type} FAILED (Exception) ---")
+             return False
+        finally:
+            self._thread_state.temp_dir = None
+
+    def _cache_artifacts(self, build_type: str) -> List[pathlib.Path]:
+        """Everything a build type produces that later steps consume; restored on a cache hit."""
+        if build_type == "nebula-sdk":
+            return [self.nebula_sdk_output_path / path for path in self.config.git.sdk_paths_to_add]
+        if build_type == "nebula":
+            copy_operations = self.config.build_types[build_type].post_build_copy_operations
+            return [self.prebuilt_images_path] + [self.yocto_hypervisor_path / op.destination_path for op in copy_operations]
+        if build_type == "TEE":
+            return [self.tee_temp_path] + sorted(self.tee_kernel_path.glob("nebula*.bin"))
+        return []
+
+    def _cache_roots(self, build_type: str) -> Dict[str, pathlib.Path]:
+        """Local directories the cache names artifacts relative to; restores never write outside them."""
+        if build_type == "nebula-sdk":
+            return {"sdk-output": self.nebula_sdk_output_path}
+        if build_type == "nebula":
+            return {"prebuilt-images": self.prebuilt_images_path, "yocto-hypervisor": self.yocto_hypervisor_path}
+        if build_type == "TEE":
+            return {"tee-temp": self.tee_temp_path, "tee-kernel": self.tee_kernel_path}
+        return {}
+
+    def _build_inputs_key(self, build_type: str) -> Optional[str]:
+        """Fingerprint of everything a build type consumes; keys the build cache and its stage checkpoints."""
+        artifacts = self._cache_artifacts(build_type)
+        if not artifacts:
+            return None
+        build_type_config = self.config.build_types[build_type]
+        extra = {
+            "build_type_config": asdict(build_type_config),
+            "paths": asdict(self.config.paths),
+            "env": _env_fingerprint(dict(os.environ)),
+        }
+        # The build writes its artifacts into input trees (e.g. prebuilt-images in thyp-sdk); they must not key it
+        return self.build_cache.fingerprint(build_type, build_type_config.cache_inputs, artifacts, extra)
+
+    def _run_post_build_git(self, build_type: str) -> bool:
+        handlers = {
+            "nebula-sdk": self._handle_sdk_git_operations,
+            "nebula": self._handle_nebula_git_operations,
+            "TEE": self._handle_tee_git_operations,
+        }
+        build_type_config = self.config.build_types.get(build_type)
+        handler = handlers.get(build_type)
+        if handler and build_type_config and build_type_config.post_build_git:
+            with self._git_lock:
+                return handler(build_type)
+        return True
@@ -1,25 +1,73 @@
 import os
+import sys
+import threading
 import traceback
-from typing import List, Dict
+from typing import List, Dict, Optional, Set
 from utils.git_utils import GitOperator
 from utils.custom_logger import Logger
 from config.schemas import AllReposConfig, GitRepoInfo, CommitDetail # Added CommitDetail
 from utils.tag_utils import construct_tag
 
+class CommitBodyCache:
+    """Loads full commit bodies of one analyzed range in ordered batches.
+
+    Only the most recent batch is kept, so reading the messages of a range in
+    order costs one git call per batch and memory stays bounded by batch_size.
+    """
+
+    def __init__(self, git_operator: GitOperator, repository_path: str, commit_ids: List[str], batch_size: int = 256) -> None:
+        self.git_operator = git_operator
+        self.repository_path = repository_path
+        self._commit_ids = commit_ids
+        self._positions: Dict[str, int] = {}
+        self._batch_size = batch_size
+        self._batch: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def body_for(self, commit_id: str) -> Optional[str]:
+        with self._lock:
+            if commit_id not in self._batch:
+                if len(self._positions) != len(self._commit_ids):
+                    # commit_ids may still have been growing when the cache was created
+                    self._positions = {known_id: index for index, known_id in enumerate(self._commit_ids)}
+                start = self._positions.get(commit_id)
+                batch_ids = self._commit_ids[start:start + self._batch_size] if start is not None else [commit_id]
+                self._batch = self.git_operator.get_commit_messages(self.repository_path, batch_ids)
+            return self._batch.get(commit_id)
+
+
 class CommitAnalyzer:
-    def __init__(self, git_operator: GitOperator, logger: Logger) -> None:
+    def __init__(self, git_operator: GitOperator, logger: Logger, deepen_step: int = 200, max_deepen_rounds: int = 5) -> None:
         if not git_operator:
             raise ValueError("GitOperator instance is required")
         if not logger:
             raise ValueError("Logger instance is required")
         self.git_operator: GitOperator = git_operator
         self.logger: Logger = logger
+        self.deepen_step: int = deepen_step
+        self.max_deepen_rounds: int = max_deepen_rounds
+
+    def _ensure_history_for_range(self, repo_info: GitRepoInfo, start_ref: str, end_ref: str) -> None:
+        repo_path = repo_info.repo_path
+        if not self.git_operator.is_shallow_repository(repo_path):
+            return
+        remote_name = repo_info.remote_name or "origin"
+        for _ in range(self.max_deepen_rounds):
+            if not self.git_operator.range_reaches_shallow_boundary(repo_path, start_ref, end_ref):
+                return
+            self.logger.info(f"Shallow boundary inside {start_ref}..{end_ref} for {repo_info.repo_name}; deepening by {self.deepen_step} commits")
+            if not self.git_operator.deepen_history(repo_path, remote_name, self.deepen_step):
+                break
+        if self.git_operator.range_reaches_shallow_boundary(repo_path, start_ref, end_ref):
+            self.logger.warning(f"History of {repo_info.repo_name} still truncated inside {start_ref}..{end_ref}; fetching full history")
+            self.git_operator.deepen_history(repo_path, remote_name)
 
     def analyze_all_repositories(
         self,
         all_repos_config: AllReposConfig,
         newest_version_identifier: str,
-        next_newest_version_identifier: str
+        next_newest_version_identifier: str,
+        unchanged_repo_paths: Optional[Set[str]] = None
     ) -> None:
         self.logger.info("Starting commit analysis using centralized version identifiers...")
         self.logger.info(f"Using newest identifier: '{newest_version_identifier}', next newest identifier: '{next_newest_version_identifier}'")
@@ -36,6 +84,11 @@ class CommitAnalyzer:
                     self.logger.warning(f"Skipping commit analysis for {repo_info.repo_name}: repo_path is not defined.")
                     continue
 
+                if unchanged_repo_paths and repo_info.repo_path in unchanged_repo_paths:
+                    self.logger.debug(f"Skipping commit analysis for {repo_info.repo_name}: pinned revision unchanged between releases.")
+                    repo_info.commit_details = []
+                    continue
+
                 if not os.path.exists(repo_info.repo_path):
                     self.logger.warning(f"Skipping commit analysis for {repo_info.repo_name}: Repository path '{repo_info.repo_path}' does not exist.")
                     continue
@@ -50,21 +103,28 @@ class CommitAnalyzer:
 
                 self.logger.info(f"Analyzing commits for {repo_info.repo_name} between constructed tags: {start_ref} -> {end_ref}")
 
-                raw_commit_details: List[Dict[str, str]] = self.git_operator.get_commits_between(
+                self._ensure_history_for_range(repo_info, start_ref, end_ref)
+                # Records are consumed while git log is still producing them
+                raw_commit_details = self.git_operator.iter_commits_between(
                     repository_path=repo_info.repo_path,
                     start_ref=start_ref,
-                    end_ref=end_ref
+                    end_ref=end_ref,
+                    include_body=False # Bodies are loaded lazily through CommitBodyCache
                 )
 
+                commit_ids: List[str] = []
+                body_cache = CommitBodyCache(self.git_operator, repo_info.repo_path, commit_ids)
                 typed_commit_details: List[CommitDetail] = []
                 for detail_dict in raw_commit_details:
+                    commit_ids.append(detail_dict['id'])
                     typed_commit_details.append(
                         CommitDetail(
                             id=detail_dict['id'],
-                            author=detail_dict['author'],
-                            message=detail_dict['message'],
+                            author=sys.intern(detail_dict['author']),
+                            subject=detail_dict['subject'],
                             patch_path=None,  # Initialize as None
-                            commit_module=None # Initialize as None
+                            commit_module=None, # Initialize as None
+                            body_source=body_cache
                         )
                     )
 
@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from config.schemas import AllReposConfig, CommitDedupConfig, CommitDetail, GitRepoInfo
+from core.patch_generator import PatchGenerator
+from utils.custom_logger import Logger
+from utils.git_utils import GitOperator
+from utils.tag_utils import construct_tag
+from typing import Dict, List, Tuple
+
+
+class CommitDeduplicator:
+    """Groups commits that carry the same change across repositories.
+
+    Commits are compared by `git patch-id --stable`, so cherry-picks and shared
+    branches (e.g. grt and grt_be) collapse into one group. The first member whose
+    repo produces patches becomes the canonical commit; the others point to it via
+    duplicate_of and are listed in its duplicate_refs. Commits stay in
+    commit_details, so analysis-based steps still see every repository.
+    """
+
+    def __init__(self, git_operator: GitOperator, config: CommitDedupConfig):
+        self.git_operator = git_operator
+        self.config = config
+        self.logger = Logger(name=self.__class__.__name__)
+
+    def deduplicate(self, all_repos_config: AllReposConfig, newest_id: str, next_newest_id: str) -> Dict[str, List[CommitDetail]]:
+        """Returns patch-id -> [canonical, *duplicates] for every change seen more than once."""
+        if not self.config.enabled:
+            return {}
+        git_repos = [
+            repo for repo in all_repos_config.all_git_repos()
+            # Nebula children take their patches from the special source repos instead
+            if repo.commit_details and repo.repo_parent != 'nebula' and repo.repo_path and os.path.isdir(repo.repo_path)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, self.config.max_workers), thread_name_prefix="patch-id") as pool:
+            patch_ids = list(pool.map(lambda repo: self._repo_patch_ids(repo, newest_id, next_newest_id), git_repos))
+
+        members: Dict[str, List[Tuple[GitRepoInfo, CommitDetail]]] = {}
+        for repo, repo_patch_ids in zip(git_repos, patch_ids):
+            for commit in repo.commit_details:
+                commit.duplicate_of = None
+                commit.duplicate_refs = None
+                commit.patch_id = repo_patch_ids.get(commit.id)
+                if commit.patch_id:
+                    members.setdefault(commit.patch_id, []).append((repo, commit))
+
+        groups: Dict[str, List[CommitDetail]] = {}
+        for patch_id, group in members.items():
+            if len(group) < 2:
+                continue
+            canonical_repo, canonical = next(((repo, commit) for repo, commit in group if PatchGenerator.produces_patches(repo)), group[0])
+            canonical.duplicate_refs = []
+            duplicates: List[CommitDetail] = []
+            for repo, commit in group:
+                if commit is canonical:
+                    continue
+                commit.duplicate_of = canonical
+                canonical.duplicate_refs.append(f"{self._repo_label(repo)}@{commit.id[:7]}")
+                duplicates.append(commit)
+            groups[patch_id] = [canonical] + duplicates
+            self.logger.info(f"Change {canonical.id[:7]} ({self._repo_label(canonical_repo)}) also appears as {', '.join(canonical.duplicate_refs)}")
+
+        duplicate_count = sum(len(group) - 1 for group in groups.values())
+        self.logger.info(f"Patch-id dedup over {len(git_repos)} repositories: {len(groups)} changes appear in several places, {duplicate_count} duplicate commits collapsed.")
+        return groups
+
+    def promote_orphaned_duplicates(self, all_repos_config: AllReposConfig) -> int:
+        """Re-canonicalizes groups whose canonical commit was since dropped from commit_details.
+
+        Special commits (e.g. grt's nebula commit) are removed from their source repo after
+        dedup; their duplicates elsewhere (grt_be) would otherwise stay hidden behind a commit
+        no report lists. The first surviving member of each such group becomes its canonical
+        commit and keeps the shared patch. Returns the number of groups promoted.
+        """
+        listed = {id(commit) for repo in all_repos_config.all_git_repos() for commit in repo.commit_details}
+        orphans: Dict[int, List[Tuple[GitRepoInfo, CommitDetail]]] = {}
+        for repo in all_repos_config.all_git_repos():
+            for commit in repo.commit_details:
+                if commit.duplicate_of is not None and id(commit.duplicate_of) not in listed:
+                    orphans.setdefault(id(commit.duplicate_of), []).append((repo, commit))
+
+        for group in orphans.values():
+            (canonical_repo, canonical), rest = group[0], group[1:]
+            removed_id = canonical.duplicate_of.id
+            canonical.duplicate_of = None
+            canonical.duplicate_refs = [f"{self._repo_label(repo)}@{commit.id[:7]}" for repo, commit in rest] or None
+            for _, commit in rest:
+                commit.duplicate_of = canonical
+            self.logger.info(f"Change {canonical.id[:7]} ({self._repo_label(canonical_repo)}) is canonical again: its canonical commit {removed_id[:7]} was removed from the report")
+        return len(orphans)
+
+    def _repo_patch_ids(self, git_repo_info: GitRepoInfo, newest_id: str, next_newest_id: str) -> Dict[str, str]:
+        try:
+            start_ref = construct_tag(git_repo_info.tag_prefix, next_newest_id)
+            end_ref = construct_tag(git_repo_info.tag_prefix, newest_id)
+        except ValueError as e:
+            self.logger.error(f"Error constructing tags for {self._repo_label(git_repo_info)}: {e}. Skipping dedup for it.")
+            return {}
+        return dict(self.git_operator.iter_patch_ids(git_repo_info.repo_path, start_ref, end_ref))
+
+    @staticmethod
+    def _repo_label(git_repo_info: GitRepoInfo) -> str:
+        return f"{git_repo_info.repo_parent}/{git_repo_info.repo_name}" if git_repo_info.repo_parent else git_repo_info.repo_name
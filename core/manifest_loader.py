@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from utils.custom_logger import Logger
+
+CACHE_FORMAT_VERSION = 2
+
+
+def iter_manifest_elements(manifest_path: str) -> Iterator[Tuple[str, ET.Element]]:
+    """Yields (parent_tag, element) for every completed element below the root, then frees it."""
+    stack: List[ET.Element] = []
+    for event, elem in ET.iterparse(manifest_path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if stack:
+            yield stack[-1].tag, elem
+            # A just-closed element is always its parent's last child
+            elem.clear()
+            del stack[-1][-1]
+
+
+class ManifestLoader:
+    """Flattens jiri and repo manifests, following includes and imports.
+
+    The result is cached as JSON next to the content hashes of every manifest
+    file that contributed to it, so unchanged manifests are never re-parsed.
+    Includes and imports that were missing are recorded too; the entry goes
+    stale as soon as one of them appears.
+    Projects are plain dicts with the keys name, path and remote_branch.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.logger = Logger(name=self.__class__.__name__)
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else None
+
+    def load(self, manifest_path: str, manifest_type: str, workspace_root: str) -> List[Dict[str, Optional[str]]]:
+        manifest_path = os.path.abspath(os.path.expanduser(manifest_path))
+        cached = self._read_cache(manifest_path, manifest_type)
+        if cached is not None:
+            self.logger.info(f"Loaded {len(cached)} projects for {manifest_path} from manifest cache")
+            return cached
+
+        files: List[str] = []
+        missing: List[str] = []
+        if manifest_type == "jiri":
+            projects = self._load_jiri(manifest_path, os.path.expanduser(workspace_root), files, missing)
+        elif manifest_type == "repo":
+            projects = self._load_repo(manifest_path, files, missing)
+        else:
+            raise ValueError(f"Unsupported manifest type: {manifest_type}")
+        self.logger.info(f"Parsed {len(projects)} projects from {len(files)} manifest files for {manifest_path}")
+        self._write_cache(manifest_path, manifest_type, files, missing, projects)
+        return projects
+
+    def _load_repo(self, manifest_path: str, files: List[str], missing: List[str]) -> List[Dict[str, Optional[str]]]:
+        # repo resolves includes relative to the manifests checkout, not the including file
+        marker = os.sep + os.path.join(".repo", "manifests") + os.sep
+        index = manifest_path.find(marker)
+        include_root = manifest_path[:index + len(marker)] if index >= 0 else os.path.dirname(manifest_path)
+
+        projects: Dict[str, Dict[str, Optional[str]]] = {}
+        self._collect_repo(manifest_path, include_root, projects, files, missing, set())
+        return list(projects.values())
+
+    def _collect_repo(self, manifest_path: str, include_root: str, projects: Dict[str, Dict[str, Optional[str]]], files: List[str], missing: List[str], visiting: Set[str]) -> None:
+        if manifest_path in visiting:
+            self.logger.warning(f"Skipping recursive manifest include: {manifest_path}")
+            return
+        visiting.add(manifest_path)
+        files.append(manifest_path)
+        for parent_tag, elem in iter_manifest_elements(manifest_path):
+            if parent_tag != "manifest":
+                continue
+            if elem.tag == "project":
+                name = elem.get("name")
+                if name:
+                    path = elem.get("path") or name
+                    projects[path] = {"name": name, "path": path, "remote_branch": None}
+            elif elem.tag == "remove-project":
+                name = elem.get("name")
+                path = elem.get("path")
+                for key in [key for key, project in projects.items() if project["name"] == name and (not path or key == path)]:
+                    del projects[key]
+            elif elem.tag == "include":
+                include_path = os.path.join(include_root, elem.get("name", ""))
+                if os.path.isfile(include_path):
+                    self._collect_repo(include_path, include_root, projects, files, missing, visiting)
+                else:
+                    missing.append(include_path)
+                    self.logger.warning(f"Included manifest not found: {include_path} (from {manifest_path})")
+        visiting.discard(manifest_path)
+
+    def _load_jiri(self, manifest_path: str, jiri_root: str, files: List[str], missing: List[str]) -> List[Dict[str, Optional[str]]]:
+        return list(self._collect_jiri(manifest_path, jiri_root, "", files, missing, set()).values())
+
+    def _collect_jiri(self, manifest_path: str, jiri_root: str, root_prefix: str, files: List[str], missing: List[str], visiting: Set[str]) -> Dict[str, Dict[str, Optional[str]]]:
+        if manifest_path in visiting:
+            self.logger.warning(f"Skipping recursive manifest import: {manifest_path}")
+            return {}
+        visiting.add(manifest_path)
+        files.append(manifest_path)
+        own: Dict[str, Dict[str, Optional[str]]] = {}
+        imported: Dict[str, Dict[str, Optional[str]]] = {}
+        for parent_tag, elem in iter_manifest_elements(manifest_path):
+            if parent_tag == "projects" and elem.tag == "project":
+                name = elem.get("name")
+                if name:
+                    path = os.path.join(root_prefix, elem.get("path") or name)
+                    own[path] = {"name": name, "path": path, "remote_branch": elem.get("remotebranch")}
+            elif parent_tag == "imports" and elem.tag == "localimport":
+                import_path = os.path.join(os.path.dirname(manifest_path), elem.get("file", ""))
+                if os.path.isfile(import_path):
+                    for path, project in self._collect_jiri(import_path, jiri_root, root_prefix, files, missing, visiting).items():
+                        imported.setdefault(path, project)
+                else:
+                    missing.append(import_path)
+                    self.logger.warning(f"Local import not found: {import_path} (from {manifest_path})")
+            elif parent_tag == "imports" and elem.tag == "import":
+                # Remote imports are read from the manifest project jiri already checked out
+                import_root = os.path.join(root_prefix, elem.get("root", ""))
+                project_dir = os.path.join(jiri_root, import_root, elem.get("path") or elem.get("name", ""))
+                import_path = os.path.join(project_dir, elem.get("manifest", ""))
+                if os.path.isfile(import_path):
+                    for path, project in self._collect_jiri(import_path, jiri_root, import_root, files, missing, visiting).items():
+                        imported.setdefault(path, project)
+                else:
+                    missing.append(import_path)
+                    self.logger.warning(f"Imported manifest not found locally: {import_path} (from {manifest_path})")
+        visiting.discard(manifest_path)
+        # Projects declared by a manifest override the ones it imports
+        imported.update(own)
+        return imported
+
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _cache_file(self, manifest_path: str, manifest_type: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        key = hashlib.sha1(f"{manifest_type}:{manifest_path}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_cache(self, manifest_path: str, manifest_type: str) -> Optional[List[Dict[str, Optional[str]]]]:
+        cache_file = self._cache_file(manifest_path, manifest_type)
+        if not cache_file or not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, "r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+            if entry.get("version") != CACHE_FORMAT_VERSION:
+                return None
+            for path, digest in entry["files"].items():
+                if not os.path.isfile(path) or self._file_digest(path) != digest:
+                    self.logger.info(f"Manifest {path} changed; re-parsing {manifest_path}")
+                    return None
+            for path in entry["missing"]:
+                if os.path.exists(path):
+                    self.logger.info(f"Previously missing manifest {path} now exists; re-parsing {manifest_path}")
+                    return None
+            return entry["projects"]
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.warning(f"Ignoring unreadable manifest cache {cache_file}: {e}")
+            return None
+
+    def _write_cache(self, manifest_path: str, manifest_type: str, files: List[str], missing: List[str], projects: List[Dict[str, Optional[str]]]) -> None:
+        cache_file = self._cache_file(manifest_path, manifest_type)
+        if not cache_file:
+            return
+        try:
+            entry = {
+                "version": CACHE_FORMAT_VERSION,
+                "files": {path: self._file_digest(path) for path in files},
+                "missing": sorted(set(missing)),
+                "projects": projects,
+            }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_file}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(entry, handle)
+            os.replace(temp_path, cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not write manifest cache {cache_file}: {e}")
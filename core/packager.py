@@ -1,11 +1,15 @@
+import json
 import os
 import zipfile
-from typing import Dict, Optional, List # Added List
+from typing import Any, Dict, Optional, List # Added List
 from logging import Logger
 
 from config.schemas import AllReposConfig, PackageConfig, GitRepoInfo, CommitDetail, ExcelConfig
 from utils.custom_logger import Logger as CustomLogger
 
+BLOB_MANIFEST_NAME = "blobs.json"
+
+
 class ReleasePackager:
     def __init__(self, logger: Logger):
         if not logger:
@@ -21,7 +25,9 @@ class ReleasePackager:
         output_zip_path: str,
         patch_details_map: Dict[str, str], # New: Map relative arcname -> absolute source path
         excel_config: Optional[ExcelConfig],
-        generated_excel_path: Optional[str]
+        generated_excel_path: Optional[str],
+        externalized_blobs: Optional[Dict[str, List[Dict[str, Any]]]] = None, # Patch arcname -> blobs kept in the blob store
+        blob_store_dir: Optional[str] = None
     ) -> bool:
         self.logger.info(f"Starting release packaging process for output: {output_zip_path}")
 
@@ -35,6 +41,8 @@ class ReleasePackager:
                 self.logger.info(f"Opened ZIP file for writing: {output_zip_path}")
                 packaged_files_count = 0
                 missing_source_files = 0
+                shared_patch_count = 0
+                packaged_arcnames = set()
 
                 for repo_info in all_repos_config.all_git_repos():
                     if not repo_info.commit_details:
@@ -47,6 +55,10 @@ class ReleasePackager:
                     for commit_detail in repo_info.commit_details:
                         if commit_detail.patch_path:
                             arcname = commit_detail.patch_path # This is the target path in the ZIP
+                            if arcname in packaged_arcnames:
+                                # Duplicate commits (same patch-id) share the canonical commit's patch
+                                shared_patch_count += 1
+                                continue
 
                             # Find the actual source file path using the map
                             source_path = patch_details_map.get(arcname)
@@ -55,6 +67,7 @@ class ReleasePackager:
 
                             if source_path and os.path.exists(source_path):
                                 zip_file.write(source_path, arcname=arcname)
+                                packaged_arcnames.add(arcname)
                                 packaged_files_count += 1
                                 self.logger.debug(f"Added file to ZIP: {arcname}")
                             else:
@@ -66,9 +79,25 @@ class ReleasePackager:
                                      self.logger.error(f"Source patch file does not exist at the expected location: {source_path} (for Arcname: {arcname}). Cannot add to ZIP.")
 
                 self.logger.info(f"Finished processing patch files. Added {packaged_files_count} files to the archive.")
+                if shared_patch_count:
+                    self.logger.info(f"{shared_patch_count} commits share a patch already in the archive and were not added again.")
                 if missing_source_files > 0:
                      self.logger.warning(f"Could not find source files for {missing_source_files} patches. Check previous logs for details.")
 
+                # --- Reference externalized binary blobs ---
+                packaged_blobs = {
+                    arcname: blobs for arcname, blobs in (externalized_blobs or {}).items()
+                    if arcname in packaged_arcnames and blobs
+                }
+                if packaged_blobs:
+                    # Recipients locate the store from the zip, so a store next to it is referenced relatively
+                    blob_store_ref = os.path.relpath(blob_store_dir, output_dir) if blob_store_dir else blob_store_dir
+                    if blob_store_ref and blob_store_ref.startswith(os.pardir):
+                        blob_store_ref = blob_store_dir
+                    blob_manifest = {"blob_store": blob_store_ref, "patches": packaged_blobs}
+                    zip_file.writestr(BLOB_MANIFEST_NAME, json.dumps(blob_manifest, indent=2, sort_keys=True))
+                    blob_ids = {blob["blob"] for blobs in packaged_blobs.values() for blob in blobs}
+                    self.logger.info(f"Added {BLOB_MANIFEST_NAME}: {len(packaged_blobs)} patches reference {len(blob_ids)} blobs stored in {blob_store_dir}")
 
                 # --- Add Excel Report if generated ---
                 if excel_config and excel_config.enabled and generated_excel_path:
@@ -1,7 +1,7 @@
 import os
 import re
 import shutil
-from typing import Dict, Optional, List, Tuple, Set
+from typing import Any, Dict, Optional, List, Tuple, Set
 
 from config.schemas import AllReposConfig, GitRepoInfo, CommitDetail, PatchConfig
 from utils.git_utils import GitOperator
@@ -14,6 +14,8 @@ SPECIAL_PATTERNS: Dict[str, str] = {
     "TEE": "] tee: ",
 }
 SPECIAL_PATTERNS_LIST: List[str] = list(SPECIAL_PATTERNS.values())
+EXCLUDED_REPO_PARENT = 'yocto'
+EXCLUDED_REPO_NAME = 'prebuilt/hypervisor/grt'
 
 class PatchGenerator:
     def __init__(
@@ -27,18 +29,36 @@ class PatchGenerator:
             raise ValueError("Logger instance is required")
         self.git_operator = git_operator
         self.logger = logger
+        # Patch path (as packaged) -> blobs left out of that patch and kept in the blob store
+        self.externalized_blobs: Dict[str, List[Dict[str, Any]]] = {}
+
+    @staticmethod
+    def produces_patches(repo_info: GitRepoInfo) -> bool:
+        """Whether generate_patches writes patch files for this repo's commits."""
+        if not repo_info.generate_patch or repo_info.repo_parent == 'nebula':
+            return False
+        return not (repo_info.repo_parent == EXCLUDED_REPO_PARENT and repo_info.repo_name == EXCLUDED_REPO_NAME)
+
+    @staticmethod
+    def _canonical_patch_path(commit_detail: CommitDetail) -> Optional[str]:
+        # Duplicates found by patch-id reuse the canonical commit's patch once it exists
+        if commit_detail.duplicate_of is not None:
+            return commit_detail.duplicate_of.patch_path
+        return None
 
     def generate_patches(
         self,
         all_repos_config: AllReposConfig,
         version_info: Dict,
         patch_config: PatchConfig,
-        special_source_repo_infos: List[GitRepoInfo]
+        special_source_repo_infos: List[GitRepoInfo],
+        unchanged_repo_paths: Optional[Set[str]] = None
     ) -> Tuple[Dict[str, str], Dict[str, str]]: # Modified return type hint
         self.logger.info("Starting patch generation process...")
         temp_patch_dir = patch_config.temp_patch_dir
         special_commit_patch_map: Dict[str, str] = {}
         patch_details_map: Dict[str, str] = {} # New map added
+        self.externalized_blobs = {}
 
         try:
             os.makedirs(temp_patch_dir, exist_ok=True)
@@ -58,8 +78,9 @@ class PatchGenerator:
         }
         self.logger.debug(f"Special source repo paths for patch check: {special_source_paths}")
 
-        excluded_repo_parent = 'yocto'
-        excluded_repo_name = 'prebuilt/hypervisor/grt'
+        excluded_repo_parent = EXCLUDED_REPO_PARENT
+        excluded_repo_name = EXCLUDED_REPO_NAME
+        reused_patch_count = 0
 
         for repo_info in all_repos_config.all_git_repos():
             repo_log_name = f"{repo_info.repo_parent}/{repo_info.repo_name}" if repo_info.repo_parent else repo_info.repo_name
@@ -77,6 +98,9 @@ class PatchGenerator:
             if not repo_info.repo_path or not os.path.isdir(repo_info.repo_path):
                 self.logger.warning(f"Skipping {repo_log_name}: Invalid or missing repo_path '{repo_info.repo_path}'.")
                 continue
+            if unchanged_repo_paths and repo_info.repo_path in unchanged_repo_paths:
+                self.logger.debug(f"Skipping {repo_log_name}: pinned revision unchanged between releases.")
+                continue
 
             try:
                 start_ref = construct_tag(repo_info.tag_prefix, next_newest_id)
@@ -95,12 +119,29 @@ class PatchGenerator:
                 self.logger.error(f"Failed to create repo temp subdir {repo_temp_patch_subdir} for {repo_log_name}: {e}. Skipping.")
                 continue
 
-            generated_patch_paths = self.git_operator.format_patch(
-                repository_path=repo_info.repo_path,
-                start_ref=start_ref,
-                end_ref=end_ref,
-                output_dir=repo_temp_patch_subdir
-            )
+            repo_path_normalized = repo_info.repo_path.replace('\\', '/')
+            is_from_special_source = repo_path_normalized in special_source_paths
+
+            if repo_info.commit_details and all(self._canonical_patch_path(c) for c in repo_info.commit_details):
+                self.logger.info(f"All {len(repo_info.commit_details)} commits of {repo_log_name} duplicate changes already patched elsewhere; skipping format-patch.")
+                for commit_detail in repo_info.commit_details:
+                    commit_detail.patch_path = self._canonical_patch_path(commit_detail)
+                    reused_patch_count += 1
+                    self._map_special_commit(commit_detail, is_from_special_source, special_commit_patch_map, repo_log_name)
+                continue
+
+            externalized_by_patch: Dict[str, List[Dict[str, Any]]] = {}
+            if patch_config.binary_blob_threshold is not None:
+                generated_patch_paths, externalized_by_patch = self._format_binary_aware(
+                    repo_info, start_ref, end_ref, repo_temp_patch_subdir, patch_config
+                )
+            else:
+                generated_patch_paths = self.git_operator.format_patch(
+                    repository_path=repo_info.repo_path,
+                    start_ref=start_ref,
+                    end_ref=end_ref,
+                    output_dir=repo_temp_patch_subdir
+                )
 
             if not generated_patch_paths:
                 self.logger.warning(f"No patch files generated by format_patch for {repo_log_name} in range {start_ref}..{end_ref}. This might be expected if there are no commits.")
@@ -145,25 +186,94 @@ class PatchGenerator:
                 ]
                 final_relative_patch_path = "/".join(filter(None, [p.replace('\\', '/') if p else None for p in path_parts]))
 
-                commit_detail.patch_path = final_relative_patch_path
-                self.logger.debug(f"  [#{i+1}] Commit {commit_detail.id[:7]} -> Patch '{patch_filename}' -> Assigned Path: '{final_relative_patch_path}'")
-
-                # Populate the new map: relative_path -> absolute_path
-                patch_details_map[final_relative_patch_path] = patch_file_path
-                self.logger.debug(f"  Mapped '{final_relative_patch_path}' -> '{patch_file_path}'")
-
+                canonical_patch_path = self._canonical_patch_path(commit_detail)
+                if canonical_patch_path:
+                    # The same change is already patched in another repo; keep one copy only
+                    commit_detail.patch_path = canonical_patch_path
+                    reused_patch_count += 1
+                    try:
+                        os.remove(patch_file_path)
+                    except OSError as e:
+                        self.logger.warning(f"  Could not remove duplicate patch {patch_file_path}: {e}")
+                    self.logger.debug(f"  [#{i+1}] Commit {commit_detail.id[:7]} duplicates {commit_detail.duplicate_of.id[:7]} -> Reusing Patch '{canonical_patch_path}'")
+                else:
+                    commit_detail.patch_path = final_relative_patch_path
+                    self.logger.debug(f"  [#{i+1}] Commit {commit_detail.id[:7]} -> Patch '{patch_filename}' -> Assigned Path: '{final_relative_patch_path}'")
 
-                repo_path_normalized = repo_info.repo_path.replace('\\', '/') if repo_info.repo_path else None
-                is_from_special_source = repo_path_normalized in special_source_paths
-                has_special_pattern = any(p in commit_detail.message for p in SPECIAL_PATTERNS_LIST)
+                    # Populate the new map: relative_path -> absolute_path
+                    patch_details_map[final_relative_patch_path] = patch_file_path
+                    self.logger.debug(f"  Mapped '{final_relative_patch_path}' -> '{patch_file_path}'")
+                    if patch_file_path in externalized_by_patch:
+                        self.externalized_blobs[final_relative_patch_path] = externalized_by_patch[patch_file_path]
 
-                if is_from_special_source and has_special_pattern:
-                    special_commit_patch_map[commit_detail.id] = final_relative_patch_path
-                    self.logger.info(f"  Identified special commit: {commit_detail.id[:7]} ({repo_log_name}). Mapped to patch: '{final_relative_patch_path}'")
+                self._map_special_commit(commit_detail, is_from_special_source, special_commit_patch_map, repo_log_name)
 
+        if reused_patch_count:
+            self.logger.info(f"Reused existing patches for {reused_patch_count} duplicate commits.")
         self.logger.info(f"Finished generating patches. Found {len(special_commit_patch_map)} special commit patches. Created map for {len(patch_details_map)} total patches.")
         return special_commit_patch_map, patch_details_map # Modified return value
 
+    def _format_binary_aware(
+        self,
+        repo_info: GitRepoInfo,
+        start_ref: str,
+        end_ref: str,
+        output_dir: str,
+        patch_config: PatchConfig
+    ) -> Tuple[List[str], Dict[str, List[Dict[str, Any]]]]:
+        """Formats the range like format_patch, but leaves the binaries of heavy commits out of their patches.
+
+        A commit is heavy when one side of one of its binary files exceeds binary_blob_threshold.
+        Heavy commits are formatted with --no-binary --full-index, so their patches carry the
+        full blob ids, and every binary post-image they produce is stored once under blob_store_dir.
+        """
+        binary_changes = self.git_operator.get_binary_changes(repo_info.repo_path, start_ref, end_ref)
+        heavy_commits = {
+            commit_id for commit_id, blobs in binary_changes.items()
+            # Binary patches carry both sides, so a large pre-image makes a commit heavy too
+            if any(max(blob['size'], blob['old_size']) > patch_config.binary_blob_threshold for blob in blobs)
+        }
+        if not heavy_commits:
+            return self.git_operator.format_patch(repo_info.repo_path, start_ref, end_ref, output_dir), {}
+
+        self.logger.info(f"{len(heavy_commits)} commits in {repo_info.repo_name} exceed the binary blob threshold; formatting patches per commit.")
+        patch_paths: List[str] = []
+        externalized_by_patch: Dict[str, List[Dict[str, Any]]] = {}
+        for number, commit_id in enumerate(self.git_operator.list_commit_ids(repo_info.repo_path, start_ref, end_ref), start=1):
+            is_heavy = commit_id in heavy_commits
+            patch_path = self.git_operator.format_commit_patch(
+                repo_info.repo_path, commit_id, output_dir, number,
+                extra_args=["--no-binary", "--full-index"] if is_heavy else None
+            )
+            if not patch_path:
+                self.logger.error(f"Could not format patch for {commit_id[:7]} in {repo_info.repo_name}; skipping the repository.")
+                return [], {}
+            patch_paths.append(patch_path)
+            if is_heavy:
+                externalized_by_patch[patch_path] = self._externalize_blobs(repo_info.repo_path, binary_changes[commit_id], patch_config.blob_store_dir)
+        return patch_paths, externalized_by_patch
+
+    def _externalize_blobs(self, repo_path: str, blobs: List[Dict[str, Any]], blob_store_dir: str) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = []
+        for blob in blobs:
+            if not blob['blob']:
+                continue # Deleted file: applying the patch needs no content
+            store_path = f"{blob['blob'][:2]}/{blob['blob']}"
+            target_path = os.path.join(blob_store_dir, store_path)
+            if not os.path.exists(target_path):
+                # Content-addressed by git blob id: a blob already stored by any release is reused
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                if not self.git_operator.write_blob(repo_path, blob['blob'], target_path):
+                    continue
+                self.logger.info(f"  Stored blob {blob['blob'][:12]} ({blob['size']} bytes) for '{blob['path']}'")
+            entries.append({'path': blob['path'], 'blob': blob['blob'], 'size': blob['size'], 'store_path': store_path})
+        return entries
+
+    def _map_special_commit(self, commit_detail: CommitDetail, is_from_special_source: bool, special_commit_patch_map: Dict[str, str], repo_log_name: str) -> None:
+        if is_from_special_source and any(p in commit_detail.message for p in SPECIAL_PATTERNS_LIST):
+            special_commit_patch_map[commit_detail.id] = commit_detail.patch_path
+            self.logger.info(f"  Identified special commit: {commit_detail.id[:7]} ({repo_log_name}). Mapped to patch: '{commit_detail.patch_path}'")
+
 
     def link_nebula_patches(
         self,
@@ -0,0 +1,130 @@
+import os
+import re
+import subprocess
+from dataclasses import dataclass, field
+from config.schemas import AllReposConfig, PinnedManifestConfig, RepoConfig
+from core.manifest_loader import iter_manifest_elements
+from utils.command_executor import CommandExecutor
+from utils.custom_logger import Logger
+from typing import Dict, Optional, Set, Tuple
+
+
+@dataclass
+class ManifestDiff:
+    # Keyed by project path relative to the workspace root
+    changed: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    added: Dict[str, str] = field(default_factory=dict)
+    removed: Dict[str, str] = field(default_factory=dict)
+    unchanged: Set[str] = field(default_factory=set)
+
+
+class PinnedManifestManager:
+    """Keeps one pinned manifest (project -> exact revision) per parent and release.
+
+    The pinned manifest of the newest release is captured from the workspace with
+    `repo manifest -r` or `jiri snapshot`; older releases are read from earlier runs.
+    """
+
+    def __init__(self, command_executor: CommandExecutor, config: PinnedManifestConfig):
+        self.command_executor = command_executor
+        self.config = config
+        self.logger = Logger(name=self.__class__.__name__)
+        self.snapshot_dir = os.path.expanduser(config.snapshot_dir)
+
+    def snapshot_path(self, repo_config: RepoConfig, version_identifier: str) -> str:
+        parent_slug = re.sub(r'[^A-Za-z0-9._-]', '_', repo_config.repo_name)
+        return os.path.join(self.snapshot_dir, parent_slug, f"{version_identifier}.xml")
+
+    def capture(self, repo_config: RepoConfig, version_identifier: str) -> Optional[str]:
+        snapshot_path = self.snapshot_path(repo_config, version_identifier)
+        if os.path.exists(snapshot_path):
+            return snapshot_path
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        temp_path = f"{snapshot_path}.tmp"
+        self.logger.info(f"Capturing pinned manifest of {repo_config.repo_name} for {version_identifier}")
+        try:
+            if repo_config.repo_type == "repo":
+                params = {"repo_root": repo_config.path, "command": "manifest", "args": ["-r", "-o", temp_path]}
+                self.command_executor.execute("repo_command", params)
+            elif repo_config.repo_type == "jiri":
+                params = {"jiri_path": repo_config.path, "command": "snapshot", "args": [temp_path]}
+                self.command_executor.execute("jiri_command", params)
+            else:
+                return None
+            os.replace(temp_path, snapshot_path)
+            return snapshot_path
+        except (subprocess.CalledProcessError, OSError) as e:
+            self.logger.error(f"Failed to capture pinned manifest for {repo_config.repo_name}: {e}")
+            return None
+
+    def load(self, snapshot_path: str, repo_type: str) -> Dict[str, str]:
+        revisions: Dict[str, str] = {}
+        for parent_tag, elem in iter_manifest_elements(snapshot_path):
+            if elem.tag != "project":
+                continue
+            if (repo_type == "jiri" and parent_tag != "projects") or (repo_type == "repo" and parent_tag != "manifest"):
+                continue
+            name = elem.get("name")
+            revision = elem.get("revision")
+            if name and revision:
+                revisions[(elem.get("path") or name).rstrip("/")] = revision
+        return revisions
+
+    @staticmethod
+    def diff(old_revisions: Dict[str, str], new_revisions: Dict[str, str]) -> ManifestDiff:
+        result = ManifestDiff()
+        for path, new_revision in new_revisions.items():
+            old_revision = old_revisions.get(path)
+            if old_revision is None:
+                result.added[path] = new_revision
+            elif old_revision != new_revision:
+                result.changed[path] = (old_revision, new_revision)
+            else:
+                result.unchanged.add(path)
+        for path, old_revision in old_revisions.items():
+            if path not in new_revisions:
+                result.removed[path] = old_revision
+        return result
+
+    def diff_releases(self, all_repos_config: AllReposConfig, newest_id: str, next_newest_id: str) -> Dict[str, ManifestDiff]:
+        """Returns parent name -> diff for every jiri/repo parent with both pinned manifests available."""
+        diffs: Dict[str, ManifestDiff] = {}
+        if not self.config.enabled:
+            return diffs
+        for repo_config in all_repos_config.repo_configs.values():
+            if repo_config.repo_type not in ("jiri", "repo"):
+                continue
+            newest_path = self.capture(repo_config, newest_id)
+            previous_path = self.snapshot_path(repo_config, next_newest_id)
+            if not newest_path or not os.path.exists(previous_path):
+                self.logger.info(f"No pinned manifest pair for {repo_config.repo_name} ({next_newest_id} -> {newest_id}); analyzing all projects")
+                continue
+            try:
+                manifest_diff = self.diff(self.load(previous_path, repo_config.repo_type), self.load(newest_path, repo_config.repo_type))
+            except Exception as e:
+                self.logger.error(f"Failed to diff pinned manifests of {repo_config.repo_name}: {e}")
+                continue
+            diffs[repo_config.repo_name] = manifest_diff
+            self.logger.info(
+                f"Pinned manifest diff for {repo_config.repo_name}: {len(manifest_diff.changed)} changed, "
+                f"{len(manifest_diff.added)} added, {len(manifest_diff.removed)} removed, {len(manifest_diff.unchanged)} unchanged"
+            )
+            for path in sorted(manifest_diff.added):
+                self.logger.info(f"  added project: {repo_config.repo_name}/{path}")
+            for path in sorted(manifest_diff.removed):
+                self.logger.info(f"  removed project: {repo_config.repo_name}/{path}")
+        return diffs
+
+    @staticmethod
+    def unchanged_repo_paths(all_repos_config: AllReposConfig, diffs: Dict[str, ManifestDiff]) -> Set[str]:
+        """Repo paths whose revision is identical in both releases and can skip git analysis."""
+        skipped: Set[str] = set()
+        for parent_name, manifest_diff in diffs.items():
+            repo_config = all_repos_config.repo_configs.get(parent_name)
+            if not repo_config:
+                continue
+            for git_repo_info in repo_config.git_repos:
+                relative_path = (git_repo_info.relative_path_in_parent or git_repo_info.repo_name).rstrip("/")
+                if relative_path in manifest_diff.unchanged:
+                    skipped.add(git_repo_info.repo_path)
+        return skipped
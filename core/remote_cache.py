@@ -0,0 +1,120 @@
+import os
+import pathlib
+import shutil
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from config.schemas import BuildCacheConfig
+from utils.custom_logger import Logger
+from typing import Dict, Type
+
+TRANSFER_CHUNK_SIZE = 1 << 20
+
+
+class RemoteArtifactStore(ABC):
+    """Flat name -> file store shared by build hosts.
+
+    Names are '/'-separated relative paths. A missing object is reported by
+    fetch returning False; transport failures raise OSError.
+    """
+
+    def __init__(self, location: str, config: BuildCacheConfig):
+        self.logger = Logger(name=self.__class__.__name__)
+        self.location = location
+        self.config = config
+
+    @abstractmethod
+    def fetch(self, name: str, destination: pathlib.Path) -> bool:
+        """Downloads an object to destination; False when the store does not have it."""
+
+    @abstractmethod
+    def upload(self, name: str, source: pathlib.Path) -> None:
+        """Stores source under name, replacing any previous object."""
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        """Whether the store has an object under name."""
+
+
+class LocalDirectoryStore(RemoteArtifactStore):
+    """A directory every host can reach, e.g. an NFS mount."""
+
+    def __init__(self, location: str, config: BuildCacheConfig):
+        super().__init__(location, config)
+        parsed = urllib.parse.urlparse(location)
+        self.root = pathlib.Path(urllib.parse.unquote(parsed.path) if parsed.scheme == "file" else location).expanduser()
+
+    def fetch(self, name: str, destination: pathlib.Path) -> bool:
+        source = self.root / name
+        if not source.is_file():
+            return False
+        shutil.copyfile(source, destination)
+        return True
+
+    def upload(self, name: str, source: pathlib.Path) -> None:
+        target = self.root / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+        shutil.copyfile(source, temp_path)
+        os.replace(temp_path, target) # Readers on other hosts never see a partial object
+
+    def exists(self, name: str) -> bool:
+        return (self.root / name).is_file()
+
+
+class HttpArtifactStore(RemoteArtifactStore):
+    """Plain GET/PUT/HEAD against <base url>/<name>, as served by a WebDAV share or a simple stand-in server."""
+
+    def __init__(self, location: str, config: BuildCacheConfig):
+        super().__init__(location, config)
+        self.base_url = location.rstrip("/")
+
+    def _url(self, name: str) -> str:
+        return f"{self.base_url}/{urllib.parse.quote(name)}"
+
+    def fetch(self, name: str, destination: pathlib.Path) -> bool:
+        try:
+            with urllib.request.urlopen(self._url(name), timeout=self.config.remote_timeout) as response, open(destination, "wb") as handle:
+                shutil.copyfileobj(response, handle, TRANSFER_CHUNK_SIZE)
+            return True
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+    def upload(self, name: str, source: pathlib.Path) -> None:
+        with open(source, "rb") as handle:
+            request = urllib.request.Request(
+                self._url(name),
+                data=handle,
+                method="PUT",
+                headers={"Content-Length": str(source.stat().st_size), "Content-Type": "application/octet-stream"},
+            )
+            with urllib.request.urlopen(request, timeout=self.config.remote_timeout):
+                pass
+
+    def exists(self, name: str) -> bool:
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self._url(name), method="HEAD"), timeout=self.config.remote_timeout):
+                return True
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return False
+            raise
+
+
+REMOTE_ARTIFACT_STORES: Dict[str, Type[RemoteArtifactStore]] = {
+    "": LocalDirectoryStore,
+    "file": LocalDirectoryStore,
+    "http": HttpArtifactStore,
+    "https": HttpArtifactStore,
+}
+
+
+def create_remote_store(config: BuildCacheConfig) -> RemoteArtifactStore:
+    scheme = urllib.parse.urlparse(config.remote_url).scheme
+    store_class = REMOTE_ARTIFACT_STORES.get(scheme)
+    if not store_class:
+        raise ValueError(f"Unsupported build cache remote '{config.remote_url}'. Supported schemes: {sorted(s for s in REMOTE_ARTIFACT_STORES if s)}")
+    return store_class(config.remote_url, config)
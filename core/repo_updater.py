@@ -1,4 +1,3 @@
-from dataclasses import replace
 from typing import Optional, List, Dict
 from config.schemas import GitRepoInfo, RepoConfig, AllReposConfig
 from utils.custom_logger import Logger
@@ -12,33 +11,28 @@ class RepoPropertyUpdater:
     def _get_repo_config(self, parent_name: str) -> Optional[RepoConfig]:
         return self._config.repo_configs.get(parent_name)
         
-    def _update_git_repo_properties(self, git_repo: GitRepoInfo, repo_config: RepoConfig) -> GitRepoInfo:
+    def _update_git_repo_properties(self, git_repo: GitRepoInfo, repo_config: RepoConfig) -> None:
+        # Updated in place: rebuilding thousands of manifest projects dominated start-up
         branch_info = repo_config.all_branches
         if git_repo.repo_name in repo_config.special_branch_repos:
             branch_info = repo_config.special_branch_repos[git_repo.repo_name]
 
         if git_repo.local_branch is None:
-            git_repo = replace(git_repo, local_branch=repo_config.remote_branch)
+            git_repo.local_branch = repo_config.remote_branch
 
-        return replace(
-            git_repo,
-            tag_prefix=repo_config.default_tag_prefix,
-            analyze_commit=repo_config.default_analyze_commit,
-            generate_patch=repo_config.default_generate_patch,
-            branch_info=branch_info,
-        )
+        git_repo.parent_config = repo_config
+        git_repo.tag_prefix = repo_config.default_tag_prefix
+        git_repo.analyze_commit = repo_config.default_analyze_commit
+        git_repo.generate_patch = repo_config.default_generate_patch
+        git_repo.use_shared_objects = repo_config.default_use_shared_objects
+        git_repo.branch_info = branch_info
 
     def update_all_repos(self) -> None:
         for repo_config in self._config.repo_configs.values():
             try:
-                updated_repos = []
                 for git_repo in repo_config.git_repos:
                     parent_config = self._get_repo_config(git_repo.repo_parent)
                     if parent_config:
-                        updated_repo = self._update_git_repo_properties(git_repo, parent_config)
-                        updated_repos.append(updated_repo)
-                    else:
-                        updated_repos.append(git_repo)
-                repo_config.git_repos = updated_repos
+                        self._update_git_repo_properties(git_repo, parent_config)
             except Exception as e:
                 logger.error(f"Error updating repos for {repo_config.repo_name}: {e}")
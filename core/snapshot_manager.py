@@ -0,0 +1,152 @@
+import datetime
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from config.schemas import AllReposConfig, GitRepoInfo, SnapshotConfig
+from utils.custom_logger import Logger
+from utils.git_utils import GitOperator
+from utils.tag_utils import construct_tag
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class ReleaseSnapshot:
+    version_identifier: str
+    recorded_at: str
+    heads: Dict[str, str] = field(default_factory=dict) # repo_path -> HEAD sha
+    tags: Dict[str, str] = field(default_factory=dict) # repo_path -> commit sha of the release tag
+
+
+@dataclass
+class SnapshotDiff:
+    changed: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    added: Dict[str, str] = field(default_factory=dict)
+    removed: Dict[str, str] = field(default_factory=dict)
+
+
+class SnapshotManager:
+    """Append-only JSONL log of the repo shas of every release.
+
+    Each line is one release; a release recorded again simply appends a newer
+    line, which wins when the file is indexed. The whole file is indexed into a
+    dict on load, so lookups are O(1) and diffs only touch two entries.
+    """
+
+    def __init__(self, git_operator: GitOperator, config: SnapshotConfig):
+        self.git_operator = git_operator
+        self.config = config
+        self.logger = Logger(name=self.__class__.__name__)
+        self.store_path = os.path.expanduser(config.store_path)
+        self._index: Dict[str, ReleaseSnapshot] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.store_path):
+            return
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as handle:
+                for line_number, line in enumerate(handle, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        snapshot = ReleaseSnapshot(
+                            version_identifier=entry["v"],
+                            recorded_at=entry.get("at", ""),
+                            heads=entry.get("heads", {}),
+                            tags=entry.get("tags", {}),
+                        )
+                    except (ValueError, KeyError) as e:
+                        # A torn final line from an interrupted run must not hide the rest
+                        self.logger.warning(f"Skipping corrupt snapshot line {line_number} in {self.store_path}: {e}")
+                        continue
+                    self._index[snapshot.version_identifier] = snapshot
+        except OSError as e:
+            self.logger.error(f"Could not read release snapshots from {self.store_path}: {e}")
+        self.logger.debug(f"Indexed {len(self._index)} release snapshots from {self.store_path}")
+
+    def versions(self) -> List[str]:
+        with self._lock:
+            return sorted(self._index)
+
+    def get(self, version_identifier: str) -> Optional[ReleaseSnapshot]:
+        with self._lock:
+            return self._index.get(version_identifier)
+
+    def append(self, snapshot: ReleaseSnapshot) -> None:
+        entry = {"v": snapshot.version_identifier, "at": snapshot.recorded_at, "heads": snapshot.heads, "tags": snapshot.tags}
+        line = json.dumps(entry, separators=(",", ":"), sort_keys=True) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.store_path) or ".", exist_ok=True)
+            with open(self.store_path, "ab+") as handle:
+                handle.seek(0, os.SEEK_END)
+                if handle.tell():
+                    handle.seek(-1, os.SEEK_END)
+                    if handle.read(1) != b"\n":
+                        # Terminate a torn line so only it is lost, not this record too
+                        handle.write(b"\n")
+                handle.write(line.encode("utf-8"))
+                handle.flush()
+                os.fsync(handle.fileno())
+            self._index[snapshot.version_identifier] = snapshot
+
+    def capture(self, all_repos_config: AllReposConfig, version_identifier: str) -> ReleaseSnapshot:
+        git_repos = [repo for repo in all_repos_config.all_git_repos() if repo.repo_path and os.path.isdir(repo.repo_path)]
+        with ThreadPoolExecutor(max_workers=max(1, self.config.max_workers), thread_name_prefix="snapshot") as pool:
+            shas = list(pool.map(lambda repo: self._repo_shas(repo, version_identifier), git_repos))
+
+        snapshot = ReleaseSnapshot(
+            version_identifier=version_identifier,
+            recorded_at=datetime.datetime.now().isoformat(timespec="seconds"),
+        )
+        for repo, (head_sha, tag_sha) in zip(git_repos, shas):
+            if head_sha:
+                snapshot.heads[repo.repo_path] = head_sha
+            if tag_sha:
+                snapshot.tags[repo.repo_path] = tag_sha
+        return snapshot
+
+    def _repo_shas(self, git_repo_info: GitRepoInfo, version_identifier: str) -> Tuple[Optional[str], Optional[str]]:
+        head_sha = self.git_operator.resolve_commit(git_repo_info.repo_path, "HEAD")
+        tag_sha = None
+        if git_repo_info.tag_prefix:
+            tag_sha = self.git_operator.resolve_commit(git_repo_info.repo_path, construct_tag(git_repo_info.tag_prefix, version_identifier))
+        return head_sha, tag_sha
+
+    def record_release(self, all_repos_config: AllReposConfig, version_identifier: str) -> Optional[ReleaseSnapshot]:
+        if not self.config.enabled:
+            return None
+        try:
+            snapshot = self.capture(all_repos_config, version_identifier)
+            self.append(snapshot)
+            self.logger.info(f"Recorded release snapshot {version_identifier}: {len(snapshot.heads)} heads, {len(snapshot.tags)} tags -> {self.store_path}")
+            return snapshot
+        except OSError as e:
+            self.logger.error(f"Failed to record release snapshot {version_identifier}: {e}")
+            return None
+
+    def diff(self, from_version: str, to_version: str, use_tags: bool = False) -> Optional[SnapshotDiff]:
+        """Compares two recorded releases by HEAD sha, or by release tag sha when use_tags is set."""
+        old_snapshot = self.get(from_version)
+        new_snapshot = self.get(to_version)
+        if not old_snapshot or not new_snapshot:
+            missing = [version for version, snapshot in ((from_version, old_snapshot), (to_version, new_snapshot)) if not snapshot]
+            self.logger.warning(f"No release snapshot recorded for {missing}")
+            return None
+        old_shas = old_snapshot.tags if use_tags else old_snapshot.heads
+        new_shas = new_snapshot.tags if use_tags else new_snapshot.heads
+
+        result = SnapshotDiff()
+        for repo_path, new_sha in new_shas.items():
+            old_sha = old_shas.get(repo_path)
+            if old_sha is None:
+                result.added[repo_path] = new_sha
+            elif old_sha != new_sha:
+                result.changed[repo_path] = (old_sha, new_sha)
+        for repo_path, old_sha in old_shas.items():
+            if repo_path not in new_shas:
+                result.removed[repo_path] = old_sha
+        return result
@@ -1,57 +1,76 @@
+from dataclasses import dataclass, field
 from utils.command_executor import CommandExecutor
-from config.schemas import GitRepoInfo, SyncAction
+from config.schemas import GitRepoInfo, SyncAction, SyncStrategyConfig
 from utils.custom_logger import Logger
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+PLACEHOLDERS: Tuple[str, ...] = ("local_branch", "remote_name", "remote_branch")
+
+
+@dataclass
+class CompiledSyncAction:
+    action_type: str
+    base_params: Dict[str, Any]
+    args: Optional[List[Any]] = None
+    # Index of each templated arg -> placeholder keys it references
+    templated_args: Dict[int, Tuple[str, ...]] = field(default_factory=dict)
+
 
 class ActionExecutor:
     def __init__(self, command_executor: CommandExecutor):
         self.command_executor = command_executor
         self.logger = Logger(name="ActionExecutor")
 
-    def execute_action(self, git_repo_info: GitRepoInfo, action: SyncAction):
+    def compile_action(self, action: SyncAction, fetch_args: Optional[List[str]] = None) -> CompiledSyncAction:
         params = action.action_params.copy()
+        args = list(params.pop("args")) if "args" in params else None
+        if fetch_args and action.action_type == "git_command" and params.get("command") == "fetch":
+            args = list(fetch_args) + (args or [])
+        templated_args: Dict[int, Tuple[str, ...]] = {}
+        for index, arg in enumerate(args or []):
+            if not isinstance(arg, str):
+                continue
+            keys = tuple(key for key in PLACEHOLDERS if "{" + key + "}" in arg)
+            if keys:
+                templated_args[index] = keys
+        return CompiledSyncAction(
+            action_type=action.action_type,
+            base_params=params,
+            args=args,
+            templated_args=templated_args,
+        )
+
+    def compile_strategy(self, strategy_config: SyncStrategyConfig, fetch_args: Optional[List[str]] = None) -> List[CompiledSyncAction]:
+        # fetch_args carry the history limits (shallow / blobless) for every fetch of the strategy
+        compiled = [self.compile_action(action, fetch_args) for action in strategy_config.sync_actions]
+        self.logger.debug(f"Compiled {len(compiled)} actions for strategy: {strategy_config.strategy_name}")
+        return compiled
+
+    def resolve_params(self, git_repo_info: GitRepoInfo, compiled: CompiledSyncAction) -> Dict[str, Any]:
+        params = compiled.base_params.copy()
         if "path" in params:
             params["path"] = git_repo_info.repo_path + "/" + params["path"]
         params["cwd"] = git_repo_info.repo_path
 
-        if action.action_type == "git_command":
-            self.logger.debug(f"Executing git_command action for repo: {git_repo_info.repo_name}")
-            self.logger.debug(f"  Initial params: {params}")
-            self.logger.debug(f"  GitRepoInfo.remote_name: {git_repo_info.remote_name}, GitRepoInfo.remote_branch: {git_repo_info.remote_branch}, GitRepoInfo.local_branch: {git_repo_info.local_branch}")
-
-            updated_args = []
-
-            placeholders = ["local_branch", "remote_name", "remote_branch"]
-
-            for arg in params["args"]:
-                if not isinstance(arg, str):
-                    updated_args.append(arg)
-                    continue
-
-                format_kwargs = {}
-
-                for placeholder_key in placeholders:
-                    placeholder_str = "{" + placeholder_key + "}"
-                    if placeholder_str in arg:
-                        self.logger.debug(f"  Found {placeholder_str} placeholder in arg: {arg}")
-                        placeholder_value = getattr(git_repo_info, placeholder_key)
-                        
-                        if placeholder_value is None:
-                            self.logger.warning(f"{placeholder_key} is not configured for repo: {git_repo_info.repo_name}. Placeholder {placeholder_str} will be replaced with None.")
-                        
-                        format_kwargs[placeholder_key] = placeholder_value
-                        self.logger.debug(f"    Adding {placeholder_key}={placeholder_value} to format_kwargs")
-
-                if format_kwargs:
-                    replaced_arg = arg.format(**format_kwargs)
-                    self.logger.debug(f"    Replacing '{arg}' with '{replaced_arg}'")
-                    updated_args.append(replaced_arg)
-                else:
-                    updated_args.append(arg)
-
-            params["args"] = updated_args
-            self.logger.debug(f"  Final params before command execution: {params}")
-            self.command_executor.execute(action.action_type, command_params=params)
-
-        else:
-            self.command_executor.execute(action_type=action.action_type, command_params=params)
+        if compiled.args is None:
+            return params
+
+        args = list(compiled.args)
+        for index, keys in compiled.templated_args.items():
+            format_kwargs = {}
+            for placeholder_key in keys:
+                placeholder_value = getattr(git_repo_info, placeholder_key)
+                if placeholder_value is None:
+                    self.logger.warning(f"{placeholder_key} is not configured for repo: {git_repo_info.repo_name}. Placeholder {{{placeholder_key}}} will be replaced with None.")
+                format_kwargs[placeholder_key] = placeholder_value
+            args[index] = args[index].format(**format_kwargs)
+        params["args"] = args
+        return params
+
+    def execute_compiled(self, git_repo_info: GitRepoInfo, compiled: CompiledSyncAction):
+        params = self.resolve_params(git_repo_info, compiled)
+        self.logger.debug(f"Executing {compiled.action_type} action for repo: {git_repo_info.repo_name} with params: {params}")
+        return self.command_executor.execute(compiled.action_type, command_params=params)
+
+    def execute_action(self, git_repo_info: GitRepoInfo, action: SyncAction):
+        return self.execute_compiled(git_repo_info, self.compile_action(action))
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import re
+import subprocess
+from config.schemas import GitRepoInfo, SharedObjectStoreConfig
+from utils.command_executor import CommandExecutor
+from utils.custom_logger import Logger
+from utils.git_utils import GitOperator
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class SharedObjectStore:
+    """Bare repositories that hold the common history of a repo group.
+
+    Members borrow objects through objects/info/alternates, so their own
+    fetches only transfer what the store does not already have. Stores are
+    never pruned because members may reference any object in them.
+    """
+
+    def __init__(self, config: SharedObjectStoreConfig, command_executor: CommandExecutor):
+        self.config = config
+        self.command_executor = command_executor
+        self.git_operator = GitOperator(command_executor)
+        self.logger = Logger(name=self.__class__.__name__)
+        self.root = os.path.expanduser(config.root)
+
+    def store_name_for(self, git_repo_info: GitRepoInfo) -> str:
+        for store_name, members in self.config.groups.items():
+            if git_repo_info.repo_name in members:
+                return store_name
+        return git_repo_info.repo_parent
+
+    def store_path(self, store_name: str) -> str:
+        return os.path.join(self.root, f"{re.sub(r'[^A-Za-z0-9._-]', '_', store_name)}.git")
+
+    def prepare(self, git_repos: List[GitRepoInfo]) -> Dict[str, bool]:
+        """Refreshes the stores of all opted-in repos and links each member; returns repo_path -> linked."""
+        linked: Dict[str, bool] = {}
+        if not self.config.enabled:
+            return linked
+
+        groups: Dict[str, List[GitRepoInfo]] = {}
+        for repo in git_repos:
+            if repo.use_shared_objects and repo.repo_path and os.path.isdir(repo.repo_path):
+                groups.setdefault(self.store_name_for(repo), []).append(repo)
+
+        for store_name, members in groups.items():
+            store_path = self.store_path(store_name)
+            try:
+                self._ensure_store(store_path)
+                self._refresh_store(store_name, store_path, members)
+            except (subprocess.CalledProcessError, OSError) as e:
+                self.logger.error(f"Failed to prepare shared object store '{store_name}' at {store_path}: {e}")
+                continue
+            for repo in members:
+                linked[repo.repo_path] = self._link_member(repo, store_path)
+        self.logger.info(f"Shared object stores ready: {len(groups)} stores, {sum(linked.values())}/{len(linked)} repos linked")
+        return linked
+
+    def _run_git(self, cwd: str, command: str, args: List[str]) -> subprocess.CompletedProcess:
+        return self.command_executor.execute("git_command", {"command": command, "args": args, "cwd": cwd})
+
+    def _ensure_store(self, store_path: str) -> None:
+        if os.path.isdir(os.path.join(store_path, "objects")):
+            return
+        self.logger.info(f"Creating shared object store: {store_path}")
+        os.makedirs(store_path, exist_ok=True)
+        self._run_git(store_path, "init", ["--bare", "--quiet"])
+        # Members may point at any object in here, so nothing is ever pruned.
+        self._run_git(store_path, "config", ["gc.pruneExpire", "never"])
+        self._run_git(store_path, "config", ["gc.auto", "0"])
+
+    def _refresh_store(self, store_name: str, store_path: str, members: List[GitRepoInfo]) -> None:
+        sources: Set[Tuple[str, str]] = set()
+        for repo in members:
+            if not repo.remote_name or not repo.remote_branch:
+                continue
+            remote_url = self.git_operator.get_remote_url(repo.repo_path, repo.remote_name)
+            if remote_url:
+                sources.add((remote_url, repo.remote_branch))
+
+        for remote_url, branch in sorted(sources):
+            namespace = hashlib.sha1(remote_url.encode("utf-8")).hexdigest()[:12]
+            refspec = f"+refs/heads/{branch}:refs/shared/{namespace}/{branch}"
+            self.logger.info(f"Refreshing shared store '{store_name}' from {remote_url} ({branch})")
+            try:
+                self._run_git(store_path, "fetch", ["--no-tags", "--quiet", remote_url, refspec])
+            except subprocess.CalledProcessError as e:
+                self.logger.warning(f"Could not refresh shared store '{store_name}' from {remote_url}: {e.stderr}")
+
+    def _alternates_file(self, repo_path: str) -> Optional[str]:
+        try:
+            result = self._run_git(repo_path, "rev-parse", ["--git-path", "objects/info/alternates"])
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Could not locate the object directory of {repo_path}: {e.stderr}")
+            return None
+        return os.path.join(repo_path, result.stdout.strip())
+
+    def _link_member(self, git_repo_info: GitRepoInfo, store_path: str) -> bool:
+        alternates_file = self._alternates_file(git_repo_info.repo_path)
+        if not alternates_file:
+            return False
+        store_objects = os.path.join(os.path.abspath(store_path), "objects")
+        try:
+            existing: List[str] = []
+            if os.path.exists(alternates_file):
+                with open(alternates_file, "r", encoding="utf-8") as handle:
+                    existing = [line.strip() for line in handle if line.strip()]
+            if store_objects in existing:
+                return True
+            os.makedirs(os.path.dirname(alternates_file), exist_ok=True)
+            with open(alternates_file, "a", encoding="utf-8") as handle:
+                handle.write(store_objects + "\n")
+            self.logger.info(f"Linked {git_repo_info.repo_name} to shared object store {store_path}")
+        except OSError as e:
+            self.logger.error(f"Failed to update {alternates_file} for {git_repo_info.repo_name}: {e}")
+            return False
+
+        if self.config.repack_on_link:
+            try:
+                self._run_git(git_repo_info.repo_path, "repack", ["-a", "-d", "-l", "-q"])
+            except subprocess.CalledProcessError as e:
+                self.logger.warning(f"Repack after linking failed for {git_repo_info.repo_name}: {e.stderr}")
+        return True
@@ -1,8 +1,68 @@
-from core.sync.action_executor import ActionExecutor
-from config.schemas import AllReposConfig, GitRepoInfo, AllSyncConfigs
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from core.sync.action_executor import ActionExecutor, CompiledSyncAction
+from core.sync.object_store import SharedObjectStore
+from core.sync.sync_strategies import NATIVE_SYNC_STRATEGIES, RepoSyncStrategy
+from config.schemas import AllReposConfig, GitRepoInfo, AllSyncConfigs, SyncStrategyConfig
 from utils.command_executor import CommandExecutor
 from utils.custom_logger import Logger
-from typing import Dict, Optional
+from utils.git_utils import GitOperator
+from utils.tag_utils import InvalidVersionIdentifierFormatError, parse_version_identifier
+from typing import Dict, List, Optional, Set, Tuple
+
+
+@dataclass
+class RepoSyncResult:
+    repo_name: str
+    repo_parent: str
+    repo_path: str
+    strategy_name: Optional[str]
+    success: bool
+    error: Optional[str] = None
+    actions_executed: int = 0
+    duration_seconds: float = 0.0
+    skipped_actions: int = 0
+    precheck_seconds: float = 0.0
+    skipped_seconds_estimate: float = 0.0
+
+
+class SyncTimingStore:
+    """Remembers how long each repo's skippable actions took so fast-path skips can be reported in seconds."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = os.path.expanduser(path) if path else None
+        self._timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as handle:
+                    self._timings = {key: float(value) for key, value in json.load(handle).items()}
+            except (OSError, ValueError):
+                self._timings = {}
+
+    def get(self, repo_path: str) -> Optional[float]:
+        with self._lock:
+            return self._timings.get(repo_path)
+
+    def record(self, repo_path: str, seconds: float) -> None:
+        with self._lock:
+            self._timings[repo_path] = seconds
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = dict(self._timings)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(snapshot, handle)
+        os.replace(temp_path, self.path)
 
 
 class RepoSynchronizer:
@@ -11,28 +71,260 @@ class RepoSynchronizer:
         self.all_sync_configs = all_sync_configs
         self.command_executor = command_executor
         self.logger = Logger(name="RepoSynchronizer")
+        self.action_executor = ActionExecutor(command_executor)
+        self.git_operator = GitOperator(command_executor)
+        self._timings = SyncTimingStore(all_sync_configs.execution.timing_cache_path)
+        self.object_store = SharedObjectStore(all_sync_configs.shared_object_store, command_executor)
+        self._remote_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._remote_semaphores_lock = threading.Lock()
+
+    def sync_repos(self, history_anchor: Optional[str] = None) -> List[RepoSyncResult]:
+        """history_anchor is the next_newest version identifier; shallow strategies fetch back to its date."""
+        compiled_strategies: Dict[str, Optional[List[CompiledSyncAction]]] = {}
+        jobs = []
+        native_groups: Dict[str, List[Tuple[int, GitRepoInfo]]] = {}
+        results: List[Optional[RepoSyncResult]] = []
 
-    def sync_repos(self):
         for git_repo_info in self.all_repos_config.all_git_repos():
             strategy_name = self.get_strategy_name(git_repo_info.repo_parent)
-            if strategy_name:
-                self.logger.info(f"Synchronizing repository: {git_repo_info.repo_name} with strategy: {strategy_name}")
+            if not strategy_name:
+                self.logger.warning(f"No synchronization strategy found for parent type: {git_repo_info.repo_parent}")
+                results.append(self._make_result(git_repo_info, None, False, error="No synchronization strategy configured"))
+                continue
+
+            if strategy_name not in compiled_strategies:
                 strategy_config = self.all_sync_configs.sync_configs.get(strategy_name)
                 if not strategy_config:
                     self.logger.error(f"Synchronization configuration not found for strategy: {strategy_name}")
-                    continue
-
-                action_executor = ActionExecutor(self.command_executor)
-                try:
-                    for action in strategy_config.sync_actions:
-                        action_executor.execute_action(git_repo_info, action)
-                    self.logger.info(f"Successfully synchronized repository: {git_repo_info.repo_name}")
-                except Exception as e:
-                    self.logger.exception(f"Failed to synchronize repository: {git_repo_info.repo_name}, error: {e}")
+                    compiled_strategies[strategy_name] = None
+                else:
+                    fetch_args = self._history_fetch_args(strategy_config, history_anchor)
+                    compiled_strategies[strategy_name] = self.action_executor.compile_strategy(strategy_config, fetch_args)
+
+            compiled_actions = compiled_strategies[strategy_name]
+            if compiled_actions is None:
+                results.append(self._make_result(git_repo_info, strategy_name, False, error=f"Synchronization configuration not found for strategy: {strategy_name}"))
+                continue
+
+            if self._uses_native_backend(git_repo_info.repo_parent, strategy_name):
+                native_groups.setdefault(git_repo_info.repo_parent, []).append((len(results), git_repo_info))
             else:
-                self.logger.warning(f"No synchronization strategy found for parent type: {git_repo_info.repo_parent}")
+                jobs.append((len(results), git_repo_info, strategy_name, compiled_actions))
+            results.append(None)
+
+        if self.all_sync_configs.shared_object_store.enabled:
+            self.object_store.prepare(list(self.all_repos_config.all_git_repos()))
+
+        execution = self.all_sync_configs.execution
+        max_workers = max(1, execution.max_workers)
+        self.logger.info(f"Synchronizing {len(jobs)} repositories with {max_workers} workers (per-remote cap: {execution.max_workers_per_remote or 'none'})")
+        if native_groups:
+            self.logger.info(f"Synchronizing {sum(len(group) for group in native_groups.values())} projects of {list(native_groups)} with native workspace backends")
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="repo-sync") as pool:
+            # Backends are built here because Logger construction re-registers the log sink
+            native_futures = [
+                (group, pool.submit(self._sync_native_group, self._create_native_backend(parent_name), [repo for _, repo in group], compiled_strategies[self.get_strategy_name(parent_name)]))
+                for parent_name, group in native_groups.items()
+            ]
+            futures = [
+                (index, pool.submit(self._sync_single_repo, git_repo_info, strategy_name, compiled_actions))
+                for index, git_repo_info, strategy_name, compiled_actions in jobs
+            ]
+            for index, future in futures:
+                results[index] = future.result()
+            for group, future in native_futures:
+                for (index, _), result in zip(group, future.result()):
+                    results[index] = result
+
+        try:
+            self._timings.save()
+        except OSError as e:
+            self.logger.warning(f"Could not persist sync timings to {self._timings.path}: {e}")
+        self._log_summary(results)
+        return results
+
+    def _history_fetch_args(self, strategy_config: SyncStrategyConfig, history_anchor: Optional[str]) -> List[str]:
+        if strategy_config.history_mode == "blobless":
+            return ["--filter=blob:none"]
+        if strategy_config.history_mode != "shallow":
+            return []
+        if not history_anchor:
+            # Without an anchor an already shallow repo keeps its boundary; CommitAnalyzer deepens on demand.
+            self.logger.warning(f"No release anchor given for shallow strategy {strategy_config.strategy_name}; fetching without --shallow-since")
+            return []
+        try:
+            anchor_date = parse_version_identifier(history_anchor)["date"]
+        except InvalidVersionIdentifierFormatError as e:
+            self.logger.warning(f"Cannot derive shallow boundary for {strategy_config.strategy_name}: {e}")
+            return []
+        since = anchor_date - datetime.timedelta(days=max(0, strategy_config.shallow_margin_days))
+        self.logger.info(f"Strategy {strategy_config.strategy_name} fetches history since {since.isoformat()} (anchor {history_anchor})")
+        return [f"--shallow-since={since.isoformat()}"]
+
+    def _sync_single_repo(self, git_repo_info: GitRepoInfo, strategy_name: str, compiled_actions: List[CompiledSyncAction]) -> RepoSyncResult:
+        semaphore = self._get_remote_semaphore(git_repo_info.remote_name)
+        strategy_config = self.all_sync_configs.sync_configs[strategy_name]
+        skip_commands = set(strategy_config.skip_unchanged_commands) if strategy_config.skip_unchanged else set()
+        start_time = time.monotonic()
+        actions_executed = 0
+        skipped_actions = 0
+        precheck_seconds = 0.0
+        skippable_seconds = 0.0
+        fetched = False
+        in_sync: Optional[bool] = None
+        if semaphore:
+            semaphore.acquire()
+        try:
+            self.logger.info(f"Synchronizing repository: {git_repo_info.repo_name} with strategy: {strategy_name}")
+            for compiled in compiled_actions:
+                command = compiled.base_params.get("command") if compiled.action_type == "git_command" else None
+                if command in skip_commands:
+                    if in_sync is None:
+                        precheck_start = time.monotonic()
+                        in_sync = self._is_in_sync(git_repo_info, fetched)
+                        precheck_seconds = time.monotonic() - precheck_start
+                    if in_sync:
+                        skipped_actions += 1
+                        continue
+                    action_start = time.monotonic()
+                    self.action_executor.execute_compiled(git_repo_info, compiled)
+                    skippable_seconds += time.monotonic() - action_start
+                else:
+                    self.action_executor.execute_compiled(git_repo_info, compiled)
+                if command == "fetch":
+                    fetched = True
+                actions_executed += 1
+
+            if skipped_actions:
+                self.logger.info(f"Repository {git_repo_info.repo_name} already matches {git_repo_info.remote_name}/{git_repo_info.remote_branch}; skipped {skipped_actions} actions")
+            elif skippable_seconds:
+                self._timings.record(git_repo_info.repo_path, skippable_seconds)
+            self.logger.info(f"Successfully synchronized repository: {git_repo_info.repo_name}")
+            result = self._make_result(git_repo_info, strategy_name, True, actions_executed=actions_executed, start_time=start_time)
+        except Exception as e:
+            self.logger.exception(f"Failed to synchronize repository: {git_repo_info.repo_name}, error: {e}")
+            result = self._make_result(git_repo_info, strategy_name, False, error=str(e), actions_executed=actions_executed, start_time=start_time)
+        finally:
+            if semaphore:
+                semaphore.release()
+        self._apply_fast_path_stats(result, skipped_actions, precheck_seconds)
+        return result
+
+    def _apply_fast_path_stats(self, result: RepoSyncResult, skipped_actions: int, precheck_seconds: float) -> None:
+        result.skipped_actions = skipped_actions
+        result.precheck_seconds = precheck_seconds
+        if skipped_actions:
+            result.skipped_seconds_estimate = self._timings.get(result.repo_path) or 0.0
+
+    def _is_in_sync(self, git_repo_info: GitRepoInfo, fetched: bool) -> bool:
+        repo_path = git_repo_info.repo_path
+        if not git_repo_info.remote_name or not git_repo_info.remote_branch:
+            return False
+        if git_repo_info.local_branch and self.git_operator.get_symbolic_branch(repo_path) != git_repo_info.local_branch:
+            return False
+        head_sha = self.git_operator.resolve_commit(repo_path, "HEAD")
+        if not head_sha:
+            return False
+        if fetched:
+            # The strategy already fetched, so the remote-tracking ref is current.
+            remote_sha = self.git_operator.resolve_commit(repo_path, f"{git_repo_info.remote_name}/{git_repo_info.remote_branch}")
+        else:
+            remote_sha = self.git_operator.get_remote_branch_sha(repo_path, git_repo_info.remote_name, git_repo_info.remote_branch)
+        if head_sha != remote_sha:
+            return False
+        # Untracked files count: skipping the sync also skips its clean, so build leftovers would survive
+        return self.git_operator.is_worktree_clean(repo_path, include_untracked=True)
+
+    def _precheck_many(self, git_repos: List[GitRepoInfo], fetched: bool) -> Set[str]:
+        max_workers = max(1, self.all_sync_configs.execution.max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync-precheck") as pool:
+            flags = list(pool.map(lambda repo: self._is_in_sync(repo, fetched), git_repos))
+        return {repo.repo_path for repo, in_sync in zip(git_repos, flags) if in_sync}
+
+    def _uses_native_backend(self, parent_name: str, strategy_name: str) -> bool:
+        strategy_config = self.all_sync_configs.sync_configs.get(strategy_name)
+        repo_config = self.all_repos_config.repo_configs.get(parent_name)
+        return bool(
+            strategy_config and repo_config
+            and strategy_config.backend == "native"
+            and repo_config.repo_type in NATIVE_SYNC_STRATEGIES
+        )
+
+    def _create_native_backend(self, parent_name: str) -> RepoSyncStrategy:
+        repo_config = self.all_repos_config.repo_configs[parent_name]
+        strategy_config = self.all_sync_configs.sync_configs[repo_config.sync_strategy]
+        return NATIVE_SYNC_STRATEGIES[repo_config.repo_type](self.command_executor, self.action_executor, repo_config, strategy_config)
+
+    def _sync_native_group(self, backend: RepoSyncStrategy, git_repos: List[GitRepoInfo], compiled_actions: List[CompiledSyncAction]) -> List[RepoSyncResult]:
+        strategy_name = backend.strategy_config.strategy_name
+        start_time = time.monotonic()
+        try:
+            outcomes = backend.sync(git_repos, compiled_actions, precheck=self._precheck_many)
+        except Exception as e:
+            self.logger.exception(f"Native synchronization failed for {backend.repo_config.repo_name}: {e}")
+            return [self._make_result(repo, strategy_name, False, error=str(e), start_time=start_time) for repo in git_repos]
+
+        results = []
+        for repo in git_repos:
+            outcome = outcomes[repo.repo_path]
+            if outcome.error:
+                self.logger.error(f"Failed to synchronize repository: {repo.repo_name}, error: {outcome.error}")
+            result = self._make_result(repo, strategy_name, outcome.error is None, error=outcome.error, actions_executed=outcome.actions_executed, start_time=start_time)
+            if not outcome.skipped_actions and outcome.skippable_seconds:
+                self._timings.record(repo.repo_path, outcome.skippable_seconds)
+            self._apply_fast_path_stats(result, outcome.skipped_actions, outcome.precheck_seconds)
+            results.append(result)
+        return results
+
+    def _get_remote_semaphore(self, remote_name: Optional[str]) -> Optional[threading.BoundedSemaphore]:
+        cap = self.all_sync_configs.execution.max_workers_per_remote
+        if cap <= 0:
+            return None
+        remote_key = remote_name or ""
+        with self._remote_semaphores_lock:
+            semaphore = self._remote_semaphores.get(remote_key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(cap)
+                self._remote_semaphores[remote_key] = semaphore
+            return semaphore
+
+    def _make_result(
+        self,
+        git_repo_info: GitRepoInfo,
+        strategy_name: Optional[str],
+        success: bool,
+        error: Optional[str] = None,
+        actions_executed: int = 0,
+        start_time: Optional[float] = None
+    ) -> RepoSyncResult:
+        return RepoSyncResult(
+            repo_name=git_repo_info.repo_name,
+            repo_parent=git_repo_info.repo_parent,
+            repo_path=git_repo_info.repo_path,
+            strategy_name=strategy_name,
+            success=success,
+            error=error,
+            actions_executed=actions_executed,
+            duration_seconds=time.monotonic() - start_time if start_time is not None else 0.0,
+        )
 
+    def _log_summary(self, results: List[RepoSyncResult]) -> None:
+        succeeded = sum(1 for result in results if result.success)
+        failed = [result for result in results if not result.success and result.strategy_name]
+        self.logger.info(f"Synchronization finished: {succeeded} succeeded, {len(failed)} failed, {len(results) - succeeded - len(failed)} without strategy.")
+        fast_path = [result for result in results if result.skipped_actions]
+        if fast_path:
+            saved_seconds = sum(result.skipped_seconds_estimate for result in fast_path)
+            precheck_seconds = sum(result.precheck_seconds for result in results)
+            self.logger.info(
+                f"Skip-unchanged fast path: {len(fast_path)} projects already in sync, "
+                f"{sum(result.skipped_actions for result in fast_path)} actions skipped, "
+                f"~{saved_seconds:.1f}s saved (pre-check cost {precheck_seconds:.1f}s)"
+            )
+        for result in failed:
+            self.logger.error(f"  {result.repo_parent}/{result.repo_name} ({result.repo_path}): {result.error}")
 
     def get_strategy_name(self, parent_type: str) -> Optional[str]:
         repo_config = self.all_repos_config.repo_configs.get(parent_type)
-        return repo_config.sync_strategy if repo_config else None
\ No newline at end of file
+        return repo_config.sync_strategy if repo_config else None
@@ -1,14 +1,234 @@
+import os
+import re
+import shlex
+import subprocess
+import time
 from abc import ABC, abstractmethod
-from config.schemas import GitRepoInfo, SyncStrategyConfig, SyncAction
+from dataclasses import dataclass
+from config.schemas import GitRepoInfo, RepoConfig, SyncStrategyConfig
+from core.sync.action_executor import ActionExecutor, CompiledSyncAction
 from utils.command_executor import CommandExecutor
 from utils.custom_logger import Logger
-from config.sync_config import sync_strategies_config
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
+
+RESULT_MARKER = "@@sync-rc"
+
+
+@dataclass
+class ProjectSyncOutcome:
+    actions_executed: int = 0
+    error: Optional[str] = None
+    skipped_actions: int = 0
+    precheck_seconds: float = 0.0
+    skippable_seconds: float = 0.0
+
 
 class RepoSyncStrategy(ABC):
-    def __init__(self):
-       self.logger = Logger(name=self.__class__.__name__)
+    """Runs a compiled strategy for every project of one workspace parent."""
+
+    def __init__(self, command_executor: CommandExecutor, action_executor: ActionExecutor, repo_config: RepoConfig, strategy_config: SyncStrategyConfig):
+        self.logger = Logger(name=self.__class__.__name__)
+        self.command_executor = command_executor
+        self.action_executor = action_executor
+        self.repo_config = repo_config
+        self.strategy_config = strategy_config
+
+    def sync(
+        self,
+        git_repos: List[GitRepoInfo],
+        compiled_actions: List[CompiledSyncAction],
+        precheck: Optional[Callable[[List[GitRepoInfo], bool], Set[str]]] = None
+    ) -> Dict[str, ProjectSyncOutcome]:
+        outcomes = {repo.repo_path: ProjectSyncOutcome() for repo in git_repos}
+        active = list(git_repos)
+        skip_commands = set(self.strategy_config.skip_unchanged_commands) if self.strategy_config.skip_unchanged and precheck else set()
+        in_sync_paths: Optional[Set[str]] = None
+        fetched = False
+        for compiled in compiled_actions:
+            if not active:
+                break
+            if compiled.action_type == "git_command":
+                command = compiled.base_params["command"]
+                targets = active
+                if command in skip_commands:
+                    if in_sync_paths is None:
+                        precheck_start = time.monotonic()
+                        in_sync_paths = precheck(active, fetched)
+                        precheck_share = (time.monotonic() - precheck_start) / len(active)
+                        for repo in active:
+                            outcomes[repo.repo_path].precheck_seconds = precheck_share
+                        if in_sync_paths:
+                            self.logger.info(f"{len(in_sync_paths)} {self.repo_config.repo_name} projects already in sync; skipping {sorted(skip_commands)}")
+                    targets = [repo for repo in active if repo.repo_path not in in_sync_paths]
+                    for repo in active:
+                        if repo.repo_path in in_sync_paths:
+                            outcomes[repo.repo_path].skipped_actions += 1
+                for args, batch in self._batch_by_args(targets, compiled).items():
+                    batch_start = time.monotonic()
+                    errors = self.run_git_batch(command, list(args), batch)
+                    if command in skip_commands:
+                        batch_share = (time.monotonic() - batch_start) / len(batch)
+                        for repo in batch:
+                            outcomes[repo.repo_path].skippable_seconds += batch_share
+                    self._record(outcomes, batch, errors)
+                if command == "fetch":
+                    fetched = True
+            elif compiled.action_type == "workspace_update":
+                args = self.action_executor.resolve_params(active[0], compiled).get("args", [])
+                errors = self.run_workspace_update(args, active)
+                self._record(outcomes, active, errors)
+            else:
+                for repo in active:
+                    try:
+                        self.action_executor.execute_compiled(repo, compiled)
+                        error = None
+                    except Exception as e:
+                        error = str(e)
+                    self._record(outcomes, [repo], {repo.repo_path: error} if error else {})
+            active = [repo for repo in active if outcomes[repo.repo_path].error is None]
+        return outcomes
+
+    def _batch_by_args(self, repos: List[GitRepoInfo], compiled: CompiledSyncAction) -> Dict[Tuple[str, ...], List[GitRepoInfo]]:
+        batches: Dict[Tuple[str, ...], List[GitRepoInfo]] = {}
+        for repo in repos:
+            args = tuple(str(arg) for arg in self.action_executor.resolve_params(repo, compiled).get("args", []))
+            batches.setdefault(args, []).append(repo)
+        return batches
+
+    @staticmethod
+    def _record(outcomes: Dict[str, ProjectSyncOutcome], repos: List[GitRepoInfo], errors: Dict[str, str]) -> None:
+        for repo in repos:
+            outcome = outcomes[repo.repo_path]
+            error = errors.get(repo.repo_path)
+            if error:
+                outcome.error = error
+            else:
+                outcome.actions_executed += 1
+
+    @staticmethod
+    def _marked_shell_command(git_command: str, args: List[str], marker_prefix: str = "", only_paths: Optional[List[str]] = None) -> str:
+        git_invocation = shlex.join(["git", git_command] + args)
+        command = f'{git_invocation}; rc=$?; echo "{RESULT_MARKER} {marker_prefix}$rc"; exit $rc'
+        if only_paths:
+            # Projects the tool selected beyond the requested ones exit untouched and unreported
+            patterns = "|".join(shlex.quote(path) for path in only_paths)
+            command = f'case "$(pwd -P)" in {patterns}) ;; *) exit 0;; esac; {command}'
+        return command
+
+    @abstractmethod
+    def run_git_batch(self, git_command: str, args: List[str], repos: List[GitRepoInfo]) -> Dict[str, str]:
+        """Runs one git command across repos; returns repo_path -> error for failed projects."""
+
+    @abstractmethod
+    def run_workspace_update(self, args: List[str], repos: List[GitRepoInfo]) -> Dict[str, str]:
+        """Runs the workspace tool's own parallel update; returns repo_path -> error for failed projects."""
+
+
+class JiriSyncStrategy(RepoSyncStrategy):
+    """jiri runp selects projects by name, which is not unique across paths.
+
+    The shell snippet therefore checks its own (physical) working directory against
+    the requested project paths and reports its result under that path.
+    """
+    _RESULT_LINE = re.compile(re.escape(RESULT_MARKER) + r" (?P<path>.+) (?P<rc>\d+)\s*$")
+
+    @staticmethod
+    def _project_path(repo: GitRepoInfo) -> str:
+        return os.path.realpath(os.path.expanduser(repo.repo_path))
+
+    def _execute_jiri(self, command: str, args: List[str]) -> subprocess.CompletedProcess:
+        params = {"jiri_path": self.repo_config.path, "command": command, "args": args}
+        return self.command_executor.execute("jiri_command", params, check=False)
+
+    def run_git_batch(self, git_command: str, args: List[str], repos: List[GitRepoInfo]) -> Dict[str, str]:
+        names_regex = "^(" + "|".join(sorted({re.escape(repo.repo_name) for repo in repos})) + ")$"
+        project_paths = [self._project_path(repo) for repo in repos]
+        runp_args = [
+            f"-j={self.strategy_config.native_jobs}",
+            f"-projects={names_regex}",
+            "sh", "-c", self._marked_shell_command(git_command, args, marker_prefix="$(pwd -P) ", only_paths=project_paths),
+        ]
+        self.logger.info(f"Running 'git {git_command}' across {len(repos)} {self.repo_config.repo_name} projects via jiri runp")
+        result = self._execute_jiri("runp", runp_args)
+        return self._map_results(result, repos, f"git {git_command}")
+
+    def _map_results(self, result: subprocess.CompletedProcess, repos: List[GitRepoInfo], description: str) -> Dict[str, str]:
+        return_codes: Dict[str, int] = {}
+        for line in (result.stdout or "").splitlines():
+            match = self._RESULT_LINE.search(line)
+            if match:
+                return_codes[match.group("path")] = int(match.group("rc"))
+
+        errors: Dict[str, str] = {}
+        for repo in repos:
+            rc = return_codes.get(self._project_path(repo))
+            if rc is None:
+                errors[repo.repo_path] = f"jiri runp reported no result for '{description}' (exit code {result.returncode})"
+            elif rc != 0:
+                errors[repo.repo_path] = f"'{description}' failed with exit code {rc}"
+        return errors
+
+    def run_workspace_update(self, args: List[str], repos: List[GitRepoInfo]) -> Dict[str, str]:
+        self.logger.info(f"Running jiri update for {self.repo_config.repo_name} workspace")
+        result = self._execute_jiri("update", [f"-j={self.strategy_config.native_jobs}"] + args)
+        if result.returncode == 0:
+            return {}
+        failed_names = set(re.findall(r'project "?([^"\s:]+)"?', result.stderr or ""))
+        error = f"jiri update failed with exit code {result.returncode}"
+        if failed_names:
+            return {repo.repo_path: error for repo in repos if repo.repo_name in failed_names}
+        return {repo.repo_path: error for repo in repos}
+
+
+class RepoToolSyncStrategy(RepoSyncStrategy):
+    _RESULT_LINE = re.compile(re.escape(RESULT_MARKER) + r" (?P<path>\S+) (?P<rc>\d+)\s*$")
+    _SYNC_ERROR_LINE = re.compile(r"^error: (?P<path>[^\s:]+):", re.MULTILINE)
+
+    def _execute_repo(self, command: str, args: List[str]) -> subprocess.CompletedProcess:
+        params = {"repo_root": self.repo_config.path, "command": command, "args": args}
+        return self.command_executor.execute("repo_command", params, check=False)
+
+    @staticmethod
+    def _project_path(repo: GitRepoInfo) -> str:
+        return (repo.relative_path_in_parent or repo.repo_name).rstrip("/")
+
+    def run_git_batch(self, git_command: str, args: List[str], repos: List[GitRepoInfo]) -> Dict[str, str]:
+        forall_args = [self._project_path(repo) for repo in repos] + [
+            "-j", str(self.strategy_config.native_jobs),
+            "-c", self._marked_shell_command(git_command, args, marker_prefix="$REPO_PATH "),
+        ]
+        self.logger.info(f"Running 'git {git_command}' across {len(repos)} {self.repo_config.repo_name} projects via repo forall")
+        result = self._execute_repo("forall", forall_args)
+
+        return_codes: Dict[str, int] = {}
+        for line in (result.stdout or "").splitlines():
+            match = self._RESULT_LINE.search(line)
+            if match:
+                return_codes[match.group("path").rstrip("/")] = int(match.group("rc"))
+
+        errors: Dict[str, str] = {}
+        for repo in repos:
+            rc = return_codes.get(self._project_path(repo))
+            if rc is None:
+                errors[repo.repo_path] = f"repo forall reported no result for 'git {git_command}' (exit code {result.returncode})"
+            elif rc != 0:
+                errors[repo.repo_path] = f"'git {git_command}' failed with exit code {rc}"
+        return errors
+
+    def run_workspace_update(self, args: List[str], repos: List[GitRepoInfo]) -> Dict[str, str]:
+        self.logger.info(f"Running repo sync for {len(repos)} {self.repo_config.repo_name} projects")
+        sync_args = ["-j", str(self.strategy_config.native_jobs)] + args + [self._project_path(repo) for repo in repos]
+        result = self._execute_repo("sync", sync_args)
+        if result.returncode == 0:
+            return {}
+        failed_paths = {path.rstrip("/") for path in self._SYNC_ERROR_LINE.findall(result.stderr or "")}
+        error = f"repo sync failed with exit code {result.returncode}"
+        if failed_paths:
+            return {repo.repo_path: error for repo in repos if self._project_path(repo) in failed_paths}
+        return {repo.repo_path: error for repo in repos}
+
 
-   @abstractmethod
-   def sync(self, git_repo_info: GitRepoInfo, command_executor: CommandExecutor, config: SyncStrategyConfig):
-       pass
\ No newline at end of file
+NATIVE_SYNC_STRATEGIES: Dict[str, Type[RepoSyncStrategy]] = {
+    "jiri": JiriSyncStrategy,
+    "repo": RepoToolSyncStrategy,
+}
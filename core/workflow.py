@@ -1,6 +1,6 @@
 import os
 import shutil
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Set
 from config.schemas import (
     CommitDetail, AllReposConfig, GitRepoInfo, RepoConfig, PatchConfig,
     PackageConfig, DeployConfig, ExcelConfig
@@ -17,6 +17,9 @@ from core.deployer import Deployer
 from utils.excel_utils import ExcelReporter
 from core.builder import BuildSystem
 from core.git_tag_manager import GitTagFetcher
+from core.pinned_manifest import PinnedManifestManager
+from core.snapshot_manager import SnapshotManager
+from core.commit_deduplicator import CommitDeduplicator
 # Import RepoSynchronizer if it exists, otherwise handle potential absence
 try:
     from core.sync.repo_synchronizer import RepoSynchronizer
@@ -31,7 +34,6 @@ class ProjectWorkflow:
         cmd_executor: CommandExecutor,
         git_operator: GitOperator,
         repo_manager: RepoManager,
-        # synchronizer: Optional[RepoSynchronizer], # Make optional if RepoSynchronizer might not exist
         tag_fetcher: GitTagFetcher,
         builder: BuildSystem,
         analyzer: CommitAnalyzer,
@@ -40,13 +42,16 @@ class ProjectWorkflow:
         packager: ReleasePackager,
         deployer: Deployer,
         logger: Logger,
+        pinned_manifests: Optional[PinnedManifestManager] = None,
+        snapshot_manager: Optional[SnapshotManager] = None,
+        commit_deduplicator: Optional[CommitDeduplicator] = None,
+        synchronizer: Optional["RepoSynchronizer"] = None,
         **kwargs: Any
     ) -> None:
         self.config: AllReposConfig = config
         self.cmd_executor: CommandExecutor = cmd_executor
         self.git_operator: GitOperator = git_operator
         self.repo_manager: RepoManager = repo_manager
-        # self.synchronizer: Optional[RepoSynchronizer] = synchronizer
         self.tag_fetcher: GitTagFetcher = tag_fetcher
         self.builder: BuildSystem = builder
         self.analyzer: CommitAnalyzer = analyzer
@@ -55,6 +60,10 @@ class ProjectWorkflow:
         self.packager: ReleasePackager = packager
         self.deployer: Deployer = deployer
         self.logger: Logger = logger
+        self.pinned_manifests: Optional[PinnedManifestManager] = pinned_manifests
+        self.snapshot_manager: Optional[SnapshotManager] = snapshot_manager
+        self.commit_deduplicator: Optional[CommitDeduplicator] = commit_deduplicator
+        self.synchronizer: Optional["RepoSynchronizer"] = synchronizer
         # Store other dependencies if passed via kwargs, though explicit is better
         self.other_dependencies: Dict[str, Any] = kwargs
 
@@ -196,16 +205,6 @@ class ProjectWorkflow:
             # Assuming RepoManager handles initialization in its constructor or a dedicated method called externally/previously
             # self.repo_manager.initialize_git_repos() # If needed here
 
-            # Add Sync step if synchronizer is available
-            # if self.synchronizer:
-            #     self.logger.info("--- Step 1.5: Synchronizing Repositories ---")
-            #     sync_success = self.synchronizer.synchronize_repositories()
-            #     if not sync_success:
-            #          self.logger.critical("Repository synchronization failed. Cannot proceed.")
-            #          return 1
-            #     self.logger.info("Repository synchronization completed.")
-            # else:
-            #     self.logger.info("--- Step 1.5: Synchronizing Repositories (Skipped - No Synchronizer) ---")
 
 
             self.logger.info("--- Step 2: Fetching Central Version Tags ---")
@@ -240,6 +239,18 @@ class ProjectWorkflow:
                 return 1
             self.logger.info(f"Global Version IDs: Newest='{newest_id}', Next='{next_newest_id}'")
 
+            # Runs once the release range is known: shallow strategies fetch back to next_newest's date
+            if self.synchronizer:
+                self.logger.info("--- Step 2.2: Synchronizing Repositories ---")
+                sync_results = self.synchronizer.sync_repos(history_anchor=next_newest_id)
+                failed_syncs = [result for result in sync_results if not result.success and result.strategy_name]
+                if failed_syncs:
+                    self.logger.critical(f"Repository synchronization failed for {len(failed_syncs)} repositories. Cannot proceed.")
+                    return 1
+                self.logger.info("Repository synchronization completed.")
+            else:
+                self.logger.info("--- Step 2.2: Synchronizing Repositories (Skipped - No Synchronizer) ---")
+
             version_info: Dict[str, str] = {
                 "newest_id": newest_id,
                 "next_newest_id": next_newest_id,
@@ -262,12 +273,24 @@ class ProjectWorkflow:
             self.logger.info("--- Step 2.7: Manual Merge Point (Placeholder) ---")
             # Add logic here if needed, e.g., wait for user input or check external state
 
+            unchanged_repo_paths: Set[str] = set()
+            if self.pinned_manifests and self.config.pinned_manifest_config.enabled:
+                self.logger.info("--- Step 2.8: Diffing Pinned Manifests ---")
+                manifest_diffs = self.pinned_manifests.diff_releases(self.config, newest_id, next_newest_id)
+                unchanged_repo_paths = self.pinned_manifests.unchanged_repo_paths(self.config, manifest_diffs)
+                self.logger.info(f"Pinned manifests mark {len(unchanged_repo_paths)} projects as unchanged; skipping git analysis for them.")
+
             self.logger.info("--- Step 3: Analyzing Commits ---")
             self.analyzer.analyze_all_repositories(
-                self.config, newest_id, next_newest_id
+                self.config, newest_id, next_newest_id, unchanged_repo_paths=unchanged_repo_paths
             )
             self.logger.info("Commit analysis completed.")
 
+            if self.commit_deduplicator and self.config.commit_dedup_config.enabled:
+                self.logger.info("--- Step 3.5: Deduplicating Commits Across Repositories ---")
+                duplicate_groups = self.commit_deduplicator.deduplicate(self.config, newest_id, next_newest_id)
+                self.logger.info(f"Found {len(duplicate_groups)} changes present in more than one repository.")
+
             self.logger.info("--- Step 4: Identifying Special Source Repositories ---")
             special_source_repo_infos = self._identify_special_source_repos()
 
@@ -277,7 +300,8 @@ class ProjectWorkflow:
                 all_repos_config=self.config,
                 version_info=version_info,
                 patch_config=patch_config,
-                special_source_repo_infos=special_source_repo_infos
+                special_source_repo_infos=special_source_repo_infos,
+                unchanged_repo_paths=unchanged_repo_paths
             )
             self.logger.info(f"Patch generation finished. Found {len(special_commit_patch_map)} special patches. Created map for {len(patch_details_map)} total patches.")
 
@@ -288,6 +312,9 @@ class ProjectWorkflow:
                  special_commit_patch_map=special_commit_patch_map
             )
             # Note: Removed separate call to link_nebula_patches as it's integrated into _coordinate_nebula_mapping
+            if self.commit_deduplicator and self.config.commit_dedup_config.enabled:
+                # Special commits just left their source repos; their duplicates must not stay hidden behind them
+                self.commit_deduplicator.promote_orphaned_duplicates(self.config)
 
             self.logger.info("--- Step 7.5: Generating Excel Report ---")
             excel_success = False
@@ -318,7 +345,7 @@ class ProjectWorkflow:
                 project_name=package_config.project_name,
                 latest_tag=version_info['latest_tag']
             )
-            output_dir = "."
+            output_dir = package_config.output_dir
             output_zip_path = os.path.abspath(os.path.join(output_dir, zip_filename))
 
             package_success = self.packager.package_release(
@@ -329,7 +356,9 @@ class ProjectWorkflow:
                 output_zip_path=output_zip_path,
                 patch_details_map=patch_details_map,
                 excel_config=excel_config,
-                generated_excel_path=generated_excel_file_path
+                generated_excel_path=generated_excel_file_path,
+                externalized_blobs=self.patch_generator.externalized_blobs,
+                blob_store_dir=patch_config.blob_store_dir
             )
 
             if package_success:
@@ -351,6 +380,10 @@ class ProjectWorkflow:
                 self.logger.error("Packaging failed. Skipping deployment.")
                 return 1
 
+            if self.snapshot_manager:
+                self.logger.info("--- Step 10: Recording Release Snapshot ---")
+                self.snapshot_manager.record_release(self.config, newest_id)
+
             self.logger.info("--- Final Commit Details (Post-Processing) ---")
             # Logging moved inside components or potentially reduced for brevity here
             # Add selective logging if still needed
@@ -14,6 +14,9 @@ from core.deployer import Deployer
 from utils.excel_utils import ExcelReporter
 from core.builder import BuildSystem
 from core.workflow import ProjectWorkflow # Import the new workflow class
+from core.pinned_manifest import PinnedManifestManager
+from core.snapshot_manager import SnapshotManager
+from core.commit_deduplicator import CommitDeduplicator
 # Import RepoSynchronizer if it exists
 try:
     from core.sync.repo_synchronizer import RepoSynchronizer
@@ -44,11 +47,14 @@ def main() -> int:
         release_packager = ReleasePackager(logger=logger)
         deployer = Deployer(command_executor, logger)
         excel_reporter = ExcelReporter(logger, git_operator, all_repos_config.excel_config) # Pass config directly
+        pinned_manifests = PinnedManifestManager(command_executor, all_repos_config.pinned_manifest_config)
+        snapshot_manager = SnapshotManager(git_operator, all_repos_config.snapshot_config)
+        commit_deduplicator = CommitDeduplicator(git_operator, all_repos_config.commit_dedup_config)
 
         # Initialize Builder and Synchronizer if available
         build_config_instance = BuildConfig() # Instantiate BuildConfig
         builder = BuildSystem(build_config_instance, command_executor, all_repos_config) # Pass all_repos_config
-        # synchronizer = RepoSynchronizer(...) # Initialize if RepoSynchronizer exists and is needed
+        # synchronizer = RepoSynchronizer(all_repos_config, sync_strategies_config, command_executor) # Syncs before analysis, shallow strategies back to next_newest
 
         # --- Workflow Instantiation ---
         workflow = ProjectWorkflow(
@@ -64,7 +70,10 @@ def main() -> int:
             excel_reporter=excel_reporter,
             packager=release_packager,
             deployer=deployer,
-            logger=logger
+            logger=logger,
+            pinned_manifests=pinned_manifests,
+            snapshot_manager=snapshot_manager,
+            commit_deduplicator=commit_deduplicator
         )
 
         # --- Workflow Execution ---
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import tarfile
+
+import pytest
+from config.schemas import AllReposConfig, BuildCacheConfig
+from core.build_cache import MANIFEST_NAME, BuildCache, EnvCaptureCache
+from utils.command_executor import CommandExecutor
+from utils.git_utils import GitOperator
+
+
+def make_cache(tmp_path, **overrides) -> BuildCache:
+    config = BuildCacheConfig(root=str(tmp_path / "cache"), **overrides)
+    return BuildCache(config, GitOperator(CommandExecutor()), AllReposConfig())
+
+
+def populate(base):
+    (base / "images").mkdir(parents=True)
+    (base / "images" / "kernel.img").write_bytes(b"kernel")
+    (base / "kernel").mkdir()
+    (base / "kernel" / "nebula_a.bin").write_bytes(b"bin")
+    roots = {"images": base / "images", "kernel": base / "kernel"}
+    return roots, [base / "images", base / "kernel" / "nebula_a.bin"]
+
+
+def test_restore_places_artifacts_under_the_local_roots(tmp_path):
+    cache = make_cache(tmp_path)
+    roots, artifacts = populate(tmp_path / "built-here")
+    assert cache.store("TEE", "key", artifacts, roots)
+    manifest = json.loads((tmp_path / "cache" / "TEE" / "key" / MANIFEST_NAME).read_text())
+    assert [artifact["name"] for artifact in manifest["artifacts"]] == ["images", "kernel/nebula_a.bin"]
+
+    elsewhere = tmp_path / "restored-here"
+    local_roots = {"images": elsewhere / "images", "kernel": elsewhere / "kernel"}
+    assert cache.restore("TEE", "key", local_roots)
+    assert (elsewhere / "images" / "kernel.img").read_bytes() == b"kernel"
+    assert (elsewhere / "kernel" / "nebula_a.bin").read_bytes() == b"bin"
+
+
+@pytest.mark.parametrize("name", ["kernel/../../escaped.bin", "/tmp/escaped.bin", "elsewhere/escaped.bin", "kernel//abs/escaped.bin"])
+def test_restore_rejects_names_outside_the_local_roots(tmp_path, name):
+    cache = make_cache(tmp_path)
+    roots, artifacts = populate(tmp_path / "built-here")
+    assert cache.store("TEE", "key", artifacts, roots)
+    manifest_path = tmp_path / "cache" / "TEE" / "key" / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest["artifacts"][1]["name"] = name
+    manifest_path.write_text(json.dumps(manifest))
+
+    target = tmp_path / "restored-here"
+    assert not cache.restore("TEE", "key", {"images": target / "images", "kernel": target / "kernel"})
+    assert not target.exists() # Nothing is restored once any entry is rejected
+    assert not list(tmp_path.rglob("escaped.bin"))
+
+
+def test_pull_rejects_archives_with_entries_outside_their_artifact(tmp_path):
+    remote = tmp_path / "remote"
+    publisher = make_cache(tmp_path / "publisher", remote_url=str(remote))
+    roots, artifacts = populate(tmp_path / "built-here")
+    assert publisher.store("TEE", "key", artifacts, roots)
+
+    archive = remote / "TEE" / "key" / "1.tar"
+    stray = tmp_path / "stray.bin"
+    stray.write_bytes(b"stray")
+    with tarfile.open(archive, "a") as tar:
+        tar.add(stray, arcname="0/stray.bin")
+    manifest_path = remote / "TEE" / "key" / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest["artifacts"][1]["sha256"] = hashlib.sha256(archive.read_bytes()).hexdigest()
+    manifest_path.write_text(json.dumps(manifest))
+
+    consumer = make_cache(tmp_path / "consumer", remote_url=str(remote))
+    target = tmp_path / "restored-here"
+    assert not consumer.restore("TEE", "key", {"images": target / "images", "kernel": target / "kernel"})
+    assert not target.exists()
+
+
+def test_env_capture_replays_variables_the_script_unset(tmp_path):
+    cache = EnvCaptureCache(str(tmp_path / "env"))
+    script = tmp_path / "env.sh"
+    script.write_text("unset CROSS_COMPILE\nexport ARCH=arm64\n")
+    base_env = {"PATH": "/usr/bin", "CROSS_COMPILE": "aarch64-linux-gnu-"}
+    key = EnvCaptureCache.key(script, [], tmp_path, "base")
+    cache.store(key, {"PATH": "/usr/bin", "ARCH": "arm64"}, base_env, script)
+
+    assert cache.load(key, {**base_env, "SSH_AUTH_SOCK": "/tmp/agent"}) == {"PATH": "/usr/bin", "ARCH": "arm64", "SSH_AUTH_SOCK": "/tmp/agent"}
+
+
+def test_env_capture_expires(tmp_path):
+    cache = EnvCaptureCache(str(tmp_path / "env"), max_age=3600)
+    script = tmp_path / "env.sh"
+    script.write_text("export ARCH=arm64\n")
+    key = EnvCaptureCache.key(script, [], tmp_path, "base")
+    cache.store(key, {"ARCH": "arm64"}, {}, script)
+    assert cache.load(key, {}) == {"ARCH": "arm64"}
+
+    entry = tmp_path / "env" / f"{key}.json"
+    stale = entry.stat().st_mtime - 7200
+    os.utime(entry, (stale, stale))
+    assert cache.load(key, {}) is None
@@ -0,0 +1,263 @@
+import subprocess
+import threading
+import time
+
+import pytest
+from config.schemas import AllReposConfig, BuildConfig, BuildTypeConfig, GitRepoInfo, RepoConfig
+from core.build_stages import BuildStage, StageRunner
+from core.builder import BuildSystem
+from utils.command_executor import CommandExecutor
+
+
+def make_builder(tmp_path, all_repos_config: AllReposConfig = None) -> BuildSystem:
+    config = BuildConfig()
+    config.paths.grpower_workspace = str(tmp_path / "workspace")
+    config.paths.nebula_out = str(tmp_path / "workspace" / "nebula" / "out")
+    config.paths.build_temp_root = str(tmp_path / "build-tmp")
+    config.checkpoint_dir = str(tmp_path / "checkpoints")
+    config.env_capture_cache_dir = None
+    config.cache.enabled = False
+    config.fast_clean = False
+    return BuildSystem(config, CommandExecutor(), all_repos_config or AllReposConfig())
+
+
+def checkpoint(runner: StageRunner, build_type: str) -> None:
+    runner.run(build_type, [BuildStage("first", lambda context: None), BuildStage("second", lambda context: None)], "inputs", resume=False)
+
+
+def test_cleaning_one_build_type_keeps_other_checkpoints(tmp_path):
+    builder = make_builder(tmp_path)
+    for build_type in ("nebula-sdk", "nebula", "TEE"):
+        checkpoint(builder.stage_runner, build_type)
+
+    builder.clean_environment("TEE")
+
+    checkpoints = tmp_path / "checkpoints"
+    assert not (checkpoints / "TEE").exists()
+    assert sorted(p.name for p in (checkpoints / "nebula").iterdir()) == ["first.json", "second.json"]
+    assert sorted(p.name for p in (checkpoints / "nebula-sdk").iterdir()) == ["first.json", "second.json"]
+
+    builder.clean_environment()
+    assert not checkpoints.exists()
+
+
+def test_resume_skips_completed_stages(tmp_path):
+    runner = StageRunner(str(tmp_path / "checkpoints"))
+    ran = []
+
+    def failing(context):
+        ran.append("second")
+        raise RuntimeError("boom")
+
+    stages = [BuildStage("first", lambda context: ran.append("first") or {"value": 1}), BuildStage("second", failing)]
+    try:
+        runner.run("nebula", stages, "inputs", resume=False)
+    except RuntimeError:
+        pass
+    assert ran == ["first", "second"]
+
+    ran.clear()
+    stages[1] = BuildStage("second", lambda context: ran.append(("second", context["value"])))
+    runner.run("nebula", stages, "inputs", resume=True)
+    assert ran == [("second", 1)]
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_resume_retries_a_failed_push(tmp_path, monkeypatch):
+    for variable in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(variable, "builder")
+    for variable in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(variable, "builder@example.com")
+    remote, tee = tmp_path / "remote.git", tmp_path / "tee"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    git(tmp_path, "init", "-q", str(tee))
+    (tee / "kernel.img").write_bytes(b"old")
+    git(tee, "add", ".")
+    git(tee, "commit", "-q", "-m", "base")
+    git(tee, "remote", "add", "origin", str(remote))
+    git(tee, "push", "-q", "origin", "HEAD:refs/heads/main")
+    git(tee, "fetch", "-q", "origin")
+
+    repo_info = GitRepoInfo(repo_name="tee", repo_parent="tee", path=str(tee), repo_path=str(tee), repo_type="git", remote_name="origin", remote_branch="main")
+    builder = make_builder(tmp_path, AllReposConfig(repo_configs={"tee": RepoConfig(repo_name="tee", repo_type="git", path=str(tee), git_repos=[repo_info])}))
+    builder.config.build_types["TEE"].post_build_git = True
+    builder.tee_kernel_path = tee
+    builder._thread_state.inputs_key = "inputs"
+
+    push_to_remote = builder.git_operator.push_to_remote
+    pushes = []
+
+    def flaky_push(*args, **kwargs):
+        pushes.append(kwargs)
+        return len(pushes) > 1 and push_to_remote(*args, **kwargs)
+
+    monkeypatch.setattr(builder.git_operator, "push_to_remote", flaky_push)
+    (tee / "kernel.img").write_bytes(b"new")
+
+    builder._resume = False
+    with pytest.raises(RuntimeError):
+        builder._run_stages("TEE", [])
+    head = git(tee, "rev-parse", "HEAD")
+    assert git(tee, "log", "-1", "--format=%s") == builder.config.git.commit_message_tee
+    assert len(pushes) == 1
+
+    # The outputs now match HEAD, but the commit never reached the remote
+    builder._resume = True
+    builder._run_stages("TEE", [])
+    assert len(pushes) == 2
+    assert git(remote, "rev-parse", "refs/for/main") == head
+
+    # Neither a resumed nor a fresh run uploads the same commit again
+    builder._run_stages("TEE", [])
+    builder._resume = False
+    builder._run_stages("TEE", [])
+    assert len(pushes) == 2
+
+
+def test_nebula_reuses_the_grpower_prefix_run_by_nebula_sdk(tmp_path, monkeypatch):
+    builder = make_builder(tmp_path)
+    builder.config.build_types["nebula-sdk"].post_build_git = False
+    builder.grpower_path = tmp_path / "grpower"
+    builder.grpower_path.mkdir()
+    sessions = iter(range(10))
+    # env.sh is sourced again for every build type: same toolchain, fresh per-session values
+    monkeypatch.setattr(builder, "_get_environment_after_sourcing", lambda script_path, cwd: {"PATH": "/opt/grpower/bin:/usr/bin", "GRPOWER_SESSION": str(next(sessions))})
+    monkeypatch.setattr(builder.file_operator, "copy_file", lambda source, destination: True)
+    execute = builder.command_executor.execute
+    executed = []
+
+    def record(command_type, params, check=True):
+        if command_type == "git_command":
+            return execute(command_type, params, check)
+        assert params["env"]["PATH"] == "/opt/grpower/bin:/usr/bin"
+        executed.append(" ".join([params["command"], *params.get("args", [])[:2]]))
+
+    monkeypatch.setattr(builder.command_executor, "execute", record)
+    assert builder.build_nebula_sdk()
+    assert executed[:2] == ["gr-nebula.py build", "gr-nebula.py export-buildroot"]
+
+    executed.clear()
+    builder._nebula_grpower_stage({})
+    assert executed == ["gr-android.py set-product --product-name", "gr-android.py buildroot export_nebula_images"]
+
+
+def test_build_commands_leave_the_caller_specs_untouched(tmp_path, monkeypatch):
+    builder = make_builder(tmp_path)
+    builder._thread_state.temp_dir = tmp_path / "scratch"
+    monkeypatch.setattr(builder.command_executor, "execute", lambda command_type, params, check=True: None)
+    commands = [{"type": "shell_command", "command": "true", "memoize": True}]
+    builder._execute_build_commands(commands)
+    assert commands == [{"type": "shell_command", "command": "true", "memoize": True}]
+
+
+def scheduled_builder(tmp_path, build_types, outcomes=None):
+    builder = make_builder(tmp_path)
+    builder.config.enable_environment_cleanup = False
+    builder.config.max_concurrent_builds = 4
+    builder.config.build_types = {build_type.name: build_type for build_type in build_types}
+    events, lock = [], threading.Lock()
+
+    def run_build_type(build_type):
+        with lock:
+            events.append(("start", build_type))
+        time.sleep(0.05)
+        with lock:
+            events.append(("end", build_type))
+        return (outcomes or {}).get(build_type, True)
+
+    builder._run_build_type = run_build_type
+    return builder, events
+
+
+def overlapping(events, first, second) -> bool:
+    running, overlaps = set(), False
+    for event, build_type in events:
+        if event == "start":
+            running.add(build_type)
+            overlaps |= {first, second} <= running
+        else:
+            running.discard(build_type)
+    return overlaps
+
+
+def test_scheduler_honours_dependencies_and_exclusive_resources(tmp_path):
+    builder, events = scheduled_builder(tmp_path, [
+        BuildTypeConfig(name="nebula-sdk", enabled=True, resources=["grpower"]),
+        BuildTypeConfig(name="nebula", enabled=True, depends_on=["nebula-sdk"]),
+        BuildTypeConfig(name="TEE", enabled=True, resources=["grpower"]),
+        BuildTypeConfig(name="docs", enabled=True),
+    ])
+    assert builder.build()
+
+    assert events.index(("start", "nebula")) > events.index(("end", "nebula-sdk"))
+    assert not overlapping(events, "nebula-sdk", "TEE")
+    assert overlapping(events, "nebula-sdk", "docs")
+
+
+def test_scheduler_fails_dependents_of_a_failed_type_without_starting_them(tmp_path):
+    builder, events = scheduled_builder(tmp_path, [
+        BuildTypeConfig(name="nebula-sdk", enabled=True),
+        BuildTypeConfig(name="nebula", enabled=True, depends_on=["nebula-sdk"]),
+        BuildTypeConfig(name="TEE", enabled=True),
+    ], outcomes={"nebula-sdk": False})
+    assert not builder.build()
+    assert sorted(build_type for event, build_type in events if event == "start") == ["TEE", "nebula-sdk"]
+
+
+def test_scheduler_rejects_dependency_cycles_before_building(tmp_path):
+    builder, events = scheduled_builder(tmp_path, [
+        BuildTypeConfig(name="nebula", enabled=True, depends_on=["TEE"]),
+        BuildTypeConfig(name="TEE", enabled=True, depends_on=["nebula"]),
+        BuildTypeConfig(name="nebula-sdk", enabled=True),
+    ])
+    assert not builder.build()
+    assert events == []
+
+
+def test_nebula_publication_runs_repos_concurrently_and_reports_each(tmp_path, monkeypatch):
+    for variable in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(variable, "builder")
+    for variable in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(variable, "builder@example.com")
+    repo_infos = []
+    for name in ("grt", "yocto", "orphan"):
+        repo = tmp_path / name
+        git(tmp_path, "init", "-q", str(repo))
+        (repo / "base.txt").write_text("base")
+        git(repo, "add", ".")
+        git(repo, "commit", "-q", "-m", "base")
+        remote = tmp_path / f"{name}.git"
+        if name != "yocto": # yocto's remote is gone, so its push fails
+            git(tmp_path, "init", "-q", "--bare", str(remote))
+        git(repo, "remote", "add", "origin", str(remote))
+        (repo / "out.img").write_bytes(name.encode())
+        if name != "orphan": # orphan has no GitRepoInfo
+            repo_infos.append(GitRepoInfo(repo_name=name, repo_parent="nebula", path=str(repo), repo_path=str(repo), repo_type="git", remote_name="origin", remote_branch="main"))
+    builder = make_builder(tmp_path, AllReposConfig(repo_configs={"nebula": RepoConfig(repo_name="nebula", repo_type="git", path=str(tmp_path), git_repos=repo_infos)}))
+    builder.config.build_types["nebula"].post_build_git = True
+    monkeypatch.setattr(builder, "_nebula_git_targets", lambda: [(str(tmp_path / name), ["out.img"], name) for name in ("grt", "yocto", "orphan")])
+
+    push_to_remote = builder.git_operator.push_to_remote
+    both_pushing = threading.Barrier(2, timeout=10) # Only passes if the two pushes overlap
+
+    def concurrent_push(*args, **kwargs):
+        both_pushing.wait()
+        return push_to_remote(*args, **kwargs)
+
+    monkeypatch.setattr(builder.git_operator, "push_to_remote", concurrent_push)
+    results = []
+    publish = builder._publish_to_repos
+    monkeypatch.setattr(builder, "_publish_to_repos", lambda jobs: results.extend(publish(jobs)) or results)
+
+    assert not builder._handle_nebula_git_operations("nebula")
+    outcomes = {result.repo_context_name: (result.committed, result.pushed, result.error) for result in results}
+    assert outcomes == {
+        "grt": (True, True, None),
+        "yocto": (True, False, "push failed"),
+        "orphan": (False, False, "no matching GitRepoInfo"),
+    }
+    assert git(tmp_path / "grt.git", "rev-parse", "refs/for/main") == git(tmp_path / "grt", "rev-parse", "HEAD")
+    assert git(tmp_path / "orphan", "status", "--porcelain") == "?? out.img"
@@ -0,0 +1,56 @@
+import subprocess
+import time
+
+import pytest
+from utils.command_executor import CommandExecutor
+
+
+def test_stream_yields_records_while_the_command_runs_and_close_kills_it():
+    records = CommandExecutor().stream_subprocess(["sh", "-c", "printf 'one\\ntwo\\nthr'; sleep 30; printf 'ee\\n'"])
+    start = time.monotonic()
+    assert [next(records), next(records)] == ["one", "two"]
+    records.close()
+    assert time.monotonic() - start < 10 # Neither waited for the sleep nor for the command to finish
+
+
+def test_stream_joins_records_split_across_reads():
+    command = ["sh", "-c", "printf 'alpha'; sleep 0.1; printf 'beta\\0gam'; sleep 0.1; printf 'ma\\0tail'"]
+    assert list(CommandExecutor().stream_subprocess(command, separator="\0", chunk_size=3)) == ["alphabeta", "gamma", "tail"]
+
+
+def test_bytes_mode_leaves_output_undecoded():
+    executor = CommandExecutor()
+    payload = "printf 'caf\\351\\0r\\303\\251sum\\351\\0'"
+    assert list(executor.stream_subprocess(["sh", "-c", payload], separator=b"\0")) == [b"caf\xe9", b"r\xc3\xa9sum\xe9"]
+    assert list(executor.stream_subprocess(["sh", "-c", payload], separator="\0")) == ["caf\ufffd", "résum\ufffd"]
+
+
+def test_binary_git_command_returns_raw_bytes(tmp_path):
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    (tmp_path / "blob.bin").write_bytes(b"\xff\xfe\x00raw")
+    blob_id = subprocess.run(["git", "hash-object", "-w", "blob.bin"], cwd=tmp_path, check=True, capture_output=True, text=True).stdout.strip()
+    result = CommandExecutor().execute("git_command", {"command": "cat-file", "args": ["blob", blob_id], "cwd": str(tmp_path), "binary": True})
+    assert result.stdout == b"\xff\xfe\x00raw"
+
+
+def test_pipeline_tolerates_sigpipe_from_stages_cut_off_downstream():
+    assert list(CommandExecutor().stream_pipeline([["yes"], ["head", "-n", "3"]])) == ["y", "y", "y"]
+
+
+def test_pipeline_raises_for_the_failing_stage_with_its_stderr():
+    stages = [["sh", "-c", "echo partial; echo broken >&2; exit 3"], ["cat"]]
+    with pytest.raises(subprocess.CalledProcessError) as failure:
+        list(CommandExecutor().stream_pipeline(stages))
+    assert failure.value.returncode == 3
+    assert failure.value.cmd == stages[0]
+    assert failure.value.stderr.strip() == "broken"
+    assert list(CommandExecutor().stream_pipeline(stages, check=False)) == ["partial"]
+
+
+def test_pipeline_stages_take_their_own_cwd_and_env_and_close_kills_them_all(tmp_path):
+    stages = [{"command": ["sh", "-c", "pwd; echo $STAGE; sleep 30"], "cwd": str(tmp_path), "env": {"STAGE": "first"}}, ["cat"]]
+    records = CommandExecutor().stream_pipeline(stages)
+    start = time.monotonic()
+    assert [next(records), next(records)] == [str(tmp_path), "first"]
+    records.close()
+    assert time.monotonic() - start < 10
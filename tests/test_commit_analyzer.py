@@ -0,0 +1,42 @@
+import os
+import subprocess
+
+import pytest
+from config.schemas import AllReposConfig, GitRepoInfo, RepoConfig
+from core.commit_analyzer import CommitAnalyzer
+from utils.command_executor import CommandExecutor
+from utils.custom_logger import Logger
+from utils.git_utils import GitOperator
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def shallow_release_clone(tmp_path):
+    upstream = tmp_path / "upstream"
+    git(tmp_path, "init", "-q", "-b", "main", str(upstream))
+    for month in range(1, 6):
+        (upstream / "file.txt").write_text(f"c{month}")
+        git(upstream, "add", ".")
+        date = f"2024-0{month}-10T12:00:00"
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "-m", f"c{month}"],
+                       cwd=upstream, check=True, env={**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date})
+        git(upstream, "tag", f"release_2024_0{month}10_01")
+    clone = tmp_path / "clone"
+    git(tmp_path, "clone", "-q", "--depth", "1", "--branch", "main", f"file://{upstream}", str(clone))
+    repo = GitRepoInfo(repo_name="clone", repo_parent="grt", path=str(clone), repo_path=str(clone), repo_type="git",
+                       tag_prefix="release_", remote_name="origin", analyze_commit=True)
+    return clone, repo, AllReposConfig(repo_configs={"grt": RepoConfig(repo_name="grt", repo_type="git", path=str(clone), git_repos=[repo])})
+
+
+@pytest.mark.parametrize("max_deepen_rounds, stays_shallow", [(5, True), (0, False)])
+def test_shallow_clone_is_deepened_until_the_release_range_is_complete(tmp_path, max_deepen_rounds, stays_shallow):
+    clone, repo, config = shallow_release_clone(tmp_path)
+    analyzer = CommitAnalyzer(GitOperator(CommandExecutor()), Logger(name="CommitAnalyzerTest"), deepen_step=1, max_deepen_rounds=max_deepen_rounds)
+
+    analyzer.analyze_all_repositories(config, "2024_0510_01", "2024_0310_01")
+
+    assert [detail.message for detail in repo.commit_details] == ["c5", "c4"]
+    # Step-wise deepening stops at the range; without rounds left the analyzer unshallows instead
+    assert (git(clone, "rev-parse", "--is-shallow-repository") == "true") is stays_shallow
@@ -0,0 +1,33 @@
+from config.schemas import AllReposConfig, CommitDedupConfig, CommitDetail, GitRepoInfo, RepoConfig
+from core.commit_deduplicator import CommitDeduplicator
+from utils.command_executor import CommandExecutor
+from utils.git_utils import GitOperator
+
+
+def repo_config(name: str, commits) -> RepoConfig:
+    repo = GitRepoInfo(repo_name=name, repo_parent="", path=f"/src/{name}", repo_path=f"/src/{name}", repo_type="git")
+    repo.commit_details = list(commits)
+    return RepoConfig(repo_name=name, repo_type="git", path=f"/src/{name}", git_repos=[repo])
+
+
+def test_duplicates_of_a_removed_special_commit_become_canonical():
+    special = CommitDetail(id="a" * 40, author="dev", subject="[nebula] bump", patch_path="grt/0001-bump.patch")
+    in_grt_be = CommitDetail(id="b" * 40, author="dev", subject="[nebula] bump", patch_path=special.patch_path, duplicate_of=special)
+    in_alps = CommitDetail(id="c" * 40, author="dev", subject="[nebula] bump", patch_path=special.patch_path, duplicate_of=special)
+    kept = CommitDetail(id="d" * 40, author="dev", subject="fix")
+    kept_duplicate = CommitDetail(id="e" * 40, author="dev", subject="fix", duplicate_of=kept)
+    # grt's special commit was already moved into the nebula patches and removed from commit_details
+    config = AllReposConfig(repo_configs={
+        "grt": repo_config("grt", [kept]),
+        "grt_be": repo_config("grt_be", [in_grt_be, kept_duplicate]),
+        "alps": repo_config("alps", [in_alps]),
+    })
+
+    promoted = CommitDeduplicator(GitOperator(CommandExecutor()), CommitDedupConfig()).promote_orphaned_duplicates(config)
+
+    assert promoted == 1
+    assert in_grt_be.duplicate_of is None
+    assert in_grt_be.duplicate_refs == ["alps@ccccccc"]
+    assert in_grt_be.patch_path == "grt/0001-bump.patch"
+    assert in_alps.duplicate_of is in_grt_be
+    assert kept_duplicate.duplicate_of is kept
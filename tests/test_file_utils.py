@@ -0,0 +1,121 @@
+import errno
+import os
+import shutil
+import threading
+
+from utils import file_utils
+from utils.file_utils import BackgroundTrash, FileOperator
+
+
+def make_sources(tmp_path, count=3):
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    pairs = []
+    for index in range(count):
+        source = source_dir / f"image{index}.bin"
+        source.write_bytes(bytes([index]) * (1000 + index))
+        pairs.append((str(source), str(tmp_path / "dst" / "nested" / source.name)))
+    return pairs
+
+
+def test_bulk_copy_skips_destinations_that_already_match(tmp_path):
+    pairs = make_sources(tmp_path)
+    operator = FileOperator()
+    first = operator.bulk_copy(pairs)
+    assert (first.copied_files, first.skipped_files) == (3, 0)
+    for source, destination in pairs:
+        assert open(destination, "rb").read() == open(source, "rb").read()
+        assert os.stat(destination).st_mtime_ns == os.stat(source).st_mtime_ns
+
+    second = operator.bulk_copy(pairs)
+    assert (second.copied_files, second.skipped_files, second.skipped_bytes) == (0, 3, 3003)
+
+
+def test_bulk_copy_hashes_destinations_whose_size_and_mtime_match(tmp_path):
+    pairs = make_sources(tmp_path, count=1)
+    source, destination = pairs[0]
+    operator = FileOperator()
+    operator.bulk_copy(pairs)
+    with open(destination, "r+b") as handle:
+        handle.write(b"\xff") # Same size, and the mtime is put back below
+    source_stat = os.stat(source)
+    os.utime(destination, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+
+    assert operator.bulk_copy(pairs, verify_hash=False).skipped_files == 1
+    assert operator.bulk_copy(pairs).copied_files == 1
+    assert open(destination, "rb").read() == open(source, "rb").read()
+
+
+def test_bulk_copy_hard_links_only_when_allowed(tmp_path):
+    pairs = make_sources(tmp_path)
+    result = FileOperator().bulk_copy(pairs, allow_hardlink=True)
+    assert result.methods == {"hardlink": 3}
+    assert all(os.path.samefile(source, destination) for source, destination in pairs)
+
+
+def test_bulk_copy_falls_back_to_a_plain_copy_and_reports_failures(tmp_path, monkeypatch):
+    def unsupported(*args):
+        raise OSError(errno.EOPNOTSUPP, "not supported")
+
+    def cross_device(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(file_utils.fcntl, "ioctl", unsupported) # No reflink
+    monkeypatch.setattr(file_utils.os, "copy_file_range", cross_device)
+    pairs = make_sources(tmp_path) + [(str(tmp_path / "src" / "missing.bin"), str(tmp_path / "dst" / "missing.bin"))]
+
+    result = FileOperator().bulk_copy(pairs)
+    assert result.methods == {"copy": 3}
+    assert list(result.failed) == [pairs[-1][0]]
+    assert not result.succeeded
+    assert all(open(destination, "rb").read() == open(source, "rb").read() for source, destination in pairs[:3])
+    assert sorted(os.listdir(tmp_path / "dst" / "nested")) == ["image0.bin", "image1.bin", "image2.bin"] # No temporary files left
+
+
+def make_tree(path, files=3):
+    path.mkdir(parents=True)
+    for index in range(files):
+        (path / f"f{index}").write_bytes(b"x" * 10)
+    return path
+
+
+def test_trash_frees_the_path_at_once_and_sweeps_leftovers(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, "SHARED_TRASH_DIR", str(tmp_path / "shared-trash"))
+    leftover = make_tree(tmp_path / "shared-trash" / "out.123.0") # From an interrupted run
+    trash = BackgroundTrash()
+
+    out = make_tree(tmp_path / "out")
+    assert trash.discard(str(out))
+    assert not out.exists()
+    out.mkdir() # The path can be rebuilt while the old tree is still being deleted
+
+    assert trash.wait(timeout=30)
+    assert os.listdir(tmp_path / "shared-trash") == []
+    assert not leftover.exists()
+    assert (trash.stats["trashed"], trash.stats["deleted"], trash.stats["deleted_files"]) == (1, 2, 6)
+
+
+def test_trash_blocks_discards_beyond_max_pending(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, "SHARED_TRASH_DIR", str(tmp_path / "shared-trash"))
+    trash = BackgroundTrash(max_pending=1)
+    trash._low_priority_prefix = [] # Delete in-process so the deletion can be held back
+    release = threading.Event()
+    rmtree = shutil.rmtree
+
+    def held_rmtree(path, *args, **kwargs):
+        release.wait(30)
+        rmtree(path, *args, **kwargs)
+
+    monkeypatch.setattr(file_utils.shutil, "rmtree", held_rmtree)
+    first, second = make_tree(tmp_path / "first"), make_tree(tmp_path / "second")
+    assert trash.discard(str(first))
+    blocked = threading.Thread(target=trash.discard, args=(str(second),))
+    blocked.start()
+    blocked.join(0.3)
+    assert blocked.is_alive() and second.exists()
+
+    release.set()
+    blocked.join(30)
+    assert not second.exists()
+    assert trash.wait(timeout=30)
+    assert trash.stats["deleted"] == 2
@@ -0,0 +1,75 @@
+import subprocess
+
+from loguru import logger
+from utils.command_executor import CommandExecutor
+from utils.git_utils import GitOperator
+
+
+def init_repo(path) -> None:
+    path.mkdir()
+    for args in (["init", "-q"], ["config", "user.name", "t"], ["config", "user.email", "t@example.com"]):
+        subprocess.run(["git", *args], cwd=path, check=True)
+    (path / "tracked.txt").write_text("tracked\n")
+    subprocess.run(["git", "add", "tracked.txt"], cwd=path, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", "init"], cwd=path, check=True)
+
+
+def test_worktree_clean_counts_untracked_files_only_when_asked(tmp_path):
+    repo = tmp_path / "repo"
+    init_repo(repo)
+    git = GitOperator(CommandExecutor())
+    assert git.is_worktree_clean(str(repo), include_untracked=True)
+
+    (repo / "leftover.o").write_text("build output\n")
+    assert git.is_worktree_clean(str(repo))
+    assert not git.is_worktree_clean(str(repo), include_untracked=True)
+
+    (repo / "leftover.o").unlink()
+    (repo / "tracked.txt").write_text("modified\n")
+    assert not git.is_worktree_clean(str(repo))
+    assert not git.is_worktree_clean(str(repo), include_untracked=True)
+
+
+def test_expected_nonzero_exit_is_not_logged_as_error(tmp_path):
+    repo = tmp_path / "repo"
+    init_repo(repo)
+    (repo / "tracked.txt").write_text("modified\n")
+    git = GitOperator(CommandExecutor())
+    errors = []
+    sink_id = logger.add(errors.append, level="ERROR") # after the Logger instances, which reset loguru's sinks
+    try:
+        assert not git.is_worktree_clean(str(repo))
+        assert not git.is_worktree_clean(str(repo), include_untracked=True)
+    finally:
+        logger.remove(sink_id)
+    assert errors == []
+
+
+def test_commits_between_parse_multi_line_bodies_newest_first(tmp_path):
+    repo = tmp_path / "repo"
+    init_repo(repo)
+    subprocess.run(["git", "tag", "base"], cwd=repo, check=True)
+    for subject, body in (("first", "Line one.\n\nChange-Id: I0001"), ("second", "Two\nlines\n\nand a paragraph")):
+        (repo / "tracked.txt").write_text(subject)
+        subprocess.run(["git", "commit", "-q", "-am", f"{subject}\n\n{body}"], cwd=repo, check=True)
+    git = GitOperator(CommandExecutor())
+
+    commits = list(git.iter_commits_between(str(repo), "base", "HEAD"))
+    assert [commit["subject"] for commit in commits] == ["second", "first"]
+    assert commits[0]["message"] == "second\n\nTwo\nlines\n\nand a paragraph"
+    assert commits[1]["author"] == "t <t@example.com>"
+    assert set(list(git.iter_commits_between(str(repo), "base", "HEAD", include_body=False))[0]) == {"id", "author", "subject"}
+    assert list(git.iter_commits_between(str(repo), "no-such-tag", "HEAD")) == []
+
+
+def test_commit_fields_decode_multi_byte_utf8(tmp_path):
+    repo = tmp_path / "repo"
+    init_repo(repo)
+    subprocess.run(["git", "tag", "base"], cwd=repo, check=True)
+    (repo / "tracked.txt").write_text("unicode")
+    subprocess.run(["git", "-c", "user.name=Zoë Łukasz", "commit", "-q", "-am", "naïve ✓ fix\n\n日本語の本文"], cwd=repo, check=True)
+
+    commits = GitOperator(CommandExecutor()).get_commits_between(str(repo), "base", "HEAD")
+    assert [(commit["author"], commit["subject"], commit["message"]) for commit in commits] == [
+        ("Zoë Łukasz <t@example.com>", "naïve ✓ fix", "naïve ✓ fix\n\n日本語の本文")
+    ]
@@ -0,0 +1,68 @@
+from core.manifest_loader import ManifestLoader
+
+
+def write(path, text) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def paths(projects):
+    return sorted(project["path"] for project in projects)
+
+
+def test_repo_includes_resolve_from_the_manifests_checkout(tmp_path):
+    manifests = tmp_path / "alps" / ".repo" / "manifests"
+    write(manifests / "default.xml", """<manifest>
+  <project name="platform/build" path="build"/>
+  <project name="platform/dropped"/>
+  <include name="vendor/extra.xml"/>
+</manifest>""")
+    write(manifests / "vendor" / "extra.xml", """<manifest>
+  <remove-project name="platform/dropped"/>
+  <project name="vendor/grt"/>
+  <include name="common.xml"/>
+</manifest>""")
+    write(manifests / "common.xml", '<manifest><project name="kernel" path="kernel-6.1"/></manifest>')
+
+    projects = ManifestLoader().load(str(manifests / "default.xml"), "repo", str(tmp_path / "alps"))
+    assert paths(projects) == ["build", "kernel-6.1", "vendor/grt"]
+
+
+def test_jiri_imports_are_scoped_and_overridden_by_the_importer(tmp_path):
+    root = tmp_path / "nebula"
+    write(root / "manifest" / "main", """<manifest>
+  <imports>
+    <localimport file="local"/>
+    <import name="integration" manifest="flower" root="third_party"/>
+  </imports>
+  <projects><project name="zircon" path="zircon" remotebranch="release"/></projects>
+</manifest>""")
+    write(root / "manifest" / "local", '<manifest><projects><project name="zircon" path="zircon" remotebranch="main"/><project name="garnet"/></projects></manifest>')
+    write(root / "third_party" / "integration" / "flower", '<manifest><projects><project name="rust" path="rust"/></projects></manifest>')
+
+    projects = {project["path"]: project for project in ManifestLoader().load(str(root / "manifest" / "main"), "jiri", str(root))}
+    assert sorted(projects) == ["garnet", "third_party/rust", "zircon"]
+    assert projects["zircon"]["remote_branch"] == "release"
+
+
+def test_cache_is_reused_until_a_manifest_changes_or_a_missing_include_appears(tmp_path, monkeypatch):
+    manifests = tmp_path / "alps" / ".repo" / "manifests"
+    write(manifests / "default.xml", '<manifest><project name="build"/><include name="extra.xml"/><include name="later.xml"/></manifest>')
+    write(manifests / "extra.xml", '<manifest><project name="grt"/></manifest>')
+    cache_dir = str(tmp_path / "cache")
+    manifest = str(manifests / "default.xml")
+    assert paths(ManifestLoader(cache_dir).load(manifest, "repo", "")) == ["build", "grt"]
+
+    parses = []
+    original_load_repo = ManifestLoader._load_repo
+    monkeypatch.setattr(ManifestLoader, "_load_repo", lambda self, *args: parses.append(args[0]) or original_load_repo(self, *args))
+    assert paths(ManifestLoader(cache_dir).load(manifest, "repo", "")) == ["build", "grt"]
+    assert parses == []
+
+    write(manifests / "later.xml", '<manifest><project name="late"/></manifest>')
+    assert paths(ManifestLoader(cache_dir).load(manifest, "repo", "")) == ["build", "grt", "late"]
+    assert len(parses) == 1
+
+    write(manifests / "extra.xml", '<manifest><project name="grt_be"/></manifest>')
+    assert paths(ManifestLoader(cache_dir).load(manifest, "repo", "")) == ["build", "grt_be", "late"]
+    assert len(parses) == 2
@@ -0,0 +1,65 @@
+import os
+import subprocess
+
+from config.schemas import GitRepoInfo, SharedObjectStoreConfig
+from core.sync.object_store import SharedObjectStore
+from utils.command_executor import CommandExecutor
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def make_upstream(tmp_path):
+    upstream = tmp_path / "upstream.git"
+    seed = tmp_path / "seed"
+    git(tmp_path, "init", "-q", "--bare", str(upstream))
+    git(tmp_path, "init", "-q", str(seed))
+    for index in range(3):
+        (seed / f"file{index}.txt").write_text(f"content {index}\n" * 100)
+        git(seed, "add", ".")
+        git(seed, "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "-m", f"commit {index}")
+    git(seed, "push", "-q", str(upstream), "HEAD:refs/heads/main")
+    return upstream
+
+
+def member(tmp_path, upstream, name) -> GitRepoInfo:
+    clone = tmp_path / name
+    git(tmp_path, "clone", "-q", "--branch", "main", str(upstream), str(clone))
+    return GitRepoInfo(repo_name=name, repo_parent="grt", path=str(clone), repo_path=str(clone), repo_type="git",
+                       remote_name="origin", remote_branch="main", use_shared_objects=True)
+
+
+def test_members_borrow_objects_from_the_shared_store(tmp_path):
+    upstream = make_upstream(tmp_path)
+    members = [member(tmp_path, upstream, "grt"), member(tmp_path, upstream, "grt_be")]
+    config = SharedObjectStoreConfig(enabled=True, root=str(tmp_path / "stores"), groups={"grt": ["grt", "grt_be"]}, repack_on_link=True)
+    store = SharedObjectStore(config, CommandExecutor())
+
+    assert store.prepare(members) == {repo.repo_path: True for repo in members}
+
+    store_objects = os.path.join(store.store_path("grt"), "objects")
+    head = git(members[0].repo_path, "rev-parse", "HEAD")
+    assert git(store.store_path("grt"), "rev-parse", "--verify", f"{head}^{{commit}}") == head
+    for repo in members:
+        alternates = os.path.join(repo.repo_path, ".git", "objects", "info", "alternates")
+        with open(alternates, encoding="utf-8") as handle:
+            assert handle.read().splitlines() == [store_objects]
+        # repack -l dropped the member's own copies, so fsck only passes through the alternate
+        assert git(repo.repo_path, "count-objects", "-v").count("in-pack: 0") == 1
+        git(repo.repo_path, "fsck", "--full", "--no-progress")
+
+    # Preparing again neither duplicates the link nor breaks the members
+    assert store.prepare(members) == {repo.repo_path: True for repo in members}
+    with open(os.path.join(members[0].repo_path, ".git", "objects", "info", "alternates"), encoding="utf-8") as handle:
+        assert handle.read().splitlines() == [store_objects]
+
+
+def test_disabled_store_leaves_members_alone(tmp_path):
+    upstream = make_upstream(tmp_path)
+    repo = member(tmp_path, upstream, "grt")
+    store = SharedObjectStore(SharedObjectStoreConfig(enabled=False, root=str(tmp_path / "stores")), CommandExecutor())
+
+    assert store.prepare([repo]) == {}
+    assert not os.path.exists(os.path.join(repo.repo_path, ".git", "objects", "info", "alternates"))
+    assert not (tmp_path / "stores").exists()
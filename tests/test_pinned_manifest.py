@@ -0,0 +1,43 @@
+import os
+
+from config.schemas import AllReposConfig, GitRepoInfo, PinnedManifestConfig, RepoConfig
+from core.pinned_manifest import PinnedManifestManager
+from utils.command_executor import CommandExecutor
+
+
+def git_repo(name, relative_path) -> GitRepoInfo:
+    return GitRepoInfo(repo_name=name, repo_parent="alps", path="/ws/alps", repo_path=f"/ws/alps/{relative_path}", repo_type="git", relative_path_in_parent=relative_path)
+
+
+def write_snapshot(manager, repo_config, version_identifier, projects) -> None:
+    snapshot_path = manager.snapshot_path(repo_config, version_identifier)
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    lines = "".join(f'  <project name="{name}" path="{path}" revision="{revision}"/>\n' for name, path, revision in projects)
+    with open(snapshot_path, "w", encoding="utf-8") as handle:
+        handle.write(f'<manifest>\n  <remote name="origin" fetch=".."/>\n{lines}</manifest>\n')
+
+
+def test_release_diff_marks_only_identically_pinned_repos_unchanged(tmp_path):
+    repos = [git_repo("build", "build"), git_repo("grt", "vendor/grt/"), git_repo("kernel", "kernel-6.1")]
+    repo_config = RepoConfig(repo_name="alps", repo_type="repo", path="/ws/alps", git_repos=repos)
+    config = AllReposConfig(repo_configs={"alps": repo_config, "grt": RepoConfig(repo_name="grt", repo_type="git", path="/ws/grt")})
+    manager = PinnedManifestManager(CommandExecutor(), PinnedManifestConfig(enabled=True, snapshot_dir=str(tmp_path)))
+    write_snapshot(manager, repo_config, "2024_0101_01", [("build", "build", "a" * 40), ("grt", "vendor/grt", "b" * 40), ("old", "old", "c" * 40)])
+    write_snapshot(manager, repo_config, "2024_0201_01", [("build", "build", "a" * 40), ("grt", "vendor/grt", "d" * 40), ("kernel", "kernel-6.1", "e" * 40)])
+
+    diffs = manager.diff_releases(config, "2024_0201_01", "2024_0101_01")
+
+    assert list(diffs) == ["alps"]
+    assert diffs["alps"].unchanged == {"build"}
+    assert diffs["alps"].changed == {"vendor/grt": ("b" * 40, "d" * 40)}
+    assert diffs["alps"].added == {"kernel-6.1": "e" * 40}
+    assert diffs["alps"].removed == {"old": "c" * 40}
+    assert manager.unchanged_repo_paths(config, diffs) == {"/ws/alps/build"}
+
+
+def test_release_without_an_earlier_pinned_manifest_is_not_diffed(tmp_path):
+    repo_config = RepoConfig(repo_name="alps", repo_type="repo", path="/ws/alps", git_repos=[git_repo("build", "build")])
+    manager = PinnedManifestManager(CommandExecutor(), PinnedManifestConfig(enabled=True, snapshot_dir=str(tmp_path)))
+    write_snapshot(manager, repo_config, "2024_0201_01", [("build", "build", "a" * 40)])
+
+    assert manager.diff_releases(AllReposConfig(repo_configs={"alps": repo_config}), "2024_0201_01", "2024_0101_01") == {}
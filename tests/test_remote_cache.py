@@ -0,0 +1,91 @@
+import http.server
+import threading
+
+import pytest
+from config.schemas import AllReposConfig, BuildCacheConfig
+from core.build_cache import MANIFEST_NAME, BuildCache
+from core.remote_cache import HttpArtifactStore
+from utils.command_executor import CommandExecutor
+from utils.git_utils import GitOperator
+
+
+class ObjectHandler(http.server.BaseHTTPRequestHandler):
+    """GET/PUT/HEAD over an in-memory path -> bytes map, the subset HttpArtifactStore speaks."""
+    objects = {}
+
+    def do_PUT(self):
+        self.objects[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def _respond(self, send_body: bool):
+        body = self.objects.get(self.path)
+        self.send_response(200 if body is not None else 404)
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+        if send_body and body:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    handler = type("Handler", (ObjectHandler,), {"objects": {}})
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/cache", handler.objects
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_cache(root, remote_url) -> BuildCache:
+    config = BuildCacheConfig(root=str(root), remote_url=remote_url)
+    return BuildCache(config, GitOperator(CommandExecutor()), AllReposConfig())
+
+
+def publish(tmp_path, remote_url):
+    base = tmp_path / "built-here"
+    (base / "images").mkdir(parents=True)
+    (base / "images" / "kernel.img").write_bytes(b"kernel")
+    assert make_cache(tmp_path / "publisher", remote_url).store("TEE", "key", [base / "images"], {"images": base / "images"})
+
+
+def test_push_then_pull_over_http(tmp_path, server):
+    url, objects = server
+    publish(tmp_path, url)
+    assert sorted(objects) == ["/cache/TEE/key/0.tar", f"/cache/TEE/key/{MANIFEST_NAME}"]
+
+    consumer = make_cache(tmp_path / "consumer", url)
+    target = tmp_path / "restored-here" / "images"
+    assert consumer.restore("TEE", "key", {"images": target})
+    assert (target / "kernel.img").read_bytes() == b"kernel"
+    assert consumer.remote_hits == ["TEE"]
+
+
+def test_pull_rejects_an_archive_whose_digest_does_not_match(tmp_path, server):
+    url, objects = server
+    publish(tmp_path, url)
+    objects["/cache/TEE/key/0.tar"] += b"\0" * 512
+
+    target = tmp_path / "restored-here" / "images"
+    assert not make_cache(tmp_path / "consumer", url).restore("TEE", "key", {"images": target})
+    assert not target.exists()
+    assert not (tmp_path / "consumer" / "TEE" / "key").exists()
+
+
+def test_missing_objects_are_misses_not_errors(tmp_path, server):
+    url, _ = server
+    store = HttpArtifactStore(url, BuildCacheConfig(root=str(tmp_path / "cache"), remote_url=url))
+    assert not store.exists("TEE/absent/manifest.json")
+    assert not store.fetch("TEE/absent/manifest.json", tmp_path / "fetched")
+    assert not make_cache(tmp_path / "consumer", url).restore("TEE", "absent", {"images": tmp_path / "images"})
@@ -0,0 +1,108 @@
+import os
+import subprocess
+import threading
+import time
+
+from config.schemas import AllReposConfig, AllSyncConfigs, GitRepoInfo, RepoConfig, SyncAction, SyncExecutionConfig, SyncStrategyConfig
+from core.sync.repo_synchronizer import RepoSynchronizer
+from utils.command_executor import CommandExecutor
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(repo, message, date=None) -> None:
+    (repo / "file.txt").write_text(message)
+    git(repo, "add", ".")
+    identity = ["-c", "user.name=t", "-c", "user.email=t@example.com"]
+    env = {**os.environ, "GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date} if date else None
+    subprocess.run(["git", *identity, "commit", "-q", "-m", message], cwd=repo, check=True, capture_output=True, env=env)
+
+
+def make_synchronizer(git_repos, sync_actions, execution=None, **strategy_overrides) -> RepoSynchronizer:
+    repo_config = RepoConfig(repo_name="alps", repo_type="repo", path="/nonexistent/alps", sync_strategy="alps_sync", git_repos=git_repos)
+    strategy = SyncStrategyConfig(strategy_name="alps_sync", parent_types=["alps"], sync_actions=sync_actions, **strategy_overrides)
+    sync_configs = AllSyncConfigs(sync_configs={"alps_sync": strategy}, execution=execution or SyncExecutionConfig(timing_cache_path=None))
+    return RepoSynchronizer(AllReposConfig(repo_configs={"alps": repo_config}), sync_configs, CommandExecutor())
+
+
+def git_repo(name, repo_path, remote_name="origin", **overrides) -> GitRepoInfo:
+    return GitRepoInfo(repo_name=name, repo_parent="alps", path="/nonexistent/alps", repo_path=str(repo_path), repo_type="git", remote_name=remote_name, **overrides)
+
+
+def test_parallel_sync_caps_workers_per_remote_and_keeps_result_order():
+    repos = [git_repo(f"p{index}", f"/nonexistent/p{index}", remote_name="mirror" if index % 2 else "origin") for index in range(8)]
+    synchronizer = make_synchronizer(
+        repos,
+        [SyncAction(action_type="git_command", action_params={"command": "fetch", "args": []})],
+        execution=SyncExecutionConfig(max_workers=8, max_workers_per_remote=2, timing_cache_path=None),
+    )
+    running = {"origin": 0, "mirror": 0}
+    peaks = {"origin": 0, "mirror": 0, "total": 0}
+    lock = threading.Lock()
+
+    def execute_compiled(repo, compiled):
+        with lock:
+            running[repo.remote_name] += 1
+            peaks[repo.remote_name] = max(peaks[repo.remote_name], running[repo.remote_name])
+            peaks["total"] = max(peaks["total"], sum(running.values()))
+        time.sleep(0.05)
+        with lock:
+            running[repo.remote_name] -= 1
+        if repo.repo_name == "p5":
+            raise RuntimeError("fetch failed")
+
+    synchronizer.action_executor.execute_compiled = execute_compiled
+    results = synchronizer.sync_repos()
+
+    assert [result.repo_name for result in results] == [repo.repo_name for repo in repos]
+    assert [result.success for result in results] == [index != 5 for index in range(8)]
+    assert results[5].error == "fetch failed"
+    assert peaks["origin"] == 2 and peaks["mirror"] == 2
+    assert peaks["total"] > 2 # Both remotes ran side by side
+
+
+RESET_AND_CLEAN = [
+    SyncAction(action_type="git_command", action_params={"command": "fetch", "args": ["{remote_name}"]}),
+    SyncAction(action_type="git_command", action_params={"command": "reset", "args": ["--hard", "{remote_name}/{remote_branch}"]}),
+    SyncAction(action_type="git_command", action_params={"command": "clean", "args": ["-fdx"]}),
+]
+
+
+def test_skip_unchanged_only_skips_clean_projects_at_the_remote_sha(tmp_path):
+    seed = tmp_path / "seed"
+    git(tmp_path, "init", "-q", "-b", "main", str(seed))
+    commit(seed, "one")
+    repos = []
+    for name in ("in_sync", "untracked", "behind"):
+        git(tmp_path, "clone", "-q", str(seed), name)
+        repos.append(git_repo(name, tmp_path / name, local_branch="main", remote_branch="main"))
+    (tmp_path / "untracked" / "build.o").write_text("leftover")
+    commit(seed, "two")
+    git(tmp_path / "in_sync", "pull", "-q")
+
+    results = {result.repo_name: result for result in make_synchronizer(repos, RESET_AND_CLEAN, skip_unchanged=True).sync_repos()}
+
+    assert all(result.success for result in results.values())
+    assert (results["in_sync"].actions_executed, results["in_sync"].skipped_actions) == (1, 2)
+    for name in ("untracked", "behind"):
+        assert (results[name].actions_executed, results[name].skipped_actions) == (3, 0)
+        assert git(tmp_path / name, "rev-parse", "HEAD") == git(seed, "rev-parse", "HEAD")
+    assert not (tmp_path / "untracked" / "build.o").exists()
+
+
+def test_shallow_strategy_fetches_back_to_the_anchor_date_less_the_margin(tmp_path):
+    upstream = tmp_path / "upstream"
+    git(tmp_path, "init", "-q", "-b", "main", str(upstream))
+    for month in range(1, 6):
+        commit(upstream, f"c{month}", date=f"2024-0{month}-10T12:00:00")
+    git(tmp_path, "clone", "-q", "--depth", "1", "--branch", "main", f"file://{upstream}", "clone")
+    repos = [git_repo("clone", tmp_path / "clone", remote_branch="main")]
+    fetch = [SyncAction(action_type="git_command", action_params={"command": "fetch", "args": ["{remote_name}"]})]
+
+    # Anchor 2024-03-12 minus 7 days keeps the March commit and everything after it
+    results = make_synchronizer(repos, fetch, history_mode="shallow", shallow_margin_days=7).sync_repos(history_anchor="2024_0312_01")
+    assert results[0].success
+    assert git(tmp_path / "clone", "rev-list", "--count", "origin/main") == "3"
+    assert git(tmp_path / "clone", "rev-parse", "--is-shallow-repository") == "true"
@@ -0,0 +1,22 @@
+import os
+
+from config.repos_config import resolve_output_paths
+from config.schemas import AllReposConfig, PackageConfig, PatchConfig
+
+
+def test_blob_store_is_anchored_to_the_package_output_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = resolve_output_paths(AllReposConfig(package_config=PackageConfig(output_dir="release")))
+    assert config.package_config.output_dir == str(tmp_path / "release")
+    assert config.patch_config.blob_store_dir == str(tmp_path / "release" / "blobs")
+
+    monkeypatch.chdir(os.sep) # Later steps may run elsewhere
+    assert config.patch_config.blob_store_dir == str(tmp_path / "release" / "blobs")
+
+
+def test_absolute_blob_store_is_kept(tmp_path):
+    config = resolve_output_paths(AllReposConfig(
+        package_config=PackageConfig(output_dir=str(tmp_path / "release")),
+        patch_config=PatchConfig(blob_store_dir=str(tmp_path / "shared-blobs")),
+    ))
+    assert config.patch_config.blob_store_dir == str(tmp_path / "shared-blobs")
@@ -0,0 +1,64 @@
+import subprocess
+
+from config.schemas import AllReposConfig, GitRepoInfo, RepoConfig, SnapshotConfig
+from core.snapshot_manager import ReleaseSnapshot, SnapshotManager
+from utils.command_executor import CommandExecutor
+from utils.git_utils import GitOperator
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(repo, message) -> str:
+    (repo / "file.txt").write_text(message)
+    git(repo, "add", ".")
+    git(repo, "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+def make_manager(store_path) -> SnapshotManager:
+    return SnapshotManager(GitOperator(CommandExecutor()), SnapshotConfig(store_path=str(store_path)))
+
+
+def test_recorded_releases_survive_reload_and_diff_by_head_or_tag(tmp_path):
+    repos = []
+    for name in ("grt", "kernel"):
+        git(tmp_path, "init", "-q", name)
+        repos.append(GitRepoInfo(repo_name=name, repo_parent="grt", path=str(tmp_path), repo_path=str(tmp_path / name), repo_type="git", tag_prefix="release_"))
+    config = AllReposConfig(repo_configs={"grt": RepoConfig(repo_name="grt", repo_type="git", path=str(tmp_path), git_repos=repos)})
+    store_path = tmp_path / "snapshots.jsonl"
+
+    grt_first = commit(tmp_path / "grt", "one")
+    kernel_sha = commit(tmp_path / "kernel", "one")
+    git(tmp_path / "grt", "tag", "release_2024_0101_01")
+    make_manager(store_path).record_release(config, "2024_0101_01")
+    grt_second = commit(tmp_path / "grt", "two")
+    git(tmp_path / "grt", "tag", "release_2024_0201_01")
+    make_manager(store_path).record_release(config, "2024_0201_01")
+
+    manager = make_manager(store_path)
+    assert manager.versions() == ["2024_0101_01", "2024_0201_01"]
+    head_diff = manager.diff("2024_0101_01", "2024_0201_01")
+    assert head_diff.changed == {str(tmp_path / "grt"): (grt_first, grt_second)}
+    assert not head_diff.added and not head_diff.removed
+    assert manager.get("2024_0201_01").heads[str(tmp_path / "kernel")] == kernel_sha
+    assert manager.diff("2024_0101_01", "2024_0201_01", use_tags=True).changed == {str(tmp_path / "grt"): (grt_first, grt_second)}
+    assert manager.diff("2024_0101_01", "2024_0301_01") is None
+
+
+def test_torn_last_line_loses_only_itself(tmp_path):
+    store_path = tmp_path / "snapshots.jsonl"
+    manager = make_manager(store_path)
+    manager.append(ReleaseSnapshot("2024_0101_01", "t1", heads={"/ws/grt": "a" * 40}))
+    with open(store_path, "a", encoding="utf-8") as handle:
+        handle.write('{"v":"2024_0201_01","heads":{"/ws/g') # Interrupted mid-write
+
+    manager = make_manager(store_path)
+    assert manager.versions() == ["2024_0101_01"]
+    manager.append(ReleaseSnapshot("2024_0301_01", "t3", heads={"/ws/grt": "c" * 40}))
+    manager.append(ReleaseSnapshot("2024_0101_01", "t4", heads={"/ws/grt": "d" * 40})) # Re-recorded; the newer line wins
+
+    reloaded = make_manager(store_path)
+    assert reloaded.versions() == ["2024_0101_01", "2024_0301_01"]
+    assert reloaded.get("2024_0101_01").heads == {"/ws/grt": "d" * 40}
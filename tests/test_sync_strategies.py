@@ -0,0 +1,129 @@
+import json
+import os
+import stat
+import subprocess
+import sys
+
+from config.schemas import GitRepoInfo, RepoConfig, SyncStrategyConfig
+from core.sync.action_executor import ActionExecutor
+from core.sync.sync_strategies import JiriSyncStrategy, RepoToolSyncStrategy
+from utils.command_executor import CommandExecutor
+
+# Stand-ins for the workspace tools: enough of `jiri runp/update` and `repo forall/sync` to run real
+# shell snippets in real project directories. Projects come from <workspace>/tool.json.
+FAKE_TOOL = r'''
+import json, os, re, subprocess, sys
+
+tool, command, args = os.path.basename(sys.argv[0]), sys.argv[1], sys.argv[2:]
+root = os.getcwd()
+with open(os.path.join(root, "tool.json")) as handle:
+    config = json.load(handle)
+if command == "update" or command == "sync":
+    sys.stderr.write(config.get("update_stderr", ""))
+    sys.exit(config.get("update_rc", 0))
+
+if tool == "jiri": # runp [-flags...] <command...>
+    first_command = next(index for index, arg in enumerate(args) if not arg.startswith("-"))
+    options, shell_command = args[:first_command], args[first_command:]
+    regex = next(option.split("=", 1)[1] for option in options if option.startswith("-projects="))
+    selected = [(project["path"], {}) for project in config["projects"] if re.search(regex, project["name"])]
+else: # forall <paths...> -j N -c <command>
+    paths = args[:args.index("-j")]
+    shell_command = ["sh", "-c", args[args.index("-c") + 1]]
+    selected = [(path, {"REPO_PATH": path}) for path in paths if path in config["projects"]]
+    for path in set(paths) - set(config["projects"]):
+        sys.stderr.write(f"error: project {path} not found\n")
+
+failed = False
+for path, extra_env in selected:
+    result = subprocess.run(shell_command, cwd=os.path.join(root, path), env={**os.environ, **extra_env}, capture_output=True, text=True)
+    sys.stdout.write(result.stdout)
+    failed |= result.returncode != 0
+sys.exit(1 if failed else 0)
+'''
+
+
+def write_tool(path, tool_config_dir, config) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"#!{sys.executable}\n{FAKE_TOOL}")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    (tool_config_dir / "tool.json").write_text(json.dumps(config))
+
+
+def git_project(path, with_commit: bool) -> None:
+    path.mkdir(parents=True)
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    if with_commit:
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "--allow-empty", "-m", "init"], cwd=path, check=True)
+
+
+def strategy(strategy_class, root):
+    command_executor = CommandExecutor()
+    repo_config = RepoConfig(repo_name="nebula", repo_type="jiri", path=str(root))
+    strategy_config = SyncStrategyConfig(strategy_name="native", parent_types=["nebula"], sync_actions=[], backend="native", native_jobs=2)
+    return strategy_class(command_executor, ActionExecutor(command_executor), repo_config, strategy_config)
+
+
+def project(root, name, relative_path) -> GitRepoInfo:
+    return GitRepoInfo(repo_name=name, repo_parent="nebula", path=str(root), repo_path=str(root / relative_path), repo_type="git", relative_path_in_parent=relative_path)
+
+
+def config_value(path, key):
+    result = subprocess.run(["git", "config", "--get", key], cwd=path, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def test_jiri_batch_maps_results_by_project_path(tmp_path):
+    root = tmp_path / "nebula"
+    git_project(root / "zircon", with_commit=True)
+    git_project(root / "vendor" / "zircon", with_commit=True) # Same name, another path, not requested
+    git_project(root / "garnet", with_commit=False)
+    write_tool(root / ".jiri_root" / "bin" / "jiri", root, {"projects": [
+        {"name": "zircon", "path": "zircon"}, {"name": "zircon", "path": "vendor/zircon"}, {"name": "garnet", "path": "garnet"},
+    ]})
+    zircon, garnet, ghost = project(root, "zircon", "zircon"), project(root, "garnet", "garnet"), project(root, "ghost", "ghost")
+    jiri = strategy(JiriSyncStrategy, root)
+
+    errors = jiri.run_git_batch("rev-parse", ["--verify", "-q", "HEAD"], [zircon, garnet, ghost])
+    assert sorted(errors) == [garnet.repo_path, ghost.repo_path]
+    assert "failed with exit code 1" in errors[garnet.repo_path]
+    assert "reported no result" in errors[ghost.repo_path]
+
+    assert jiri.run_git_batch("config", ["sync.touched", "yes"], [zircon]) == {}
+    assert config_value(root / "zircon", "sync.touched") == "yes"
+    assert config_value(root / "vendor" / "zircon", "sync.touched") is None
+
+
+def test_jiri_update_blames_the_projects_it_names(tmp_path):
+    root = tmp_path / "nebula"
+    zircon, garnet = project(root, "zircon", "zircon"), project(root, "garnet", "garnet")
+    write_tool(root / ".jiri_root" / "bin" / "jiri", root, {"projects": [], "update_rc": 1, "update_stderr": 'ERROR: project "garnet": fetch failed\n'})
+    assert list(strategy(JiriSyncStrategy, root).run_workspace_update([], [zircon, garnet])) == [garnet.repo_path]
+
+    write_tool(root / ".jiri_root" / "bin" / "jiri", root, {"projects": [], "update_rc": 1, "update_stderr": "network is down\n"})
+    assert sorted(strategy(JiriSyncStrategy, root).run_workspace_update([], [zircon, garnet])) == sorted([zircon.repo_path, garnet.repo_path])
+
+
+def test_repo_forall_maps_results_by_project_path(tmp_path, monkeypatch):
+    root = tmp_path / "alps"
+    git_project(root / "device" / "a", with_commit=True)
+    git_project(root / "device" / "b", with_commit=False)
+    bin_dir = tmp_path / "bin"
+    write_tool(bin_dir / "repo", root, {"projects": ["device/a", "device/b"]})
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    good, bad, ghost = project(root, "a", "device/a"), project(root, "b", "device/b"), project(root, "ghost", "device/ghost")
+
+    errors = strategy(RepoToolSyncStrategy, root).run_git_batch("rev-parse", ["--verify", "-q", "HEAD"], [good, bad, ghost])
+    assert sorted(errors) == [bad.repo_path, ghost.repo_path]
+    assert "failed with exit code 1" in errors[bad.repo_path]
+    assert "reported no result" in errors[ghost.repo_path]
+
+
+def test_repo_sync_blames_the_projects_it_names(tmp_path, monkeypatch):
+    root = tmp_path / "alps"
+    root.mkdir()
+    bin_dir = tmp_path / "bin"
+    write_tool(bin_dir / "repo", root, {"projects": [], "update_rc": 1, "update_stderr": "error: device/b: sync failed\n"})
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    good, bad = project(root, "a", "device/a"), project(root, "b", "device/b")
+    assert list(strategy(RepoToolSyncStrategy, root).run_workspace_update([], [good, bad])) == [bad.repo_path]
@@ -2,8 +2,10 @@ import subprocess
 import os
 import shlex
 import pathlib
+import tempfile
+import signal
 from utils.custom_logger import Logger
-from typing import Dict, List, Optional, Union, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Union, Tuple, Any
 
 class CommandExecutor:
     def __init__(self) -> None:
@@ -17,7 +19,9 @@ class CommandExecutor:
         text: bool = True,
         check: bool = True,
         env: Optional[Dict[str, str]] = None,
-        shell: bool = False
+        shell: bool = False,
+        stdout_path: Optional[Union[str, pathlib.Path]] = None,
+        quiet: bool = False
     ) -> subprocess.CompletedProcess:
 
         effective_env = os.environ.copy()
@@ -48,21 +52,37 @@ class CommandExecutor:
             executable_path = '/bin/bash'
 
         try:
-            result = subprocess.run(
-                command_to_run,
-                capture_output=capture_output,
-                text=text,
-                cwd=str(cwd_path) if cwd_path else None,
-                env=effective_env,
-                check=False, # Check manually after logging
-                shell=shell,
-                executable=executable_path
-            )
+            if stdout_path:
+                # stdout goes straight to the file (e.g. large blobs); only stderr is captured
+                with open(stdout_path, "wb") as stdout_file:
+                    result = subprocess.run(
+                        command_to_run,
+                        stdout=stdout_file,
+                        stderr=subprocess.PIPE,
+                        text=text,
+                        cwd=str(cwd_path) if cwd_path else None,
+                        env=effective_env,
+                        check=False,
+                        shell=shell,
+                        executable=executable_path
+                    )
+            else:
+                result = subprocess.run(
+                    command_to_run,
+                    capture_output=capture_output,
+                    text=text,
+                    cwd=str(cwd_path) if cwd_path else None,
+                    env=effective_env,
+                    check=False, # Check manually after logging
+                    shell=shell,
+                    executable=executable_path
+                )
 
             if result.returncode != 0:
-                stderr_output = result.stderr.strip() if result.stderr else "No stderr"
-                stdout_output = result.stdout.strip() if result.stdout else "No stdout"
-                self.logger.error(
+                stderr_output = self._for_log(result.stderr) or "No stderr"
+                stdout_output = self._for_log(result.stdout) or "No stdout"
+                # quiet: a nonzero exit is an answer (diff --quiet, merge-base --is-ancestor), not a failure
+                (self.logger.debug if quiet else self.logger.error)(
                     f"Command failed with exit code {result.returncode}: {command_str_for_log}\n"
                     f"  Stderr: {stderr_output}\n"
                     f"  Stdout: {stdout_output}"
@@ -74,11 +94,13 @@ class CommandExecutor:
                     )
             else:
                  # Log truncated stdout at debug level on success
-                 stdout_preview = (result.stdout[:100] + '...') if result.stdout and len(result.stdout) > 100 else result.stdout
+                 stdout_preview = self._for_log(result.stdout[:100]) + ('...' if result.stdout and len(result.stdout) > 100 else '') if result.stdout else result.stdout
                  self.logger.debug(f"Command successful: {command_str_for_log}. Output preview: {stdout_preview}")
 
 
             return result
+        except subprocess.CalledProcessError:
+             raise # Already logged above
         except FileNotFoundError:
              self.logger.error(f"Executable not found for command: {command_str_for_log}")
              raise
@@ -87,6 +109,141 @@ class CommandExecutor:
              raise
 
 
+    @staticmethod
+    def _for_log(output: Optional[Union[str, bytes]]) -> str:
+        if not output:
+            return ""
+        if isinstance(output, bytes):
+            output = output.decode("utf-8", errors="replace")
+        return output.strip()
+
+    def stream_subprocess(
+        self,
+        command: List[str],
+        cwd: Optional[Union[str, pathlib.Path]] = None,
+        separator: Union[str, bytes] = "\n",
+        check: bool = True,
+        env: Optional[Dict[str, str]] = None,
+        chunk_size: int = 1 << 16
+    ) -> Iterator[Union[str, bytes]]:
+        """Yields separator-delimited records from stdout while the command is still running.
+
+        A bytes separator yields raw bytes records and nothing is decoded; a str separator
+        yields each record decoded as UTF-8. See stream_pipeline for buffering and errors.
+        """
+        return self.stream_pipeline([command], cwd=cwd, separator=separator, check=check, env=env, chunk_size=chunk_size)
+
+    def stream_pipeline(
+        self,
+        stages: List[Union[List[str], Dict[str, Any]]],
+        cwd: Optional[Union[str, pathlib.Path]] = None,
+        separator: Union[str, bytes] = "\n",
+        check: bool = True,
+        env: Optional[Dict[str, str]] = None,
+        chunk_size: int = 1 << 16
+    ) -> Iterator[Union[str, bytes]]:
+        """Connects stages with OS pipes (no shell) and yields records of the last stage's stdout.
+
+        A stage is an argv list, or a dict with "command" (argv) and optional "cwd"/"env"
+        overriding the pipeline defaults. Only the current partial record is buffered in
+        Python. Each stage's stderr goes to its own temporary file so no pipe can fill up.
+        Every stage's exit code is checked; the first failing stage is logged with its stderr
+        and raised as CalledProcessError when check is set. Closing the generator early
+        kills all stages.
+        """
+        specs: List[Dict[str, Any]] = [stage if isinstance(stage, dict) else {"command": stage} for stage in stages]
+        if not specs:
+            raise ValueError("A pipeline needs at least one stage")
+
+        base_env = os.environ.copy()
+        if env:
+            base_env.update(env)
+
+        cwd_paths: List[Optional[pathlib.Path]] = []
+        for spec in specs:
+            stage_cwd = spec.get("cwd", cwd)
+            cwd_path = pathlib.Path(stage_cwd).expanduser() if stage_cwd else None
+            if cwd_path and not cwd_path.is_dir():
+                self.logger.error(f"Working directory does not exist: {cwd_path}")
+                raise FileNotFoundError(f"Working directory not found: {cwd_path}")
+            cwd_paths.append(cwd_path)
+
+        pipeline_str_for_log = " | ".join(shlex.join(spec["command"]) for spec in specs)
+        self.logger.info(f"Streaming: '{pipeline_str_for_log}' in '{cwd_paths[0] or pathlib.Path.cwd()}'")
+
+        binary = isinstance(separator, bytes)
+        # ASCII separators never occur inside a multi-byte UTF-8 sequence, so splitting before decoding is safe
+        separator_bytes = separator if binary else separator.encode("utf-8")
+        stderr_files = [tempfile.TemporaryFile() for _ in specs]
+        processes: List[subprocess.Popen] = []
+        finished = False
+        try:
+            previous_stdout = None
+            for spec, cwd_path, stderr_file in zip(specs, cwd_paths, stderr_files):
+                stage_env = base_env
+                if spec.get("env"):
+                    stage_env = dict(base_env, **spec["env"])
+                process = subprocess.Popen(
+                    spec["command"],
+                    cwd=str(cwd_path) if cwd_path else None,
+                    env=stage_env,
+                    stdin=previous_stdout,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file
+                )
+                if previous_stdout is not None:
+                    # Only the next stage may hold the read end, so the writer sees SIGPIPE if it exits
+                    previous_stdout.close()
+                previous_stdout = process.stdout
+                processes.append(process)
+
+            final_stdout = processes[-1].stdout
+            pending: List[bytes] = []
+            while True:
+                chunk = final_stdout.read1(chunk_size)
+                if not chunk:
+                    break
+                parts = chunk.split(separator_bytes)
+                if len(parts) > 1:
+                    pending.append(parts[0])
+                    for record in [b"".join(pending)] + parts[1:-1]:
+                        yield record if binary else record.decode("utf-8", errors="replace")
+                    pending = []
+                pending.append(parts[-1])
+            tail = b"".join(pending)
+            if tail:
+                yield tail if binary else tail.decode("utf-8", errors="replace")
+
+            return_codes = [process.wait() for process in processes]
+            finished = True
+            for index, (spec, return_code, stderr_file) in enumerate(zip(specs, return_codes, stderr_files)):
+                if return_code == 0:
+                    continue
+                if return_code == -signal.SIGPIPE and index < len(specs) - 1:
+                    # A later stage stopped reading (e.g. head); the writer being cut off is expected
+                    continue
+                stderr_file.seek(0)
+                stderr_output = stderr_file.read().decode("utf-8", errors="replace")
+                self.logger.error(
+                    f"Pipeline stage failed with exit code {return_code}: {shlex.join(spec['command'])}\n"
+                    f"  Pipeline: {pipeline_str_for_log}\n"
+                    f"  Stderr: {stderr_output.strip() or 'No stderr'}"
+                )
+                if check:
+                    raise subprocess.CalledProcessError(return_code, spec["command"], stderr=stderr_output)
+                break
+        finally:
+            if not finished:
+                for process in processes:
+                    if process.poll() is None:
+                        process.kill()
+                for process in processes:
+                    process.wait()
+            if processes and processes[-1].stdout:
+                processes[-1].stdout.close()
+            for stderr_file in stderr_files:
+                stderr_file.close()
+
     def execute(
         self,
         command_type: str,
@@ -123,7 +280,17 @@ class CommandExecutor:
     def execute_git_command(self, params: Dict, check: bool = True) -> subprocess.CompletedProcess:
         command_parts: List[str] = ["git", params["command"]] + params.get("args", [])
         cwd: Optional[str] = params.get("cwd")
-        return self._run_subprocess(command=command_parts, cwd=cwd, check=check)
+        # "binary": True leaves stdout/stderr as bytes for callers that parse or store raw output;
+        # "stdout_path" writes stdout to that file instead of holding it in memory;
+        # "quiet": True logs a nonzero exit at debug level, for commands whose exit code is the answer
+        return self._run_subprocess(
+            command=command_parts, cwd=cwd, check=check, text=not params.get("binary", False),
+            stdout_path=params.get("stdout_path"), quiet=params.get("quiet", False)
+        )
+
+    def stream_git_command(self, params: Dict, separator: Union[str, bytes] = "\n", check: bool = True) -> Iterator[Union[str, bytes]]:
+        command_parts: List[str] = ["git", params["command"]] + params.get("args", [])
+        return self.stream_subprocess(command_parts, cwd=params.get("cwd"), separator=separator, check=check)
 
     def execute_jiri_command(self, params: Dict, check: bool = True) -> subprocess.CompletedProcess:
         jiri_path_str: str = params.get("jiri_path", ".")
@@ -132,6 +299,12 @@ class CommandExecutor:
         command_parts: List[str] = [str(jiri_binary), params["command"]] + params.get("args", [])
         return self._run_subprocess(command=command_parts, cwd=jiri_path, check=check)
 
+    def execute_repo_command(self, params: Dict, check: bool = True) -> subprocess.CompletedProcess:
+        repo_root = pathlib.Path(params.get("repo_root", ".")).expanduser()
+        repo_binary: str = params.get("repo_binary", "repo")
+        command_parts: List[str] = [repo_binary, params["command"]] + params.get("args", [])
+        return self._run_subprocess(command=command_parts, cwd=repo_root, check=check)
+
     def execute_mkdir_command(self, params: Dict, check: bool = True) -> subprocess.CompletedProcess:
         path: str = params["path"]
         target_path = pathlib.Path(path).expanduser()
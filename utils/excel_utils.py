@@ -99,10 +99,15 @@ class ExcelReporter:
             commit_string_f: str = f"zircon:{zircon_commit_id}\ngarnet:{garnet_commit_id}"
 
             new_rows_data: List[List[Any]] = []
+            duplicate_rows_skipped: int = 0
             for repo_info in all_repos_config.all_git_repos():
                 if not repo_info.commit_details:
                     continue
                 for commit in repo_info.commit_details:
+                    if commit.duplicate_of is not None:
+                        # Reported once on the canonical commit's row, which lists this one
+                        duplicate_rows_skipped += 1
+                        continue
                     commit_module_val: str = ""
                     try:
                         if commit.commit_module and len(commit.commit_module) > 0:
@@ -121,7 +126,7 @@ class ExcelReporter:
                         commit.message,
                         commit_module_val,
                         commit.patch_path or "",
-                        "",
+                        f"Also in: {', '.join(commit.duplicate_refs)}" if commit.duplicate_refs else "",
                         commit_string_f,
                         f"{self.excel_config.tester_name} / {commit.author} / {self.excel_config.mtk_owner_serial}",
                         current_date,
@@ -135,6 +140,9 @@ class ExcelReporter:
                     ]
                     new_rows_data.append(row_data)
 
+            if duplicate_rows_skipped:
+                self.logger.info(f"Merged {duplicate_rows_skipped} duplicate commits into the rows of their canonical commits.")
+
             if new_rows_data:
                 self.logger.info(f"Preparing to insert {len(new_rows_data)} new rows into the Excel sheet.")
                 try:
@@ -1,11 +1,40 @@
 import os
 import shutil
 import glob
-from typing import List, Optional
+import errno
+import fcntl
+import hashlib
+import itertools
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
 from utils.custom_logger import Logger
 
 logger: Logger = Logger("file_utils")
 
+FICLONE = 0x40049409 # ioctl(dest_fd, FICLONE, src_fd): share extents on btrfs/XFS instead of copying
+COPY_CHUNK_SIZE = 1 << 20
+# copy_file_range cannot serve these (other filesystem on old kernels, special files); plain copy can
+_COPY_FAST_PATH_ERRNOS = frozenset({errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ETXTBSY, errno.EBADF})
+
+
+@dataclass
+class BulkCopyResult:
+    copied_files: int = 0
+    skipped_files: int = 0
+    copied_bytes: int = 0
+    skipped_bytes: int = 0
+    methods: Dict[str, int] = field(default_factory=dict) # reflink / copy_file_range / hardlink / copy -> files
+    failed: Dict[str, str] = field(default_factory=dict) # source path -> error
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failed
+
 def construct_path(base_path: str, relative_path: str) -> Optional[str]:
     try:
         expanded_base_path = os.path.expanduser(base_path)
@@ -15,12 +44,176 @@ def construct_path(base_path: str, relative_path: str) -> Optional[str]:
         logger.error(f"Error constructing path: {e}")
         return None
 
+TRASH_DIR_NAME = ".gr_release-trash"
+SHARED_TRASH_DIR = "~/.cache/gr_release/trash" # Preferred when it shares the filesystem of the trashed path
+
+
+class BackgroundTrash:
+    """Removes trees by renaming them into a trash directory and deleting them later.
+
+    The rename is atomic and instant, so a caller can recreate the path right away.
+    A single worker deletes trashed trees at idle I/O priority (ionice -c3, nice 19)
+    when those tools exist. Each filesystem gets one trash directory, since a rename
+    cannot cross filesystems: SHARED_TRASH_DIR when it lives there, otherwise a
+    TRASH_DIR_NAME directory next to the first path trashed on it.
+    Anything already in a trash directory when it is first used is a leftover
+    from an interrupted run and is queued too. At most max_pending trees wait for
+    deletion; further calls block until the worker catches up.
+    """
+
+    def __init__(self, max_pending: int = 4):
+        self.logger = Logger(self.__class__.__name__)
+        self.max_pending = max(1, max_pending)
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._trash_dirs: Dict[int, str] = {} # st_dev -> trash directory on that filesystem
+        self._counter = itertools.count()
+        self._worker: Optional[threading.Thread] = None
+        self._low_priority_prefix = [tool for tool in ("ionice", "nice") if shutil.which(tool)]
+        self.stats: Dict[str, int] = {"trashed": 0, "deleted": 0, "failed": 0, "deleted_files": 0, "deleted_bytes": 0}
+
+    def discard(self, path: str) -> bool:
+        """Moves path into trash for background deletion; False if it could not be moved."""
+        try:
+            device = os.lstat(os.path.dirname(os.path.abspath(path))).st_dev
+            trash_dir = self._trash_dir(device, path)
+            with self._condition:
+                while self._pending >= self.max_pending:
+                    self.logger.info(f"{self._pending} trees are still being deleted; waiting before trashing {path}")
+                    self._condition.wait()
+                entry = os.path.join(trash_dir, f"{os.path.basename(os.path.normpath(path))}.{os.getpid()}.{next(self._counter)}")
+                os.rename(path, entry)
+                self.stats["trashed"] += 1
+            self.logger.info(f"Moved {path} to {entry} for background deletion")
+            self._enqueue(entry)
+            return True
+        except OSError as e:
+            self.logger.warning(f"Could not move {path} to trash: {e}")
+            return False
+
+    def _trash_dir(self, device: int, path: str) -> str:
+        with self._condition:
+            trash_dir = self._trash_dirs.get(device)
+            if trash_dir:
+                return trash_dir
+            shared_trash_dir = os.path.expanduser(SHARED_TRASH_DIR)
+            if self._device_of(shared_trash_dir) == device:
+                trash_dir = shared_trash_dir
+            else:
+                trash_dir = os.path.join(os.path.dirname(os.path.abspath(path)), TRASH_DIR_NAME)
+            os.makedirs(trash_dir, exist_ok=True)
+            self._trash_dirs[device] = trash_dir
+        leftovers = [os.path.join(trash_dir, name) for name in os.listdir(trash_dir)]
+        if leftovers:
+            self.logger.info(f"Sweeping {len(leftovers)} leftover entries from {trash_dir}")
+        for leftover in leftovers:
+            self._enqueue(leftover)
+        return trash_dir
+
+    @staticmethod
+    def _device_of(path: str) -> Optional[int]:
+        """st_dev of path, or of its nearest existing ancestor when it does not exist yet."""
+        current = os.path.abspath(path)
+        while True:
+            try:
+                return os.lstat(current).st_dev
+            except FileNotFoundError:
+                parent = os.path.dirname(current)
+                if parent == current:
+                    return None
+                current = parent
+            except OSError:
+                return None
+
+    def _enqueue(self, entry: str) -> None:
+        with self._condition:
+            self._pending += 1
+            if self._worker is None or not self._worker.is_alive():
+                # Daemon: an unfinished deletion is swept by the next run
+                self._worker = threading.Thread(target=self._drain_queue, name="trash-delete", daemon=True)
+                self._worker.start()
+        self._queue.put(entry)
+
+    def _drain_queue(self) -> None:
+        while True:
+            entry = self._queue.get()
+            started = time.monotonic()
+            files, size = self._measure(entry)
+            try:
+                if self._low_priority_prefix:
+                    command = ["ionice", "-c3"] if "ionice" in self._low_priority_prefix else []
+                    command += ["nice", "-n19"] if "nice" in self._low_priority_prefix else []
+                    subprocess.run(command + ["rm", "-rf", "--one-file-system", entry], check=True, capture_output=True)
+                else:
+                    shutil.rmtree(entry)
+                deleted = not os.path.lexists(entry)
+            except (OSError, subprocess.CalledProcessError) as e:
+                self.logger.error(f"Background deletion of {entry} failed: {e}")
+                deleted = False
+            with self._condition:
+                if deleted:
+                    self.stats["deleted"] += 1
+                    self.stats["deleted_files"] += files
+                    self.stats["deleted_bytes"] += size
+                else:
+                    self.stats["failed"] += 1
+                self._pending -= 1
+                self._condition.notify_all()
+            if deleted:
+                self.logger.info(f"Deleted {entry} in the background ({files} files, {size} bytes, {time.monotonic() - started:.1f}s)")
+
+    @staticmethod
+    def _measure(path: str) -> Tuple[int, int]:
+        files = size = 0
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            files += 1
+                            size += entry.stat(follow_symlinks=False).st_size
+            except NotADirectoryError:
+                files += 1
+                size += os.lstat(current).st_size
+            except OSError:
+                continue
+        return files, size
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until all trashed trees are deleted; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def report(self) -> None:
+        with self._condition:
+            self.logger.info(f"Background trash: {self._pending} pending, {self.stats}")
+
+
 class FileOperator:
-    def __init__(self) -> None:
+    def __init__(self, max_pending_trash: int = 4) -> None:
         self.logger = Logger(self.__class__.__name__)
+        self.max_pending_trash = max_pending_trash
+        self._trash: Optional[BackgroundTrash] = None
+        self._trash_lock = threading.Lock()
 
-    def remove_directory_recursive(self, path: str) -> bool:
+    @property
+    def trash(self) -> BackgroundTrash:
+        with self._trash_lock:
+            if self._trash is None:
+                self._trash = BackgroundTrash(self.max_pending_trash)
+            return self._trash
+
+    def remove_directory_recursive(self, path: str, background: bool = False) -> bool:
         try:
+            if background and os.path.isdir(path) and not os.path.islink(path):
+                if self.trash.discard(path):
+                    return True
+                self.logger.info(f"Falling back to removing {path} inline")
             if not os.path.exists(path):
                 self.logger.info(f"Directory does not exist: {path}")
                 return True
@@ -80,7 +273,7 @@ class FileOperator:
             self.logger.error(f"Error creating directory {path}: {e}")
             return False
 
-    def copy_wildcard(self, src_pattern: str, dst_dir: str) -> bool:
+    def copy_wildcard(self, src_pattern: str, dst_dir: str, max_workers: int = 8) -> bool:
         try:
             if not os.path.exists(dst_dir):
                 self.create_directory(dst_dir)
@@ -91,12 +284,8 @@ class FileOperator:
                 return True
 
             self.logger.info(f"Copying files matching {src_pattern} to {dst_dir}")
-            success = True
-            
-            for src_file in matched_files:
-                dst_path = os.path.join(dst_dir, os.path.basename(src_file))
-                if not self.copy_file(src_file, dst_path):
-                    success = False
+            pairs = [(src_file, os.path.join(dst_dir, os.path.basename(src_file))) for src_file in matched_files]
+            success = self.bulk_copy(pairs, max_workers=max_workers).succeeded
 
             if success:
                 self.logger.info(f"Successfully copied all matching files to: {dst_dir}")
@@ -107,3 +296,118 @@ class FileOperator:
         except Exception as e:
             self.logger.error(f"Error copying files from {src_pattern} to {dst_dir}: {e}")
             return False
+
+    def bulk_copy(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        max_workers: int = 8,
+        verify_hash: bool = True,
+        allow_hardlink: bool = False
+    ) -> BulkCopyResult:
+        """Copies (source, destination) file pairs concurrently, leaving unchanged destinations alone.
+
+        A destination is unchanged when its size and mtime match the source and, with
+        verify_hash, so does its content. Data moves by hard link (only with
+        allow_hardlink, for destinations nobody modifies), reflink, copy_file_range,
+        and finally a plain copy. Each destination is written to a temporary file and
+        renamed into place, with the source's metadata as shutil.copy2 would set it.
+        """
+        result = BulkCopyResult()
+        lock = threading.Lock()
+
+        def copy_pair(pair: Tuple[str, str]) -> None:
+            src_path, dst_path = pair
+            try:
+                method, size = self._copy_if_changed(src_path, dst_path, verify_hash, allow_hardlink)
+            except OSError as e:
+                self.logger.error(f"Error copying file from {src_path} to {dst_path}: {e}")
+                with lock:
+                    result.failed[src_path] = str(e)
+                return
+            with lock:
+                if method is None:
+                    result.skipped_files += 1
+                    result.skipped_bytes += size
+                else:
+                    result.copied_files += 1
+                    result.copied_bytes += size
+                    result.methods[method] = result.methods.get(method, 0) + 1
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="bulk-copy") as pool:
+            list(pool.map(copy_pair, pairs))
+
+        self.logger.info(
+            f"Bulk copy: {result.copied_files} files copied ({result.copied_bytes} bytes, {result.methods}), "
+            f"{result.skipped_files} unchanged files skipped ({result.skipped_bytes} bytes), {len(result.failed)} failed"
+        )
+        return result
+
+    def _copy_if_changed(self, src_path: str, dst_path: str, verify_hash: bool, allow_hardlink: bool) -> Tuple[Optional[str], int]:
+        """Returns (method, size); method is None when the destination already matched."""
+        src_stat = os.stat(src_path)
+        try:
+            dst_stat = os.stat(dst_path)
+        except FileNotFoundError:
+            dst_stat = None
+        if (
+            dst_stat is not None
+            and dst_stat.st_size == src_stat.st_size
+            and dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+            and (not verify_hash or os.path.samefile(src_path, dst_path) or self._file_digest(src_path) == self._file_digest(dst_path))
+        ):
+            return None, src_stat.st_size
+
+        dst_dir = os.path.dirname(dst_path)
+        if dst_dir:
+            os.makedirs(dst_dir, exist_ok=True)
+        temp_path = os.path.join(dst_dir, f".{os.path.basename(dst_path)}.tmp-{os.getpid()}-{threading.get_ident()}")
+        try:
+            method = self._copy_data(src_path, temp_path, src_stat.st_size, allow_hardlink)
+            if method != "hardlink":
+                shutil.copystat(src_path, temp_path) # A hard link already shares the source's metadata
+            os.replace(temp_path, dst_path)
+        except BaseException:
+            if os.path.lexists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return method, src_stat.st_size
+
+    @staticmethod
+    def _copy_data(src_path: str, dst_path: str, size: int, allow_hardlink: bool) -> str:
+        if allow_hardlink:
+            try:
+                os.link(src_path, dst_path)
+                return "hardlink"
+            except OSError:
+                pass # e.g. another filesystem
+        with open(src_path, "rb") as src_file, open(dst_path, "wb") as dst_file:
+            try:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+                return "reflink"
+            except OSError:
+                pass # Not a reflink-capable filesystem pair
+
+            copied = 0
+            try:
+                while copied < size:
+                    sent = os.copy_file_range(src_file.fileno(), dst_file.fileno(), size - copied, copied, copied)
+                    if sent == 0:
+                        break
+                    copied += sent
+                if copied == size:
+                    return "copy_file_range"
+            except OSError as e:
+                if e.errno not in _COPY_FAST_PATH_ERRNOS:
+                    raise
+
+        shutil.copyfile(src_path, dst_path)
+        return "copy"
+
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        digest = hashlib.blake2b()
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(COPY_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
@@ -1,6 +1,8 @@
+import hashlib
 import re
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
-from typing import List, Optional, Dict, Any, Union
+from typing import Iterator, List, Optional, Dict, Any, Tuple, Union
 from utils.custom_logger import Logger
 from utils.command_executor import CommandExecutor
 import subprocess
@@ -13,11 +15,12 @@ class GitOperator:
             raise ValueError("CommandExecutor instance is required")
         self.command_executor = command_executor
 
-    def _execute_git(self, repository_path: str, command: str, args: List[str]) -> subprocess.CompletedProcess:
+    def _execute_git(self, repository_path: str, command: str, args: List[str], quiet: bool = False) -> subprocess.CompletedProcess:
         params = {
             "command": command,
             "args": args,
-            "cwd": repository_path
+            "cwd": repository_path,
+            "quiet": quiet
         }
         return self.command_executor.execute("git_command", params)
 
@@ -145,50 +148,43 @@ class GitOperator:
             self.logger.error(f"Unexpected error getting current branch for {repository_path}: {e}")
             return None
 
-    def get_commit_history(self, repository_path: str, max_count: int = 10) -> List[Dict[str, str]]:
-        commits = []
+    def iter_commit_history(self, repository_path: str, max_count: int = 10) -> Iterator[Dict[str, str]]:
+        format_string = "%H%x00%an <%ae>%x00%aI%x00%s"
+        args = [f"--max-count={max_count}", f"--pretty=format:{format_string}"]
         try:
-            self.logger.info(f"Fetching commit history (max {max_count}) for {repository_path}")
-            format_string = "%H%x00%an <%ae>%x00%aI%x00%s"
-            args = ["log", f"--max-count={max_count}", f"--pretty=format:{format_string}"]
-            result = self._execute_git(repository_path, "log", args)
-            output = result.stdout.strip()
-
-            if not output:
-                self.logger.info(f"No commit history found for {repository_path}")
-                return []
-
-            lines = output.split('\n')
-            for line in lines:
+            for line in self._stream_git(repository_path, "log", args, separator='\n'):
                 if not line:
                     continue
                 parts = line.split('\x00')
                 if len(parts) == 4:
-                    commits.append({
+                    yield {
                         "hash": parts[0],
                         "author": parts[1],
                         "date": parts[2],
                         "message": parts[3].strip()
-                    })
+                    }
                 else:
                      self.logger.warning(f"Skipping malformed commit line in {repository_path}: {line}")
-
-            self.logger.info(f"Successfully retrieved {len(commits)} commits for {repository_path}")
-            return commits
         except subprocess.CalledProcessError as e:
             self.logger.error(f"Failed to get commit history for {repository_path}: {e.stderr}")
-            return []
         except ValueError as e:
             self.logger.error(f"Configuration error getting commit history in {repository_path}: {e}")
-            return []
         except Exception as e:
             self.logger.error(f"Unexpected error getting commit history for {repository_path}: {e}")
+
+    def get_commit_history(self, repository_path: str, max_count: int = 10) -> List[Dict[str, str]]:
+        self.logger.info(f"Fetching commit history (max {max_count}) for {repository_path}")
+        commits = list(self.iter_commit_history(repository_path, max_count))
+        if not commits:
+            self.logger.info(f"No commit history found for {repository_path}")
             return []
+        self.logger.info(f"Successfully retrieved {len(commits)} commits for {repository_path}")
+        return commits
 
     def get_commit_message(self, repository_path: str, commit_hash: str) -> Optional[str]:
         try:
             self.logger.info(f"Getting commit message for {commit_hash} in {repository_path}")
-            args = ["show", "-s", "--format=%B", commit_hash]
+            args = ["-s", "--format=%B", commit_hash]
             result = self._execute_git(repository_path, "show", args)
             message = result.stdout.strip()
             self.logger.info(f"Successfully retrieved commit message for {commit_hash}")
@@ -202,6 +198,27 @@ class GitOperator:
         except Exception as e:
             self.logger.error(f"Unexpected error getting commit message for {commit_hash} in {repository_path}: {e}")
             return None
+    def get_commit_messages(self, repository_path: str, commit_hashes: List[str], chunk_size: int = 500) -> Dict[str, str]:
+        """Full messages for many commits, one git call per chunk instead of one per commit."""
+        messages: Dict[str, str] = {}
+        try:
+            for start in range(0, len(commit_hashes), chunk_size):
+                chunk = commit_hashes[start:start + chunk_size]
+                args = ["-s", "--no-walk=unsorted", "--format=%H%x00%B%x1E"] + chunk
+                result = self._execute_git_binary(repository_path, "show", args)
+                for record in result.stdout.split(b'\x1E'):
+                    commit_hash, separator, body = record.lstrip(b'\n').partition(b'\x00')
+                    if separator:
+                        messages[commit_hash.decode('ascii')] = _decode(body.strip())
+            self.logger.debug(f"Retrieved {len(messages)} commit messages in {repository_path}")
+            return messages
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Failed to get commit messages in {repository_path}: {_decode(e.stderr or b'')}")
+            return messages
+        except Exception as e:
+            self.logger.error(f"Unexpected error getting commit messages in {repository_path}: {e}")
+            return messages
+
     def get_latest_commit_id(self, repository_path: str, branch_name: Optional[str] = None) -> Optional[str]:
         try:
             ref_to_parse = branch_name if branch_name else "HEAD"
@@ -227,10 +244,244 @@ class GitOperator:
             return None
 
 
+    def resolve_commit(self, repository_path: str, ref: str) -> Optional[str]:
+        try:
+            result = self._execute_git(repository_path, "rev-parse", ["-q", "--verify", f"{ref}^{{commit}}"], quiet=True)
+            commit_id = result.stdout.strip()
+            return commit_id or None
+        except subprocess.CalledProcessError:
+            self.logger.debug(f"Ref '{ref}' does not resolve to a commit in {repository_path}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Unexpected error resolving ref '{ref}' in {repository_path}: {e}")
+            return None
+
+    def is_ancestor(self, repository_path: str, ancestor: str, descendant: str) -> bool:
+        """Whether ancestor is reachable from descendant; False also when either ref does not exist."""
+        try:
+            self._execute_git(repository_path, "merge-base", ["--is-ancestor", ancestor, descendant], quiet=True)
+            return True
+        except subprocess.CalledProcessError:
+            return False
+        except Exception as e:
+            self.logger.error(f"Unexpected error checking ancestry of '{ancestor}' in {repository_path}: {e}")
+            return False
+
+    def update_ref(self, repository_path: str, ref: str, commit_id: str) -> bool:
+        try:
+            self._execute_git(repository_path, "update-ref", [ref, commit_id])
+            return True
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"git update-ref {ref} failed in {repository_path}: {e.stderr}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Unexpected error updating ref '{ref}' in {repository_path}: {e}")
+            return False
+
+    def get_symbolic_branch(self, repository_path: str) -> Optional[str]:
+        try:
+            result = self._execute_git(repository_path, "symbolic-ref", ["-q", "--short", "HEAD"])
+            return result.stdout.strip() or None
+        except subprocess.CalledProcessError:
+            self.logger.debug(f"HEAD is detached in {repository_path}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Unexpected error reading symbolic HEAD in {repository_path}: {e}")
+            return None
+
+    def get_remote_branch_sha(self, repository_path: str, remote_name: str, branch_name: str) -> Optional[str]:
+        try:
+            self.logger.info(f"Querying {remote_name} for the sha of branch {branch_name} from {repository_path}")
+            result = self._execute_git(repository_path, "ls-remote", [remote_name, f"refs/heads/{branch_name}"])
+            output = result.stdout.strip()
+            if not output:
+                self.logger.warning(f"Branch {branch_name} not found on remote {remote_name} for {repository_path}")
+                return None
+            return output.split()[0]
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"git ls-remote failed for {remote_name} in {repository_path}: {e.stderr}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Unexpected error querying remote branch sha in {repository_path}: {e}")
+            return None
+
+    def is_worktree_clean(self, repository_path: str, pathspecs: Optional[List[str]] = None, include_untracked: bool = False) -> bool:
+        """Whether tracked files match HEAD; with include_untracked, also that no untracked (non-ignored) files exist."""
+        try:
+            if include_untracked:
+                result = self.command_executor.execute("git_command", {
+                    "command": "status",
+                    "args": ["--porcelain", "--untracked-files=normal", "-z", "--"] + (pathspecs or []),
+                    "cwd": repository_path,
+                    "quiet": True,
+                }, check=False)
+                return result.returncode == 0 and not result.stdout
+            # Tracked files only: refreshing the index and comparing it to HEAD avoids a full untracked scan.
+            self.command_executor.execute("git_command", {"command": "update-index", "args": ["-q", "--refresh"], "cwd": repository_path, "quiet": True}, check=False)
+            result = self.command_executor.execute("git_command", {"command": "diff-index", "args": ["--quiet", "HEAD", "--"] + (pathspecs or []), "cwd": repository_path, "quiet": True}, check=False)
+            return result.returncode == 0
+        except Exception as e:
+            self.logger.error(f"Unexpected error checking worktree state in {repository_path}: {e}")
+            return False
+
+    def get_toplevel(self, path: str) -> Optional[str]:
+        try:
+            result = self._execute_git(path, "rev-parse", ["--show-toplevel"])
+            return result.stdout.strip() or None
+        except subprocess.CalledProcessError:
+            self.logger.debug(f"{path} is not inside a git work tree")
+            return None
+        except Exception as e:
+            self.logger.error(f"Unexpected error finding the work tree of {path}: {e}")
+            return None
+
+    def get_tree_digest(self, repository_path: str, ref: str, prefix: str = "", exclude_prefixes: Optional[List[str]] = None) -> Optional[str]:
+        """sha256 over the committed blob ids below prefix, ignoring entries under exclude_prefixes."""
+        args = ["-r", "--full-tree", "-z", ref] + ([prefix] if prefix else [])
+        excluded = [p.rstrip("/") + "/" for p in (exclude_prefixes or [])]
+        try:
+            result = self._execute_git_binary(repository_path, "ls-tree", args)
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Could not list tree {ref}:{prefix} in {repository_path}: {_decode(e.stderr or b'').strip()}")
+            return None
+        except ValueError as e:
+            self.logger.error(f"Configuration error listing tree {ref}:{prefix} in {repository_path}: {e}")
+            return None
+        digest = hashlib.sha256()
+        for entry in result.stdout.split(b'\x00'):
+            if not entry:
+                continue
+            path = _decode(entry.partition(b'\t')[2])
+            if any((path + "/").startswith(p) for p in excluded):
+                continue
+            digest.update(entry + b'\x00')
+        return digest.hexdigest()
+
+    def worktree_matches_head(self, repository_path: str, pathspecs: List[str], max_workers: int = 8) -> bool:
+        """True only if every file under pathspecs is byte-identical to HEAD and nothing was added or removed.
+
+        Blob ids are computed here, in parallel, instead of by `git add`, which would
+        rehash every large binary just to find nothing changed. Any doubt answers False.
+        """
+        try:
+            object_format = self._execute_git(repository_path, "rev-parse", ["--show-object-format"]).stdout.strip()
+            head_listing = self._execute_git_binary(repository_path, "ls-tree", ["-r", "-z", "HEAD", "--"] + pathspecs).stdout
+            index_listing = self._execute_git_binary(repository_path, "ls-files", ["-z", "--"] + pathspecs).stdout
+            untracked_listing = self._execute_git_binary(repository_path, "ls-files", ["-z", "--others", "--exclude-standard", "--"] + pathspecs).stdout
+        except subprocess.CalledProcessError as e:
+            self.logger.debug(f"Could not compare {pathspecs} with HEAD in {repository_path}: {_decode(e.stderr or b'').strip()}")
+            return False
+        except ValueError as e:
+            self.logger.error(f"Configuration error comparing {pathspecs} with HEAD in {repository_path}: {e}")
+            return False
+
+        if untracked_listing.strip(b'\x00'):
+            return False
+        head_entries: Dict[str, Tuple[str, str]] = {} # path -> (mode, blob id)
+        for entry in head_listing.split(b'\x00'):
+            if not entry:
+                continue
+            meta, _, path = entry.partition(b'\t')
+            mode, _, object_id = _decode(meta).split(" ")
+            head_entries[_decode(path)] = (mode, object_id)
+        index_paths = {_decode(path) for path in index_listing.split(b'\x00') if path}
+        if index_paths != set(head_entries):
+            return False # Staged additions or removals still need a commit
+
+        hash_name = "sha256" if object_format == "sha256" else "sha1"
+        def entry_matches(item: Tuple[str, Tuple[str, str]]) -> bool:
+            path, (mode, object_id) = item
+            return self._worktree_entry_matches(os.path.join(repository_path, path), mode, object_id, hash_name)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="blob-digest") as pool:
+            return all(pool.map(entry_matches, head_entries.items()))
+
+    @staticmethod
+    def _worktree_entry_matches(file_path: str, mode: str, object_id: str, hash_name: str) -> bool:
+        """Compares one work tree file with a tree entry by recomputing its git blob id."""
+        if mode == "160000":
+            return True # Submodule commits are not ours to add
+        try:
+            if mode == "120000":
+                if not os.path.islink(file_path):
+                    return False
+                content = os.fsencode(os.readlink(file_path))
+                digest = hashlib.new(hash_name, b"blob %d\x00" % len(content))
+                digest.update(content)
+                return digest.hexdigest() == object_id
+            if os.path.islink(file_path) or not os.path.isfile(file_path):
+                return False
+            if (mode == "100755") != os.access(file_path, os.X_OK):
+                return False
+            digest = hashlib.new(hash_name, b"blob %d\x00" % os.path.getsize(file_path))
+            with open(file_path, "rb") as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b""):
+                    digest.update(chunk)
+            return digest.hexdigest() == object_id
+        except OSError:
+            return False
+
+    def is_shallow_repository(self, repository_path: str) -> bool:
+        try:
+            result = self._execute_git(repository_path, "rev-parse", ["--is-shallow-repository"])
+            return result.stdout.strip() == "true"
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Could not determine whether {repository_path} is shallow: {e.stderr}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Unexpected error checking shallow state of {repository_path}: {e}")
+            return False
+
+    def get_shallow_boundaries(self, repository_path: str) -> List[str]:
+        try:
+            result = self._execute_git(repository_path, "rev-parse", ["--git-path", "shallow"])
+            shallow_file = os.path.join(repository_path, result.stdout.strip())
+            if not os.path.exists(shallow_file):
+                return []
+            with open(shallow_file, "r", encoding="utf-8") as handle:
+                return [line.strip() for line in handle if line.strip()]
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Could not locate the shallow file of {repository_path}: {e.stderr}")
+            return []
+        except Exception as e:
+            self.logger.error(f"Unexpected error reading shallow boundaries of {repository_path}: {e}")
+            return []
+
+    def range_reaches_shallow_boundary(self, repository_path: str, start_ref: str, end_ref: str) -> bool:
+        """True when start_ref..end_ref may be truncated by the shallow boundary and history must be deepened."""
+        boundaries = set(self.get_shallow_boundaries(repository_path))
+        if not boundaries:
+            return False
+        if not self.resolve_commit(repository_path, start_ref) or not self.resolve_commit(repository_path, end_ref):
+            return True
+        try:
+            result = self._execute_git(repository_path, "rev-list", [f"{start_ref}..{end_ref}"])
+            return any(commit_id in boundaries for commit_id in result.stdout.split())
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"git rev-list failed for {start_ref}..{end_ref} in {repository_path}: {e.stderr}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Unexpected error checking shallow boundary for {start_ref}..{end_ref} in {repository_path}: {e}")
+            return True
+
+    def deepen_history(self, repository_path: str, remote_name: str, depth: Optional[int] = None) -> bool:
+        # depth=None removes the shallow boundary entirely
+        args = [remote_name, f"--deepen={depth}" if depth else "--unshallow", "--tags"]
+        try:
+            self.logger.info(f"Deepening history of {repository_path} from {remote_name}: {args[1]}")
+            self._execute_git(repository_path, "fetch", args)
+            return True
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Failed to deepen history of {repository_path}: {e.stderr}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Unexpected error deepening history of {repository_path}: {e}")
+            return False
+
     def get_remote_url(self, repository_path: str, remote_name: str) -> Optional[str]:
         try:
             self.logger.info(f"Getting URL for remote '{remote_name}' in {repository_path}")
-            args = ["remote", "get-url", remote_name]
+            args = ["get-url", remote_name]
             result = self._execute_git(repository_path, "remote", args)
             url = result.stdout.strip()
             self.logger.info(f"Successfully retrieved URL for remote '{remote_name}': {url}")
@@ -246,63 +497,92 @@ class GitOperator:
             return None
 
 
-    def get_commits_between(self, repository_path: str, start_ref: str, end_ref: str) -> List[Dict[str, str]]:
-        commit_details = []
-        try:
-            self.logger.info(f"Fetching commits between {start_ref} and {end_ref} in {repository_path}")
-            # Format: Hash<NULL>AuthorName<NULL>AuthorEmail<NULL>Body<RECORD_SEPARATOR>
-            format_string = "%H%x00%an%x00%ae%x00%B%x1E"
-            # Git log command: git log start_ref..end_ref --pretty=format:...
-            # Note: The range start_ref..end_ref excludes start_ref and includes end_ref.
-            range_spec = f"{start_ref}..{end_ref}"
-            args = [range_spec, f"--pretty=format:{format_string}"]
-
-            result = self._execute_git(repository_path, "log", args)
-            raw_output = result.stdout
-
-            if not raw_output:
-                self.logger.info(f"No commits found between {start_ref} and {end_ref} in {repository_path}")
-                return []
-
-            # Split commits using the Record Separator (\x1E)
-            # Strip potential leading/trailing separators before splitting
-            raw_commits = raw_output.strip().strip('\x1E').split('\x1E')
+    def _execute_git_binary(self, repository_path: str, command: str, args: List[str]) -> subprocess.CompletedProcess:
+        # stdout and stderr stay bytes; parsers decode only the fields they use
+        params = {
+            "command": command,
+            "args": args,
+            "cwd": repository_path,
+            "binary": True
+        }
+        return self.command_executor.execute("git_command", params)
 
-            for raw_commit in raw_commits:
+    def _stream_git(self, repository_path: str, command: str, args: List[str], separator: Union[str, bytes]) -> Iterator[Union[str, bytes]]:
+        params = {
+            "command": command,
+            "args": args,
+            "cwd": repository_path
+        }
+        return self.command_executor.stream_git_command(params, separator=separator)
+
+    def iter_commits_between(self, repository_path: str, start_ref: str, end_ref: str, include_body: bool = True) -> Iterator[Dict[str, str]]:
+        """Yields commits of start_ref..end_ref while git log is still running; see get_commits_between for the keys."""
+        # Format: Hash<NULL>AuthorName<NULL>AuthorEmail<NULL>Subject[<NULL>Body]<RECORD_SEPARATOR>
+        format_string = "%H%x00%an%x00%ae%x00%s%x00%B%x1E" if include_body else "%H%x00%an%x00%ae%x00%s%x1E"
+        expected_parts = 5 if include_body else 4
+        # Note: The range start_ref..end_ref excludes start_ref and includes end_ref.
+        range_spec = f"{start_ref}..{end_ref}"
+        args = [range_spec, f"--pretty=format:{format_string}"]
+        try:
+            for raw_commit in self._stream_git(repository_path, "log", args, separator=b'\x1E'):
+                # Records after the first are preceded by the newline git puts between entries
+                raw_commit = raw_commit.lstrip(b'\n')
                 if not raw_commit:
                     continue
-                # Split fields using the Null byte (\x00)
-                parts = raw_commit.split('\x00')
-                if len(parts) == 4:
-                    commit_details.append({
-                        'id': parts[0],
-                        'author': f"{parts[1]} <{parts[2]}>",
-                        'message': parts[3].strip()
-                    })
+                # Split fields using the Null byte (\x00); only the fields returned are decoded
+                parts = raw_commit.split(b'\x00')
+                if len(parts) == expected_parts:
+                    detail = {
+                        'id': parts[0].decode('ascii'),
+                        'author': f"{_decode(parts[1])} <{_decode(parts[2])}>",
+                        'subject': _decode(parts[3].strip())
+                    }
+                    if include_body:
+                        detail['message'] = _decode(parts[4].strip())
+                    yield detail
                 else:
                     # Log potentially sensitive commit data carefully (e.g., truncate)
-                    log_data = raw_commit[:100] + '...' if len(raw_commit) > 100 else raw_commit
+                    log_data = _decode(raw_commit[:100]) + ('...' if len(raw_commit) > 100 else '')
                     self.logger.warning(f"Skipping malformed commit data in {repository_path} between {start_ref}..{end_ref}. Parts found: {len(parts)}. Data snippet: {log_data}")
-
-            self.logger.info(f"Successfully retrieved {len(commit_details)} commits between {start_ref} and {end_ref} in {repository_path}")
-            return commit_details
-
         except subprocess.CalledProcessError as e:
             # Handle specific git errors like non-existent refs
-            stderr_lower = e.stderr.lower()
+            stderr_lower = (e.stderr or "").lower()
             if "unknown revision or path not in the working tree" in stderr_lower or "invalid object name" in stderr_lower:
                  self.logger.warning(f"Could not find refs {start_ref} or {end_ref} in {repository_path}. Error: {e.stderr.strip()}")
             else:
-                self.logger.error(f"Git log command failed for {repository_path} between {start_ref}..{end_ref}: {e.stderr.strip()}")
-            return []
-        except ValueError as e: # Catch errors from _execute_git
+                self.logger.error(f"Git log command failed for {repository_path} between {start_ref}..{end_ref}: {(e.stderr or '').strip()}")
+        except ValueError as e:
             self.logger.error(f"Configuration error getting commits between {start_ref}..{end_ref} in {repository_path}: {e}")
-            return []
         except Exception as e:
             self.logger.error(f"Unexpected error getting commits between {start_ref}..{end_ref} in {repository_path}: {e}", exc_info=True)
-            return []
-
 
+    def get_commits_between(self, repository_path: str, start_ref: str, end_ref: str, include_body: bool = True) -> List[Dict[str, str]]:
+        # Each dict has 'id', 'author' and 'subject'; 'message' (the full body) only with include_body
+        self.logger.info(f"Fetching commits between {start_ref} and {end_ref} in {repository_path}")
+        commit_details = list(self.iter_commits_between(repository_path, start_ref, end_ref, include_body))
+        if not commit_details:
+            self.logger.info(f"No commits found between {start_ref} and {end_ref} in {repository_path}")
+            return []
+        self.logger.info(f"Successfully retrieved {len(commit_details)} commits between {start_ref} and {end_ref} in {repository_path}")
+        return commit_details
+
+    def iter_patch_ids(self, repository_path: str, start_ref: str, end_ref: str) -> Iterator[Tuple[str, str]]:
+        """Yields (commit_id, stable patch-id) for every non-merge commit of start_ref..end_ref."""
+        range_spec = f"{start_ref}..{end_ref}"
+        stages = [
+            ["git", "log", "-p", "--no-merges", "--no-color", "--no-ext-diff", range_spec],
+            ["git", "patch-id", "--stable"],
+        ]
+        try:
+            for line in self.command_executor.stream_pipeline(stages, cwd=repository_path, separator=b'\n'):
+                # Each line is "<patch-id> <commit-id>"; commits without a diff produce no line
+                parts = line.split()
+                if len(parts) == 2:
+                    yield parts[1].decode('ascii'), parts[0].decode('ascii')
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Computing patch-ids failed for {repository_path} between {start_ref}..{end_ref}: {(e.stderr or '').strip()}")
+        except ValueError as e:
+            self.logger.error(f"Configuration error computing patch-ids for {start_ref}..{end_ref} in {repository_path}: {e}")
 
     def format_patch(self, repository_path: str, start_ref: str, end_ref: str, output_dir: str) -> List[str]:
         """
@@ -367,6 +647,127 @@ class GitOperator:
             return []
 
 
+    def list_commit_ids(self, repository_path: str, start_ref: str, end_ref: str) -> List[str]:
+        """Non-merge commits of start_ref..end_ref, oldest first (the order format-patch numbers them in)."""
+        try:
+            result = self._execute_git(repository_path, "rev-list", ["--reverse", "--no-merges", f"{start_ref}..{end_ref}"])
+            return result.stdout.split()
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"git rev-list failed for {start_ref}..{end_ref} in {repository_path}: {e.stderr}")
+        except ValueError as e:
+            self.logger.error(f"Configuration error listing commits of {start_ref}..{end_ref} in {repository_path}: {e}")
+        return []
+
+    def get_binary_changes(self, repository_path: str, start_ref: str, end_ref: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Finds the binary files each non-merge commit of start_ref..end_ref touches.
+
+        Returns:
+            commit id -> list of {'path', 'blob', 'size', 'old_blob', 'old_size'} per binary file.
+            'blob' is the post-image (None when the file is deleted), 'old_blob' the
+            pre-image (None when it is added); sizes are 0 for a missing side.
+        """
+        args = ["--no-merges", "--no-renames", "--format=%x1E%H", "--raw", "--numstat", "--no-abbrev", "-z", f"{start_ref}..{end_ref}"]
+        changes: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            for record in self._stream_git(repository_path, "log", args, separator=b'\x1E'):
+                tokens = record.split(b'\x00')
+                commit_id = tokens[0].strip().decode('ascii')
+                if not commit_id:
+                    continue
+                raw_entries: Dict[bytes, Tuple[Optional[str], Optional[str]]] = {}
+                binary_paths: List[bytes] = []
+                index = 1
+                while index < len(tokens):
+                    token = tokens[index].lstrip(b'\n')
+                    if token.startswith(b':'):
+                        # ":<old mode> <new mode> <old blob> <new blob> <status>" followed by the path token
+                        fields = token.split()
+                        if index + 1 < len(tokens) and len(fields) >= 5:
+                            old_blob = fields[2].decode('ascii')
+                            new_blob = fields[3].decode('ascii')
+                            # An all-zero id marks the missing side of an addition or deletion
+                            raw_entries[tokens[index + 1]] = (old_blob if old_blob.strip('0') else None, new_blob if new_blob.strip('0') else None)
+                        index += 2
+                        continue
+                    if token.startswith(b'-\t-\t'):
+                        binary_paths.append(token.split(b'\t', 2)[2])
+                    index += 1
+                binaries = [(path,) + raw_entries[path] for path in binary_paths if path in raw_entries]
+                if not binaries:
+                    continue
+                new_sizes = self._get_blob_sizes(repository_path, commit_id, [path for path, _, new_blob in binaries if new_blob])
+                old_sizes = self._get_blob_sizes(repository_path, f"{commit_id}^", [path for path, old_blob, _ in binaries if old_blob])
+                changes[commit_id] = [
+                    {
+                        'path': _decode(path),
+                        'blob': new_blob,
+                        'size': new_sizes.get(path, 0),
+                        'old_blob': old_blob,
+                        'old_size': old_sizes.get(path, 0)
+                    }
+                    for path, old_blob, new_blob in binaries
+                ]
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Listing binary changes failed for {repository_path} between {start_ref}..{end_ref}: {(_decode(e.stderr) if isinstance(e.stderr, bytes) else (e.stderr or '')).strip()}")
+        except ValueError as e:
+            self.logger.error(f"Configuration error listing binary changes of {start_ref}..{end_ref} in {repository_path}: {e}")
+        return changes
+
+    def _get_blob_sizes(self, repository_path: str, tree_ish: str, paths: List[bytes]) -> Dict[bytes, int]:
+        # ls-tree -l -z prints "<mode> blob <id> <size>\t<path>\0" per entry
+        if not paths:
+            return {}
+        args = ["-l", "-z", tree_ish, "--"] + [_decode(path) for path in paths]
+        result = self._execute_git_binary(repository_path, "ls-tree", args)
+        sizes: Dict[bytes, int] = {}
+        for entry in result.stdout.split(b'\x00'):
+            meta, _, path = entry.partition(b'\t')
+            fields = meta.split()
+            if len(fields) == 4 and fields[3].isdigit():
+                sizes[path] = int(fields[3])
+        return sizes
+
+    def format_commit_patch(self, repository_path: str, commit_id: str, output_dir: str, number: int, extra_args: Optional[List[str]] = None) -> Optional[str]:
+        """Writes the patch of a single commit as <number>-<subject>.patch and returns its absolute path."""
+        args = ["-1", commit_id, f"--start-number={number}", "--output-directory", output_dir] + (extra_args or [])
+        try:
+            result = self._execute_git(repository_path, "format-patch", args)
+            # format-patch prints the name of every file it wrote
+            written = result.stdout.strip()
+            return os.path.abspath(os.path.join(repository_path, written)) if written else None
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"git format-patch failed for {commit_id} in {repository_path}: {(e.stderr or '').strip()}")
+        except ValueError as e:
+            self.logger.error(f"Configuration error during format-patch of {commit_id} in {repository_path}: {e}")
+        return None
+
+    def write_blob(self, repository_path: str, blob_id: str, destination_path: str) -> bool:
+        """Streams a blob into destination_path without holding it in memory."""
+        temp_path = f"{destination_path}.tmp"
+        params = {
+            "command": "cat-file",
+            "args": ["blob", blob_id],
+            "cwd": repository_path,
+            "binary": True,
+            "stdout_path": temp_path
+        }
+        try:
+            self.command_executor.execute("git_command", params)
+            os.replace(temp_path, destination_path)
+            return True
+        except subprocess.CalledProcessError as e:
+            self.logger.error(f"Could not read blob {blob_id} in {repository_path}: {_decode(e.stderr or b'').strip()}")
+        except OSError as e:
+            self.logger.error(f"Could not store blob {blob_id} at {destination_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace")
+
+
 def parse_gerrit_remote_info(remote_url: str) -> Dict[str, Optional[str]]:
     parsed_url = urlparse(remote_url)
     info = {